@@ -0,0 +1,248 @@
+"""Seeded synthetic dataset: users with Zipf-distributed skills and locations, swaps and feedback.
+
+Bulk-loads into DATABASE_URL (Postgres, or SQLite as a local stand-in) with
+chunked core INSERTs, then rebuilds the rating summaries and swap counts. The same --seed and
+--scale always produce the same rows, so results can be compared across commits:
+
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.dataset --scale 10k --reset
+"""
+
+import argparse
+import bisect
+import csv
+import itertools
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import insert
+
+from db.database import Base, engine, create_tables
+from models.user import User
+from models.swap import SwapRequest, SwapStatus, Feedback
+from models.skill import Skill, UserSkill, SkillKind
+from services.skill_dictionary import skill_key
+from utils.gazetteer import GAZETTEER_PATH
+from utils.geo import geohash_encode
+from jobs.backfill_ratings import backfill_rating_summaries
+from jobs.reconcile_swap_counts import reconcile_swap_counts
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+SWAPS_PER_USER = 2
+CHUNK_SIZE = 5_000
+SKILL_ZIPF_EXPONENT = 1.1
+USER_ZIPF_EXPONENT = 0.8
+# All timestamps fall in the year before this, so reruns produce identical rows
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+HEAD_SKILLS = [
+    "Python", "JavaScript", "Guitar", "Spanish", "Cooking", "Photography", "Yoga", "Graphic Design",
+    "Piano", "French", "SQL", "Drawing", "Public Speaking", "Excel", "Knitting", "German", "Chess",
+    "Video Editing", "Marketing", "Writing", "Running", "Baking", "Japanese", "React", "Gardening",
+    "Singing", "Data Analysis", "Woodworking", "Swimming", "Mandarin", "Machine Learning", "Painting",
+    "UX Research", "Accounting", "Pottery", "Rust", "Go", "Dancing", "Sewing", "Meditation",
+]
+LONG_TAIL_SKILLS = 2_000
+USER_PREFIX = "bench_"
+STATUS_WEIGHTS = {
+    SwapStatus.PENDING: 0.4,
+    SwapStatus.ACCEPTED: 0.25,
+    SwapStatus.REJECTED: 0.15,
+    SwapStatus.COMPLETED: 0.2,
+}
+RATING_WEIGHTS = (0.03, 0.05, 0.15, 0.35, 0.42)
+
+def user_id(index: int) -> str:
+    return f"{USER_PREFIX}{index:07d}"
+
+class Zipf:
+    """Draws indexes 0..n-1 with P(k) proportional to 1 / (k + 1) ** exponent"""
+
+    def __init__(self, n: int, exponent: float):
+        self._cumulative = list(itertools.accumulate(1 / (k + 1) ** exponent for k in range(n)))
+
+    def draw(self, rng: random.Random) -> int:
+        return bisect.bisect_left(self._cumulative, rng.random() * self._cumulative[-1])
+
+    def sample(self, rng: random.Random, count: int) -> List[int]:
+        """``count`` distinct draws (fewer only if the distribution is tiny)"""
+        picked: Dict[int, None] = {}
+        for _ in range(count * 10):
+            picked.setdefault(self.draw(rng))
+            if len(picked) == count:
+                break
+        return list(picked)
+
+def skill_names() -> List[str]:
+    return HEAD_SKILLS + [f"Skill {index}" for index in range(LONG_TAIL_SKILLS)]
+
+def places() -> List[Tuple[str, float, float]]:
+    """Gazetteer cities, largest first, which is the order the Zipf ranks assume"""
+    with open(GAZETTEER_PATH, newline="", encoding="utf-8") as f:
+        return [
+            (f"{row['name']}, {row['country']}", float(row["latitude"]), float(row["longitude"]))
+            for row in csv.DictReader(f)
+        ]
+
+def _chunks(rows: Iterator[dict]) -> Iterator[List[dict]]:
+    while True:
+        chunk = list(itertools.islice(rows, CHUNK_SIZE))
+        if not chunk:
+            return
+        yield chunk
+
+def _load(table, rows: Iterator[dict]) -> int:
+    written = 0
+    for chunk in _chunks(rows):
+        with engine.begin() as conn:
+            conn.execute(insert(table), chunk)
+        written += len(chunk)
+    return written
+
+def _timestamp(rng: random.Random) -> datetime:
+    return EPOCH - timedelta(seconds=rng.randrange(365 * 24 * 3600))
+
+def generate_users(rng: random.Random, count: int, skills: Sequence[str]) -> Iterator[Tuple[dict, List[int], List[int]]]:
+    """(user row, offered skill indexes, wanted skill indexes) for ``count`` users"""
+    skill_zipf = Zipf(len(skills), SKILL_ZIPF_EXPONENT)
+    cities = places()
+    city_zipf = Zipf(len(cities), USER_ZIPF_EXPONENT)
+    for index in range(count):
+        offered = skill_zipf.sample(rng, rng.randint(1, 5))
+        wanted = [skill for skill in skill_zipf.sample(rng, rng.randint(1, 4)) if skill not in offered]
+        location, latitude, longitude = cities[city_zipf.draw(rng)]
+        # Spread users over roughly 20 km around the city centre
+        latitude += rng.uniform(-0.1, 0.1)
+        longitude += rng.uniform(-0.15, 0.15)
+        row = {
+            "id": user_id(index),
+            "name": f"Bench User {index}",
+            "email": f"{user_id(index)}@example.com",
+            "location": location,
+            "latitude": latitude,
+            "longitude": longitude,
+            "geohash": geohash_encode(latitude, longitude),
+            "skills_offered": [skills[skill] for skill in offered],
+            "skills_wanted": [skills[skill] for skill in wanted],
+            "availability": rng.choice(["weekends", "evenings", "weekdays", "flexible"]),
+            "is_public": rng.random() < 0.9,
+            "is_active": True,
+            "is_banned": rng.random() < 0.005,
+            "created_at": _timestamp(rng),
+        }
+        yield row, offered, wanted
+
+def generate_swaps(rng: random.Random, users: int, skills: Sequence[str]) -> Iterator[dict]:
+    """Swaps whose endpoints are Zipf-popular users, so some inboxes are very large"""
+    user_zipf = Zipf(users, USER_ZIPF_EXPONENT)
+    skill_zipf = Zipf(len(skills), SKILL_ZIPF_EXPONENT)
+    statuses, weights = list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values())
+    pending = set()
+    for _ in range(users * SWAPS_PER_USER):
+        from_index = rng.randrange(users)
+        to_index = user_zipf.draw(rng)
+        if to_index == from_index:
+            to_index = (to_index + 1) % users
+        created_at = _timestamp(rng)
+        swap = {
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "from_user_id": user_id(from_index),
+            "to_user_id": user_id(to_index),
+            "from_user_name": f"Bench User {from_index}",
+            "to_user_name": f"Bench User {to_index}",
+            "skill_offered": skills[skill_zipf.draw(rng)],
+            "skill_wanted": skills[skill_zipf.draw(rng)],
+            "message": "Want to swap?",
+            "status": rng.choices(statuses, weights)[0],
+            "created_at": created_at,
+            "version": 1,
+        }
+        if swap["status"] == SwapStatus.PENDING:
+            # uq_swap_requests_pending_pair allows one pending request per users and skills
+            key = (from_index, to_index, swap["skill_offered"], swap["skill_wanted"])
+            if key in pending:
+                swap["status"] = SwapStatus.REJECTED
+            pending.add(key)
+        yield swap
+
+def generate_feedback(rng: random.Random, swaps: Iterator[dict]) -> Iterator[dict]:
+    """Feedback from the requester on most completed swaps"""
+    for swap in swaps:
+        if swap["status"] == SwapStatus.COMPLETED and rng.random() < 0.7:
+            yield {
+                "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                "swap_request_id": swap["id"],
+                "from_user_id": swap["from_user_id"],
+                "to_user_id": swap["to_user_id"],
+                "rating": rng.choices(range(1, 6), RATING_WEIGHTS)[0],
+                "comment": None,
+                "created_at": swap["created_at"] + timedelta(days=rng.randint(1, 30)),
+            }
+
+def seed(scale: int, seed_value: int) -> Dict[str, int]:
+    """Load ``scale`` users and their swaps/feedback; returns row counts per table"""
+    skills = skill_names()
+    counts = {"skills": _load(Skill.__table__, iter(
+        {"id": index + 1, "name": name, "key": skill_key(name)} for index, name in enumerate(skills)
+    ))}
+
+    junction: List[dict] = []
+
+    def users() -> Iterator[dict]:
+        for row, offered, wanted in generate_users(random.Random(seed_value), scale, skills):
+            for kind, indexes in ((SkillKind.OFFERED, offered), (SkillKind.WANTED, wanted)):
+                junction.extend(
+                    {"user_id": row["id"], "kind": kind, "skill_id": index + 1} for index in indexes
+                )
+            yield row
+
+    counts["users"] = 0
+    for chunk in _chunks(users()):
+        with engine.begin() as conn:
+            conn.execute(insert(User.__table__), chunk)
+            conn.execute(insert(UserSkill.__table__), junction)
+        counts["users"] += len(chunk)
+        junction.clear()
+
+    swap_rng = random.Random(seed_value + 1)
+    feedback_rng = random.Random(seed_value + 2)
+    written_swaps: List[dict] = []
+
+    def swaps() -> Iterator[dict]:
+        for swap in generate_swaps(swap_rng, scale, skills):
+            written_swaps.append(swap)
+            yield swap
+
+    counts["swap_requests"] = counts["feedback"] = 0
+    for chunk in _chunks(swaps()):
+        with engine.begin() as conn:
+            conn.execute(insert(SwapRequest.__table__), chunk)
+        counts["swap_requests"] += len(chunk)
+        counts["feedback"] += _load(Feedback.__table__, generate_feedback(feedback_rng, iter(written_swaps)))
+        written_swaps.clear()
+
+    counts["user_rating_summaries"] = backfill_rating_summaries()
+    counts["user_swap_counts"] = reconcile_swap_counts()
+    return counts
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=SCALES, default="10k")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="drop and recreate every table first")
+    args = parser.parse_args()
+
+    if args.reset:
+        Base.metadata.drop_all(bind=engine)
+    create_tables()
+    started = time.perf_counter()
+    counts = seed(SCALES[args.scale], args.seed)
+    elapsed = time.perf_counter() - started
+    for table, count in counts.items():
+        print(f"{table:<24}{count:>12,}")
+    print(f"Loaded {args.scale} dataset (seed {args.seed}) in {elapsed:.1f}s")
+
+if __name__ == "__main__":
+    main()
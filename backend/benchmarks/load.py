@@ -0,0 +1,252 @@
+"""Async load driver: p50/p95/p99 latency and throughput per route, written as JSON.
+
+Drives the seeded benchmark users (see benchmarks.dataset) against the app in
+process, or against a running server with --base-url. Tokens are unsigned, so
+a server under test must run with CLERK_VERIFY_SIGNATURE=false (and
+RATE_LIMIT_PER_SECOND=0 unless rate limiting is what you are measuring);
+in-process runs set both. DATABASE_URL must point at the same database, which
+is read to pick users and pending swaps:
+
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.load --requests 2000 --output after.json --baseline before.json
+
+Accepting swaps consumes pending rows: reseed before runs you want to compare.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+from jose import jwt
+
+ROUTES = (
+    "GET /api/users/search", "GET /api/swaps/", "GET /api/swaps/counts", "PATCH /api/swaps/{id}/accept"
+)
+
+Request = Tuple[str, str, str]  # (method, url, user id)
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of sorted ``samples``"""
+    if not samples:
+        return None
+    return samples[max(0, math.ceil(q * len(samples)) - 1)]
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+class Workload:
+    """Request generators per route, drawn from what is actually in the database"""
+
+    def __init__(self, rng: random.Random):
+        from sqlalchemy import select
+
+        from benchmarks.dataset import USER_PREFIX, Zipf
+        from db.database import engine
+        from models.user import User
+        from models.skill import Skill
+        from models.swap import SwapRequest, SwapStatus
+
+        with engine.connect() as conn:
+            self.users = conn.execute(
+                select(User.id).where(User.id.startswith(USER_PREFIX), User.is_banned == False).order_by(User.id)
+            ).scalars().all()
+            self.skills = conn.execute(select(Skill.name).order_by(Skill.id)).scalars().all()
+            self.pending = conn.execute(
+                select(SwapRequest.id, SwapRequest.to_user_id)
+                .where(SwapRequest.status == SwapStatus.PENDING)
+                .order_by(SwapRequest.id)
+            ).all()
+        if not self.users:
+            raise SystemExit("No benchmark users found; run python -m benchmarks.dataset first")
+        rng.shuffle(self.pending)
+        self.rng = rng
+        # Users and skills are ranked in generation order, so this matches the dataset's skew
+        self._user_zipf = Zipf(len(self.users), 0.8)
+        self._skill_zipf = Zipf(len(self.skills), 1.1)
+
+    def search(self) -> Request:
+        user = self.users[self.rng.randrange(len(self.users))]
+        if self.rng.random() < 0.7:
+            skill = self.skills[self._skill_zipf.draw(self.rng)]
+            return "GET", f"/api/users/search?{httpx.QueryParams(skill=skill)}", user
+        return "GET", "/api/users/search", user
+
+    def swaps(self) -> Request:
+        return "GET", "/api/swaps/", self.users[self._user_zipf.draw(self.rng)]
+
+    def counts(self) -> Request:
+        return "GET", "/api/swaps/counts", self.users[self._user_zipf.draw(self.rng)]
+
+    def accept(self) -> Optional[Request]:
+        if not self.pending:
+            return None
+        swap_id, to_user_id = self.pending.pop()
+        return "PATCH", f"/api/swaps/{swap_id}/accept", to_user_id
+
+    def generator(self, route: str) -> Callable[[], Optional[Request]]:
+        return dict(zip(ROUTES, (self.search, self.swaps, self.counts, self.accept)))[route]
+
+class Tokens:
+    def __init__(self):
+        self._tokens: Dict[str, str] = {}
+
+    def header(self, user_id: str) -> Dict[str, str]:
+        token = self._tokens.get(user_id)
+        if token is None:
+            claims = {"sub": user_id, "exp": int(time.time()) + 24 * 3600}
+            token = self._tokens[user_id] = jwt.encode(claims, "benchmark", algorithm="HS256")
+        return {"Authorization": f"Bearer {token}"}
+
+async def run_route(
+    client: httpx.AsyncClient,
+    next_request: Callable[[], Optional[Request]],
+    tokens: Tokens,
+    requests: int,
+    duration: Optional[float],
+    concurrency: int
+) -> dict:
+    """Send up to ``requests`` requests (or for ``duration`` seconds) from ``concurrency`` workers"""
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    errors = 0
+    remaining = requests
+    deadline = time.perf_counter() + duration if duration else None
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0 and (deadline is None or time.perf_counter() < deadline):
+            request = next_request()
+            if request is None:
+                return
+            remaining -= 1
+            method, url, user_id = request
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, headers=tokens.header(user_id))
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[response.status_code] += 1
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "mean_ms": sum(latencies) / len(latencies) if latencies else None,
+        "max_ms": latencies[-1] if latencies else None,
+        "throughput_rps": len(latencies) / elapsed if elapsed else None,
+    }
+
+async def run(args) -> dict:
+    workload = Workload(random.Random(args.seed))
+    tokens = Tokens()
+    routes = args.routes or list(ROUTES)
+    results = {}
+
+    async def drive(client: httpx.AsyncClient) -> None:
+        for route in routes:
+            next_request = workload.generator(route)
+            if args.warmup:
+                await run_route(client, next_request, tokens, args.warmup, None, args.concurrency)
+            results[route] = await run_route(
+                client, next_request, tokens, args.requests, args.duration, args.concurrency
+            )
+            summary = results[route]
+            print(
+                f"{route:<32}{summary['requests']:>8} req {summary['throughput_rps'] or 0:>9.1f} rps "
+                f"p50 {summary['p50_ms'] or 0:>7.2f} p95 {summary['p95_ms'] or 0:>7.2f} "
+                f"p99 {summary['p99_ms'] or 0:>7.2f} ms  errors {summary['errors']}"
+            )
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30) as client:
+            await drive(client)
+    else:
+        from main import app
+
+        transport = httpx.ASGITransport(app=app)
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=30) as client:
+                await drive(client)
+
+    from db.database import engine
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "target": args.base_url or "in-process",
+            "database": engine.dialect.name,
+            "users": len(workload.users),
+            "concurrency": args.concurrency,
+            "requests_per_route": args.requests,
+            "duration_per_route": args.duration,
+            "seed": args.seed,
+        },
+        "routes": results,
+    }
+
+def compare(baseline: dict, current: dict) -> None:
+    """Print per-route deltas against an earlier results file"""
+    print(f"\nvs {baseline['meta'].get('commit') or 'baseline'}")
+    print(f"{'route':<32}{'metric':<16}{'before':>10}{'after':>10}{'change':>9}")
+    for route, after in current["routes"].items():
+        before = baseline["routes"].get(route)
+        if before is None:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps"):
+            old, new = before.get(metric), after.get(metric)
+            if old and new:
+                print(f"{route:<32}{metric:<16}{old:>10.2f}{new:>10.2f}{(new - old) / old * 100:>8.1f}%")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", help="running server, e.g. http://localhost:8000 (default: in process)")
+    parser.add_argument("--routes", nargs="*", choices=ROUTES)
+    parser.add_argument("--requests", type=int, default=1000, help="measured requests per route")
+    parser.add_argument("--duration", type=float, help="stop each route after this many seconds")
+    parser.add_argument("--warmup", type=int, default=50, help="unmeasured requests per route")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="results JSON from an earlier run to compare against")
+    args = parser.parse_args()
+
+    if not args.base_url:
+        # Settings are read at import, so these must be in place before the app loads
+        os.environ.setdefault("CLERK_VERIFY_SIGNATURE", "false")
+        os.environ.setdefault("RATE_LIMIT_PER_SECOND", "0")
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(json.load(f), results)
+
+if __name__ == "__main__":
+    main()
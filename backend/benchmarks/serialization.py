@@ -0,0 +1,149 @@
+"""Per-route serialization benchmark: ORM + response_model + stdlib JSON vs rows + TypeAdapter + orjson.
+
+Seeds an in-memory SQLite database and times the load-validate-encode work of
+each list route both ways, excluding HTTP and auth overhead:
+
+    python -m benchmarks.serialization --users 2000 --page 200 --repeat 30
+"""
+
+import argparse
+import random
+import time
+import uuid
+import warnings
+from typing import Callable, Dict
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, joinedload, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from db.database import Base
+from models.user import User
+from models.swap import SwapRequest, SwapStatus
+from models.rating import UserRatingSummary
+from schemas.user import UserResponse, UserPublicResponse, UserSearchPage
+from schemas.swap import SwapRequestResponse, SwapRequestPage
+from services.user_service import UserService
+from services.swap_service import SwapService
+from utils.serialization import list_response
+
+SKILLS = ["python", "guitar", "spanish", "cooking", "design", "sql", "yoga", "photography"]
+
+def seed(db: Session, users: int, swap_count: int) -> None:
+    rng = random.Random(42)
+    ids = [f"user_{i}" for i in range(users)]
+    db.add_all(
+        User(
+            id=user_id,
+            name=f"User {i}",
+            email=f"{user_id}@example.com",
+            location="Somewhere",
+            skills_offered=rng.sample(SKILLS, 3),
+            skills_wanted=rng.sample(SKILLS, 2),
+            availability="weekends"
+        )
+        for i, user_id in enumerate(ids)
+    )
+    db.add_all(
+        UserRatingSummary(user_id=user_id, rating_count=2, rating_sum=7, rating_average=3.5)
+        for user_id in ids[::2]
+    )
+    db.add_all(
+        SwapRequest(
+            id=str(uuid.uuid4()),
+            from_user_id=ids[0] if i % 2 else rng.choice(ids),
+            to_user_id=rng.choice(ids) if i % 2 else ids[0],
+            from_user_name="A",
+            to_user_name="B",
+            skill_offered="python",
+            # Distinct per swap: pending swaps are unique per (pair, skills)
+            skill_wanted=f"guitar {i}",
+            message="Let's swap",
+            status=SwapStatus.PENDING
+        )
+        for i in range(swap_count)
+    )
+    db.commit()
+
+def _legacy_encode(model, content) -> bytes:
+    """What FastAPI does for a response_model route: validate again, jsonable_encoder, json.dumps"""
+    validated = TypeAdapter(model).validate_python(content, from_attributes=True)
+    return JSONResponse(jsonable_encoder(validated)).body
+
+def legacy_routes(limit: int) -> Dict[str, Callable[[Session], bytes]]:
+    def search(db):
+        users = (
+            db.query(User).options(joinedload(User.rating_summary))
+            .order_by(User.created_at, User.id).limit(limit + 1).all()[:limit]
+        )
+        page = UserSearchPage(items=[UserPublicResponse.from_orm(user) for user in users])
+        return _legacy_encode(UserSearchPage, page)
+
+    def swaps(db):
+        rows = db.query(SwapRequest).filter(
+            (SwapRequest.from_user_id == "user_0") | (SwapRequest.to_user_id == "user_0")
+        ).order_by(SwapRequest.created_at.desc()).limit(limit + 1).all()[:limit]
+        return _legacy_encode(SwapRequestPage, SwapRequestPage(items=rows))
+
+    def admin_users(db):
+        return _legacy_encode(list[UserResponse], db.query(User).all())
+
+    return {"GET /api/users/search": search, "GET /api/swaps/": swaps, "GET /api/admin/users": admin_users}
+
+def fast_routes(limit: int) -> Dict[str, Callable[[Session], bytes]]:
+    def search(db):
+        users, next_cursor = UserService.get_all_public_users(db, limit)
+        return list_response(UserPublicResponse, users, next_cursor=next_cursor).body
+
+    def swaps(db):
+        rows, next_cursor = SwapService.get_user_swaps(db, "user_0", limit)
+        return list_response(SwapRequestResponse, rows, next_cursor=next_cursor).body
+
+    def admin_users(db):
+        return list_response(UserResponse, UserService.get_all_users(db)).body
+
+    return {"GET /api/users/search": search, "GET /api/swaps/": swaps, "GET /api/admin/users": admin_users}
+
+def timed(fn: Callable[[Session], bytes], factory, repeat: int) -> float:
+    """Median milliseconds per call, each call on a fresh session like a request"""
+    samples = []
+    for _ in range(repeat):
+        db = factory()
+        try:
+            started = time.perf_counter()
+            fn(db)
+            samples.append((time.perf_counter() - started) * 1000)
+        finally:
+            db.close()
+    samples.sort()
+    return samples[len(samples) // 2]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--swaps", type=int, default=1000)
+    parser.add_argument("--page", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+    # The legacy path calls from_orm exactly as the routes used to
+    warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    seed(db, args.users, args.swaps)
+    db.close()
+
+    legacy, fast = legacy_routes(args.page), fast_routes(args.page)
+    print(f"{'route':<24}{'legacy ms':>12}{'fast ms':>12}{'speedup':>10}")
+    for route in legacy:
+        before = timed(legacy[route], factory, args.repeat)
+        after = timed(fast[route], factory, args.repeat)
+        print(f"{route:<24}{before:>12.2f}{after:>12.2f}{before / after:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,72 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     database_url: str = os.getenv("DATABASE_URL", "postgresql://postgres:rv@localhost/skillswap")
+    async_db: bool = os.getenv("ASYNC_DB", "False").lower() == "true"
+    async_database_url: str = os.getenv("ASYNC_DATABASE_URL", "")
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    db_pool_timeout: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    db_pool_recycle: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    db_pool_pre_ping: bool = os.getenv("DB_POOL_PRE_PING", "True").lower() == "true"
     clerk_secret_key: str = os.getenv("CLERK_SECRET_KEY", "")
     clerk_publishable_key: str = os.getenv("CLERK_PUBLISHABLE_KEY", "")
+    clerk_jwks_url: str = os.getenv("CLERK_JWKS_URL", "https://api.clerk.com/v1/jwks")
+    clerk_jwks_file: str = os.getenv("CLERK_JWKS_FILE", "")
+    admin_user_ids: str = os.getenv("ADMIN_USER_IDS", "")
+    clerk_verify_signature: bool = os.getenv("CLERK_VERIFY_SIGNATURE", "True").lower() == "true"
+    jwks_cache_ttl: int = int(os.getenv("JWKS_CACHE_TTL", "3600"))
+    jwks_fetch_timeout: float = float(os.getenv("JWKS_FETCH_TIMEOUT", "5"))
+    jwt_leeway_seconds: int = int(os.getenv("JWT_LEEWAY_SECONDS", "5"))
+    verified_claims_cache_size: int = int(os.getenv("VERIFIED_CLAIMS_CACHE_SIZE", "10000"))
     api_host: str = os.getenv("API_HOST", "0.0.0.0")
     api_port: int = int(os.getenv("API_PORT", "8000"))
     debug: bool = os.getenv("DEBUG", "False").lower() == "true"
+    search_page_size: int = int(os.getenv("SEARCH_PAGE_SIZE", "50"))
+    search_max_page_size: int = int(os.getenv("SEARCH_MAX_PAGE_SIZE", "200"))
+    hot_skill_threshold: int = int(os.getenv("HOT_SKILL_THRESHOLD", "3"))
+    hot_skill_cache_size: int = int(os.getenv("HOT_SKILL_CACHE_SIZE", "256"))
+    hot_skill_cache_ttl: int = int(os.getenv("HOT_SKILL_CACHE_TTL", "300"))
+    hot_skill_max_keys: int = int(os.getenv("HOT_SKILL_MAX_KEYS", "50000"))
+    match_index_ttl: int = int(os.getenv("MATCH_INDEX_TTL", "300"))
+    inbox_page_size: int = int(os.getenv("INBOX_PAGE_SIZE", "50"))
+    inbox_max_page_size: int = int(os.getenv("INBOX_MAX_PAGE_SIZE", "200"))
+    swap_batch_max_items: int = int(os.getenv("SWAP_BATCH_MAX_ITEMS", "500"))
+    swap_event_buffer_size: int = int(os.getenv("SWAP_EVENT_BUFFER_SIZE", "100"))
+    swap_event_max_users: int = int(os.getenv("SWAP_EVENT_MAX_USERS", "100000"))
+    swap_event_queue_size: int = int(os.getenv("SWAP_EVENT_QUEUE_SIZE", "256"))
+    swap_event_max_streams: int = int(os.getenv("SWAP_EVENT_MAX_STREAMS", "10000"))
+    swap_event_heartbeat: float = float(os.getenv("SWAP_EVENT_HEARTBEAT", "15"))
+    idempotency_key_ttl: int = int(os.getenv("IDEMPOTENCY_KEY_TTL", "86400"))
+    idempotency_pending_timeout: int = int(os.getenv("IDEMPOTENCY_PENDING_TIMEOUT", "60"))
+    export_batch_size: int = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+    bulk_import_chunk_size: int = int(os.getenv("BULK_IMPORT_CHUNK_SIZE", "1000"))
+    bulk_import_max_errors: int = int(os.getenv("BULK_IMPORT_MAX_ERRORS", "1000"))
+    bulk_import_max_bytes: int = int(os.getenv("BULK_IMPORT_MAX_BYTES", str(32 * 1024 * 1024)))
+    user_cache_size: int = int(os.getenv("USER_CACHE_SIZE", "10000"))
+    user_cache_ttl: int = int(os.getenv("USER_CACHE_TTL", "60"))
+    broadcast_backend: str = os.getenv("BROADCAST_BACKEND", "local")
+    broadcast_queue_size: int = int(os.getenv("BROADCAST_QUEUE_SIZE", "10000"))
+    name_propagation_worker: bool = os.getenv("NAME_PROPAGATION_WORKER", "True").lower() == "true"
+    name_propagation_interval: float = float(os.getenv("NAME_PROPAGATION_INTERVAL", "5"))
+    name_propagation_batch_size: int = int(os.getenv("NAME_PROPAGATION_BATCH_SIZE", "500"))
+    near_default_radius_km: float = float(os.getenv("NEAR_DEFAULT_RADIUS_KM", "25"))
+    near_max_radius_km: float = float(os.getenv("NEAR_MAX_RADIUS_KM", "200"))
+    skill_suggest_limit: int = int(os.getenv("SKILL_SUGGEST_LIMIT", "10"))
+    skill_suggest_max_limit: int = int(os.getenv("SKILL_SUGGEST_MAX_LIMIT", "50"))
+    skill_suggest_rebuild_interval: float = float(os.getenv("SKILL_SUGGEST_REBUILD_INTERVAL", "900"))
+    metrics_enabled: bool = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+    slow_query_ms: float = float(os.getenv("SLOW_QUERY_MS", "200"))
+    n_plus_one_threshold: int = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+    admission_control: bool = os.getenv("ADMISSION_CONTROL", "True").lower() == "true"
+    admission_route_concurrency: int = int(os.getenv("ADMISSION_ROUTE_CONCURRENCY", "32"))
+    admission_route_limits: str = os.getenv("ADMISSION_ROUTE_LIMITS", "GET /api/admin/users/export=2,GET /api/admin/swaps/export=2,POST /api/swaps/batch=4")
+    admission_queue_size: int = int(os.getenv("ADMISSION_QUEUE_SIZE", "64"))
+    admission_queue_timeout: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2"))
+    admission_exempt_paths: str = os.getenv("ADMISSION_EXEMPT_PATHS", "/,/health,/health/db,/health/admission,/health/events,/health/broadcast,/metrics,/api/swaps/events")
+    rate_limit_per_second: float = float(os.getenv("RATE_LIMIT_PER_SECOND", "10"))
+    rate_limit_burst: int = int(os.getenv("RATE_LIMIT_BURST", "40"))
+    rate_limit_max_users: int = int(os.getenv("RATE_LIMIT_MAX_USERS", "100000"))
+    name_propagation_max_users: int = int(os.getenv("NAME_PROPAGATION_MAX_USERS", "100"))
 
 @lru_cache()
 def get_settings():
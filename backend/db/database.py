@@ -1,16 +1,44 @@
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.sql import functions
 from config import get_settings
+from db.pool_metrics import PoolTelemetry, TimedQueuePool, TimedAsyncAdaptedQueuePool
+from db.query_metrics import QueryTelemetry, instrument_engine
 
 settings = get_settings()
 
-engine = create_engine(settings.database_url)
+def pool_options(url: str, poolclass) -> dict:
+    """Engine pool arguments from settings (SQLite keeps its default pool)"""
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+engine = create_engine(settings.database_url, **pool_options(settings.database_url, TimedQueuePool))
+pool_telemetry = PoolTelemetry("sync")
+engine.pool.telemetry = pool_telemetry
+query_telemetry = QueryTelemetry(slow_seconds=settings.slow_query_ms / 1000)
+instrument_engine(engine, query_telemetry)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+@compiles(functions.now, "sqlite")
+def _sqlite_now(element, compiler, **kw):
+    # CURRENT_TIMESTAMP has second precision and a different text format from
+    # the values SQLAlchemy binds, which breaks (created_at, id) keyset
+    # comparisons; emit timestamps in the bound-parameter format instead
+    return "(strftime('%Y-%m-%d %H:%M:%f', 'now') || '000')"
+
 def get_db():
     db = SessionLocal()
     try:
@@ -20,3 +48,51 @@ def get_db():
 
 def create_tables():
     Base.metadata.create_all(bind=engine)
+
+def dialect_insert(db, table):
+    """INSERT construct with ON CONFLICT support for the session's dialect"""
+    if db.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(table)
+
+def async_database_url(url: str) -> str:
+    """Map a sync database URL onto its asyncio driver"""
+    if url.startswith("postgresql://"):
+        return "postgresql+asyncpg://" + url[len("postgresql://"):]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+# The async engine is only built when enabled so the asyncio drivers stay optional
+async_engine = None
+AsyncSessionLocal = None
+async_pool_telemetry = None
+
+if settings.async_db:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    _async_url = settings.async_database_url or async_database_url(settings.database_url)
+    async_engine = create_async_engine(
+        _async_url, **pool_options(_async_url, TimedAsyncAdaptedQueuePool)
+    )
+    async_pool_telemetry = PoolTelemetry("async")
+    async_engine.sync_engine.pool.telemetry = async_pool_telemetry
+    instrument_engine(async_engine.sync_engine, query_telemetry)
+    # Objects stay loaded after commit so async routers can serialize them
+    # without triggering an implicit (and illegal) lazy load
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def pool_stats() -> list:
+    """Current occupancy and checkout-wait telemetry for every engine pool"""
+    stats = [pool_telemetry.snapshot(engine.pool)]
+    if async_engine is not None:
+        stats.append(async_pool_telemetry.snapshot(async_engine.sync_engine.pool))
+    return stats
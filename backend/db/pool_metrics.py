@@ -0,0 +1,85 @@
+
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+class PoolTelemetry:
+    """Checkout wait times and timeouts for one connection pool"""
+
+    def __init__(self, name: str, window: int = 2048):
+        self.name = name
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=window)
+        self.checkouts = 0
+        self.timeouts = 0
+
+    def observe_wait(self, seconds: float) -> None:
+        with self._lock:
+            self._waits.append(seconds)
+            self.checkouts += 1
+
+    def observe_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def _percentile(self, waits, q: float) -> Optional[float]:
+        if not waits:
+            return None
+        return round(waits[min(len(waits) - 1, int(q * len(waits)))] * 1000, 3)
+
+    def snapshot(self, pool) -> dict:
+        """Report live pool occupancy plus wait percentiles over the recent window"""
+        with self._lock:
+            waits = sorted(self._waits)
+            checkouts, timeouts = self.checkouts, self.timeouts
+        stats = {
+            "pool": self.name,
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "wait_p50_ms": self._percentile(waits, 0.50),
+            "wait_p99_ms": self._percentile(waits, 0.99),
+            "wait_max_ms": round(waits[-1] * 1000, 3) if waits else None,
+        }
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            })
+        else:
+            stats["status"] = pool.status()
+        return stats
+
+class _TimedCheckoutMixin:
+    """Times Pool.connect(), i.e. how long a caller waited for a connection"""
+
+    telemetry: Optional[PoolTelemetry] = None
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            if self.telemetry is not None:
+                self.telemetry.observe_timeout()
+            raise
+        finally:
+            if self.telemetry is not None:
+                self.telemetry.observe_wait(time.perf_counter() - start)
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep reporting into the same telemetry
+        pool = super().recreate()
+        pool.telemetry = self.telemetry
+        return pool
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
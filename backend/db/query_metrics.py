@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+
+class RequestQueries:
+    """SQL statements issued while serving one request"""
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter = Counter()
+
+    def observe(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """SELECTs run at least ``threshold`` times: a query per row of a list (N+1)"""
+        return [
+            (statement, count) for statement, count in self.statements.items()
+            if count >= threshold and statement.lstrip()[:6].upper() == "SELECT"
+        ]
+
+# Set by the metrics middleware for the duration of a request; sync handlers
+# see it too because the threadpool copies the request's context
+current_queries: ContextVar[Optional[RequestQueries]] = ContextVar("current_queries", default=None)
+
+class QueryTelemetry:
+    """Statement totals for every engine plus the slow-query log"""
+
+    def __init__(self, slow_seconds: float):
+        self.slow_seconds = slow_seconds
+        self._lock = threading.Lock()
+        self.statements = 0
+        self.seconds = 0.0
+        self.slow = 0
+
+    def observe(self, statement: str, seconds: float) -> None:
+        slow = seconds >= self.slow_seconds
+        with self._lock:
+            self.statements += 1
+            self.seconds += seconds
+            self.slow += slow
+        queries = current_queries.get()
+        if queries is not None:
+            queries.observe(statement, seconds)
+        if slow:
+            where = f" during {queries.label}" if queries is not None else ""
+            print(f"Slow query ({seconds * 1000:.1f} ms){where}: {' '.join(statement.split())[:500]}")
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"statements": self.statements, "seconds": self.seconds, "slow": self.slow}
+
+def instrument_engine(engine, telemetry: QueryTelemetry) -> None:
+    """Time every cursor execute on ``engine`` (pass ``sync_engine`` for an async engine)"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        telemetry.observe(statement, time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(exception_context):
+        # after_cursor_execute does not run for a failed statement
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
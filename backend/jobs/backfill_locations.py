@@ -0,0 +1,61 @@
+"""Add users.latitude/longitude/geohash and geocode existing profiles from their location text.
+
+Run once after deploying "near me" search (safe to re-run; users who already
+have coordinates are left alone):
+
+    python -m jobs.backfill_locations
+"""
+
+from sqlalchemy import inspect, text
+
+from config import get_settings
+from db.database import SessionLocal, engine
+from models.user import User
+from services.user_service import place_user
+
+settings = get_settings()
+
+COLUMNS = {
+    "latitude": "DOUBLE PRECISION",
+    "longitude": "DOUBLE PRECISION",
+    "geohash": "VARCHAR(12)",
+}
+
+def add_location_columns() -> None:
+    """Add the coordinate columns and the geohash prefix index if they are missing"""
+    existing = {column["name"] for column in inspect(engine).get_columns("users")}
+    with engine.begin() as conn:
+        for name, sql_type in COLUMNS.items():
+            if name not in existing:
+                conn.execute(text(f"ALTER TABLE users ADD COLUMN {name} {sql_type}"))
+                print(f"Added users.{name}")
+        ops = " text_pattern_ops" if engine.dialect.name == "postgresql" else ""
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_users_geohash ON users (geohash{ops})"))
+
+def backfill_locations(batch_size: int) -> int:
+    """Geocode users without coordinates in batches of ``batch_size``; returns users placed"""
+    placed = 0
+    last_id = ""
+    db = SessionLocal()
+    try:
+        while True:
+            users = db.query(User).filter(
+                User.id > last_id,
+                User.latitude.is_(None),
+                User.location.isnot(None)
+            ).order_by(User.id).limit(batch_size).all()
+            if not users:
+                return placed
+            for user in users:
+                place_user(user, coordinates_given=False)
+                placed += user.geohash is not None
+            db.commit()
+            last_id = users[-1].id
+            db.expunge_all()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    add_location_columns()
+    placed = backfill_locations(settings.export_batch_size)
+    print(f"Placed {placed} users on the map")
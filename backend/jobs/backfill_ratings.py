@@ -0,0 +1,63 @@
+
+"""Rebuild user_rating_summaries from the feedback table.
+
+Run once after deploying rating aggregates (and any time the summaries are
+suspected to have drifted):
+
+    python -m jobs.backfill_ratings
+"""
+
+from sqlalchemy import case, func, inspect, text
+
+from db.database import SessionLocal, engine, create_tables
+from models.swap import Feedback
+from models.rating import UserRatingSummary, RATING_VALUES
+
+def migrate_rating_column() -> None:
+    """Convert feedback.rating from its legacy string type to smallint (Postgres)"""
+    if engine.dialect.name != "postgresql":
+        return
+    columns = {column["name"]: column for column in inspect(engine).get_columns("feedback")}
+    if "rating" in columns and "CHAR" in str(columns["rating"]["type"]).upper():
+        with engine.begin() as conn:
+            conn.execute(text(
+                "ALTER TABLE feedback ALTER COLUMN rating TYPE smallint USING trim(rating)::smallint"
+            ))
+            conn.execute(text(
+                "ALTER TABLE feedback ADD CONSTRAINT ck_feedback_rating_range "
+                "CHECK (rating BETWEEN 1 AND 5)"
+            ))
+        print("Converted feedback.rating to smallint")
+
+def backfill_rating_summaries() -> int:
+    """Recompute every summary with one aggregate INSERT ... SELECT; returns rows written"""
+    summary = UserRatingSummary.__table__
+    aggregate = (
+        func.count(Feedback.id),
+        func.sum(Feedback.rating),
+        func.avg(Feedback.rating * 1.0),
+        *(func.sum(case((Feedback.rating == value, 1), else_=0)) for value in RATING_VALUES),
+    )
+    select_stmt = (
+        Feedback.__table__.select()
+        .with_only_columns(Feedback.to_user_id, *aggregate)
+        .group_by(Feedback.to_user_id)
+    )
+    db = SessionLocal()
+    try:
+        db.execute(summary.delete())
+        result = db.execute(summary.insert().from_select(
+            ["user_id", "rating_count", "rating_sum", "rating_average"]
+            + [f"rating_{value}" for value in RATING_VALUES],
+            select_stmt
+        ))
+        db.commit()
+        return result.rowcount
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    create_tables()
+    migrate_rating_column()
+    written = backfill_rating_summaries()
+    print(f"Backfilled rating summaries for {written} users")
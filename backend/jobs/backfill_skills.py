@@ -0,0 +1,52 @@
+"""Populate skills/user_skills from the users.skills_offered/skills_wanted arrays.
+
+Run once after deploying the skill dictionary (safe to re-run; each user's
+junction rows are rewritten and their arrays canonicalized in place):
+
+    python -m jobs.backfill_skills
+"""
+
+from sqlalchemy import text
+
+from config import get_settings
+from db.database import SessionLocal, engine, create_tables
+from models.user import User
+from services.skill_dictionary import write_user_skills
+
+settings = get_settings()
+
+def drop_array_indexes() -> None:
+    """Drop the GIN indexes that served array containment search (Postgres)"""
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS ix_users_skills_offered_gin"))
+        conn.execute(text("DROP INDEX IF EXISTS ix_users_skills_wanted_gin"))
+
+def backfill_user_skills(batch_size: int) -> int:
+    """Intern every user's skills in batches of ``batch_size`` users; returns users processed"""
+    processed = 0
+    last_id = ""
+    db = SessionLocal()
+    try:
+        while True:
+            users = db.query(User).filter(User.id > last_id).order_by(User.id).limit(batch_size).all()
+            if not users:
+                return processed
+            for user in users:
+                offered, wanted = write_user_skills(
+                    db, user.id, user.skills_offered or [], user.skills_wanted or []
+                )
+                user.skills_offered, user.skills_wanted = offered, wanted
+            db.commit()
+            processed += len(users)
+            last_id = users[-1].id
+            db.expunge_all()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    create_tables()
+    drop_array_indexes()
+    processed = backfill_user_skills(settings.export_batch_size)
+    print(f"Backfilled skills for {processed} users")
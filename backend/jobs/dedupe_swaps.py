@@ -0,0 +1,84 @@
+"""Remove duplicate pending swaps and feedback, then add the unique indexes that prevent them.
+
+Run once after deploying idempotent swap and feedback creation, before
+relying on the constraints (safe to re-run). The earliest row of each
+duplicate group is kept; rating summaries and swap counts are rebuilt if
+anything was removed:
+
+    python -m jobs.dedupe_swaps
+"""
+
+from sqlalchemy import and_, delete, exists, inspect, text, tuple_
+from sqlalchemy.orm import aliased
+
+from db.database import SessionLocal, engine, create_tables
+from models.swap import SwapRequest, Feedback, SwapStatus
+from jobs.backfill_ratings import backfill_rating_summaries
+from jobs.reconcile_swap_counts import reconcile_swap_counts
+
+PENDING_PAIR_COLUMNS = ("from_user_id", "to_user_id", "skill_offered", "skill_wanted")
+
+def delete_duplicate_swaps() -> int:
+    """Delete pending swaps repeating an earlier pending one; returns rows deleted"""
+    earlier = aliased(SwapRequest)
+    stmt = delete(SwapRequest).where(
+        SwapRequest.status == SwapStatus.PENDING,
+        ~exists().where(Feedback.swap_request_id == SwapRequest.id),
+        exists().where(
+            earlier.status == SwapStatus.PENDING,
+            and_(*(getattr(earlier, column) == getattr(SwapRequest, column) for column in PENDING_PAIR_COLUMNS)),
+            tuple_(earlier.created_at, earlier.id) < tuple_(SwapRequest.created_at, SwapRequest.id)
+        )
+    )
+    return _execute(stmt)
+
+def delete_duplicate_feedback() -> int:
+    """Delete feedback repeating an earlier one by the same user on the same swap; returns rows deleted"""
+    earlier = aliased(Feedback)
+    stmt = delete(Feedback).where(exists().where(
+        earlier.swap_request_id == Feedback.swap_request_id,
+        earlier.from_user_id == Feedback.from_user_id,
+        tuple_(earlier.created_at, earlier.id) < tuple_(Feedback.created_at, Feedback.id)
+    ))
+    return _execute(stmt)
+
+def _execute(stmt) -> int:
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt, execution_options={"synchronize_session": False})
+        db.commit()
+        return result.rowcount
+    finally:
+        db.close()
+
+def add_unique_indexes() -> None:
+    """Create the pending-pair and feedback uniqueness indexes on tables that predate them"""
+    for index in SwapRequest.__table__.indexes:
+        if index.name == "uq_swap_requests_pending_pair":
+            index.create(bind=engine, checkfirst=True)
+    inspector = inspect(engine)
+    names = {constraint["name"] for constraint in inspector.get_unique_constraints("feedback")}
+    names |= {index["name"] for index in inspector.get_indexes("feedback")}
+    if "uq_feedback_swap_from" not in names:
+        with engine.begin() as conn:
+            if engine.dialect.name == "postgresql":
+                conn.execute(text(
+                    "ALTER TABLE feedback ADD CONSTRAINT uq_feedback_swap_from UNIQUE (swap_request_id, from_user_id)"
+                ))
+            else:
+                # SQLite cannot add constraints to an existing table
+                conn.execute(text(
+                    "CREATE UNIQUE INDEX uq_feedback_swap_from ON feedback (swap_request_id, from_user_id)"
+                ))
+        print("Added uq_feedback_swap_from")
+
+if __name__ == "__main__":
+    create_tables()
+    swaps = delete_duplicate_swaps()
+    feedback = delete_duplicate_feedback()
+    print(f"Deleted {swaps} duplicate pending swaps and {feedback} duplicate feedback")
+    add_unique_indexes()
+    if feedback:
+        backfill_rating_summaries()
+    if swaps:
+        reconcile_swap_counts()
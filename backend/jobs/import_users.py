@@ -0,0 +1,51 @@
+"""Bulk-create or update users from an NDJSON or CSV file, as POST /api/admin/users/bulk does.
+
+Streams the file, so its size is not limited by memory. Rejected rows are
+printed as NDJSON (line, id, error) to stderr:
+
+    python -m jobs.import_users partners.ndjson
+    python -m jobs.import_users partners.csv --format csv --chunk-size 2000
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from config import get_settings
+from db.database import SessionLocal, create_tables
+from services.user_import import import_users
+from utils.bulk_import import records
+
+settings = get_settings()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["ndjson", "csv"], help="default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=settings.bulk_import_chunk_size)
+    args = parser.parse_args()
+    import_format = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+
+    create_tables()
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        with open(args.path, newline="", encoding="utf-8-sig") as f:
+            result = import_users(db, records(f, import_format), chunk_size=args.chunk_size)
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - started
+
+    for error in result.errors:
+        print(json.dumps(error.model_dump()), file=sys.stderr)
+    if result.failed > len(result.errors):
+        print(f"... and {result.failed - len(result.errors)} more rejected rows", file=sys.stderr)
+    loaded = result.created + result.updated
+    print(
+        f"Imported {loaded} of {result.received} rows ({result.created} created, {result.updated} updated, "
+        f"{result.failed} rejected) in {elapsed:.1f}s, {loaded / elapsed if elapsed else 0:,.0f} rows/s"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+"""Drain the user_name_changes queue into swap_requests.
+
+The API process runs this as a background thread (NAME_PROPAGATION_WORKER);
+deployments that disable it can run the same pass from cron instead:
+
+    python -m jobs.propagate_user_names
+"""
+
+from db.database import create_tables
+from services.name_propagation import name_propagator
+
+if __name__ == "__main__":
+    create_tables()
+    drained = name_propagator.drain()
+    print(f"Propagated {drained} queued user renames")
@@ -0,0 +1,18 @@
+"""Delete expired Idempotency-Key records.
+
+Expired keys are already ignored (a reused key simply runs again), so this
+only keeps the table small; run it periodically, e.g. hourly:
+
+    python -m jobs.purge_idempotency_keys
+"""
+
+from db.database import SessionLocal
+from services.idempotency import IdempotencyService
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        deleted = IdempotencyService.purge_expired(db)
+    finally:
+        db.close()
+    print(f"Purged {deleted} expired idempotency keys")
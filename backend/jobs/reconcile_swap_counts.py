@@ -0,0 +1,69 @@
+"""Repair drift between user_swap_counts and swap_requests.
+
+Run once after deploying swap counts (it fills in users who already have
+swaps), then periodically to correct anything that changed swaps outside
+SwapService:
+
+    python -m jobs.reconcile_swap_counts
+"""
+
+from collections import Counter, defaultdict
+from typing import Dict
+
+from sqlalchemy import func, select
+
+from db.database import SessionLocal, engine, create_tables
+from models.swap import SwapRequest
+from models.swap_count import UserSwapCounts, SWAP_COUNT_COLUMNS, swap_count_column
+from services.swap_service import apply_swap_count_deltas
+
+BATCH_SIZE = 1000
+
+def swap_count_drift() -> Dict[str, Dict[str, int]]:
+    """Per-user corrections (recounted minus stored), for users whose counts are off.
+
+    Both sides are read in one snapshot on Postgres (REPEATABLE READ), so a
+    swap written concurrently is either in both or in neither and the
+    corrections stay valid when applied as increments after it commits.
+    """
+    swaps = SwapRequest.__table__
+    counts = UserSwapCounts.__table__
+    expected: Dict[str, Counter] = defaultdict(Counter)
+    options = {"isolation_level": "REPEATABLE READ"} if engine.dialect.name == "postgresql" else {}
+    with engine.connect().execution_options(**options) as conn, conn.begin():
+        for direction, user_column in (("sent", swaps.c.from_user_id), ("received", swaps.c.to_user_id)):
+            for user_id, status, count in conn.execute(
+                select(user_column, swaps.c.status, func.count()).group_by(user_column, swaps.c.status)
+            ):
+                expected[user_id][swap_count_column(direction, status)] = count
+        stored = {row.user_id: row for row in conn.execute(select(counts))}
+
+    drift = {}
+    for user_id in expected.keys() | stored.keys():
+        recounted = expected.get(user_id, {})
+        row = stored.get(user_id)
+        delta = {
+            column: recounted.get(column, 0) - (getattr(row, column) if row is not None else 0)
+            for column in SWAP_COUNT_COLUMNS
+        }
+        if any(delta.values()):
+            drift[user_id] = delta
+    return drift
+
+def reconcile_swap_counts() -> int:
+    """Apply the corrections in batches; returns the number of users corrected"""
+    drift = swap_count_drift()
+    user_ids = sorted(drift)
+    db = SessionLocal()
+    try:
+        for start in range(0, len(user_ids), BATCH_SIZE):
+            apply_swap_count_deltas(db, {user_id: drift[user_id] for user_id in user_ids[start:start + BATCH_SIZE]})
+            db.commit()
+    finally:
+        db.close()
+    return len(drift)
+
+if __name__ == "__main__":
+    create_tables()
+    corrected = reconcile_swap_counts()
+    print(f"Corrected swap counts for {corrected} users")
@@ -1,11 +1,18 @@
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from config import get_settings
-from db.database import create_tables
-from routers import users, swaps, admin
+from db.database import create_tables, pool_stats, query_telemetry
+from utils.admission import AdmissionController, AdmissionControlMiddleware, TokenBuckets, parse_route_limits
+from utils.broadcast import broadcast
+from utils.metrics import CONTENT_TYPE, MetricsMiddleware, render_metrics
+from services.name_propagation import name_propagator
+from services.skill_suggest import skill_suggest_refresher
+from services.swap_events import swap_events
+from routers import users, swaps, admin, skills
 
 settings = get_settings()
 
@@ -13,16 +20,41 @@ settings = get_settings()
 async def lifespan(app: FastAPI):
     # Startup
     create_tables()
+    broadcast.start()
+    skill_suggest_refresher.start()
+    if settings.name_propagation_worker:
+        name_propagator.start()
     yield
     # Shutdown
+    name_propagator.stop()
+    skill_suggest_refresher.stop()
+    broadcast.stop()
 
 app = FastAPI(
     title="Skill Swap Platform API",
     description="Backend API for the Skill Swap Platform",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
+admission = AdmissionController(
+    concurrency=settings.admission_route_concurrency,
+    queue_size=settings.admission_queue_size,
+    queue_timeout=settings.admission_queue_timeout,
+    route_limits=parse_route_limits(settings.admission_route_limits),
+    exempt_paths=settings.admission_exempt_paths.split(","),
+    buckets=TokenBuckets(
+        settings.rate_limit_per_second, settings.rate_limit_burst, settings.rate_limit_max_users
+    ) if settings.rate_limit_per_second > 0 else None
+)
+if settings.admission_control:
+    # Added before CORS so shed responses still carry CORS headers
+    app.add_middleware(AdmissionControlMiddleware, controller=admission)
+if settings.metrics_enabled:
+    # Outside admission control so queue time and shed requests are measured
+    app.add_middleware(MetricsMiddleware, n_plus_one_threshold=settings.n_plus_one_threshold)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -33,8 +65,15 @@ app.add_middleware(
 )
 
 # Include routers
-app.include_router(users.router, prefix="/api")
-app.include_router(swaps.router, prefix="/api")
+if settings.async_db:
+    # AsyncSession-backed handlers keep DB-bound requests off the threadpool
+    from routers import async_users, async_swaps
+    app.include_router(async_users.router, prefix="/api")
+    app.include_router(async_swaps.router, prefix="/api")
+else:
+    app.include_router(users.router, prefix="/api")
+    app.include_router(swaps.router, prefix="/api")
+app.include_router(skills.router, prefix="/api")
 app.include_router(admin.router, prefix="/api")
 
 @app.get("/")
@@ -45,6 +84,37 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/health/db")
+async def db_health_check():
+    """Connection pool occupancy, overflow use and checkout wait percentiles"""
+    return {"pools": pool_stats()}
+
+@app.get("/health/admission")
+async def admission_health_check():
+    """Per-route in-flight and queued requests, shed counts and rate-limited requests"""
+    return admission.stats()
+
+@app.get("/health/events")
+async def events_health_check():
+    """Open swap event streams and users with buffered events on this worker"""
+    return swap_events.stats()
+
+@app.get("/health/broadcast")
+async def broadcast_health_check():
+    """Cross-worker broadcast backlog, NOTIFYs sent, failed attempts and dropped messages"""
+    return broadcast.stats()
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics for this worker: routes, SQL, pools, admission control and broadcast"""
+    body = render_metrics(
+        query_telemetry.snapshot(),
+        pool_stats(),
+        admission.stats() if settings.admission_control else None,
+        broadcast.stats()
+    )
+    return PlainTextResponse(body, media_type=CONTENT_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -1,5 +1,13 @@
 
 from .user import User
-from .swap import SwapRequest, Feedback, SwapStatus
+from .swap import SwapRequest, Feedback, SwapStatus, SWAP_TRANSITIONS
+from .rating import UserRatingSummary
+from .swap_count import UserSwapCounts
+from .name_change import UserNameChange
+from .skill import Skill, UserSkill, SkillKind
+from .idempotency import IdempotencyKey
 
-__all__ = ["User", "SwapRequest", "Feedback", "SwapStatus"]
+__all__ = [
+    "User", "SwapRequest", "Feedback", "SwapStatus", "SWAP_TRANSITIONS", "UserRatingSummary",
+    "UserSwapCounts", "UserNameChange", "Skill", "UserSkill", "SkillKind", "IdempotencyKey"
+]
@@ -0,0 +1,21 @@
+
+from sqlalchemy import Column, String, Integer, DateTime, LargeBinary
+from sqlalchemy.sql import func
+from db.database import Base
+
+class IdempotencyKey(Base):
+    """A client's Idempotency-Key and the response it was answered with.
+
+    ``status_code`` is NULL while the first request is still running; such a
+    claim expires quickly so a crashed request does not block retries for long.
+    """
+    __tablename__ = "idempotency_keys"
+
+    user_id = Column(String, primary_key=True)
+    key = Column(String(255), primary_key=True)
+    # Hash of route and request body; reusing a key for another request is an error
+    fingerprint = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -0,0 +1,18 @@
+
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from db.database import Base
+
+class UserNameChange(Base):
+    """Pending rename to copy into the denormalized swap_requests name columns.
+
+    One row per user: a second rename before the worker gets to the first
+    overwrites ``name`` and bumps ``revision``, so repeated renames coalesce.
+    """
+    __tablename__ = "user_name_changes"
+
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    name = Column(String, nullable=False)
+    # Lets the worker drop the row only if no newer rename arrived meanwhile
+    revision = Column(Integer, nullable=False, default=1)
+    queued_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -0,0 +1,23 @@
+
+from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from db.database import Base
+
+RATING_VALUES = (1, 2, 3, 4, 5)
+
+class UserRatingSummary(Base):
+    """Running totals of the feedback a user has received"""
+    __tablename__ = "user_rating_summaries"
+
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    rating_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    # Kept alongside count/sum so search can sort on an indexed column
+    rating_average = Column(Float, nullable=True, index=True)
+    # Histogram, one column per star value
+    rating_1 = Column(Integer, nullable=False, default=0)
+    rating_2 = Column(Integer, nullable=False, default=0)
+    rating_3 = Column(Integer, nullable=False, default=0)
+    rating_4 = Column(Integer, nullable=False, default=0)
+    rating_5 = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,33 @@
+
+from sqlalchemy import Column, String, Integer, DateTime, Enum, ForeignKey, Index
+from sqlalchemy.sql import func
+import enum
+from db.database import Base
+
+class SkillKind(str, enum.Enum):
+    OFFERED = "offered"
+    WANTED = "wanted"
+
+class Skill(Base):
+    """Interned skill name; every spelling with the same ``key`` is this skill"""
+    __tablename__ = "skills"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # Display form: the first spelling seen, with whitespace collapsed
+    name = Column(String, nullable=False)
+    # Lookup form: the display form casefolded
+    key = Column(String, nullable=False, unique=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class UserSkill(Base):
+    """One offered or wanted skill of a user"""
+    __tablename__ = "user_skills"
+
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    kind = Column(Enum(SkillKind), primary_key=True)
+    skill_id = Column(Integer, ForeignKey("skills.id"), primary_key=True)
+
+    __table_args__ = (
+        # "Who offers/wants skill X" for search, matching and per-skill counts
+        Index("ix_user_skills_skill_kind_user", "skill_id", "kind", "user_id"),
+    )
@@ -1,5 +1,5 @@
 
-from sqlalchemy import Column, String, DateTime, Text, Enum, ForeignKey
+from sqlalchemy import Column, String, DateTime, Text, Enum, ForeignKey, Integer, SmallInteger, Index, CheckConstraint, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
@@ -11,6 +11,14 @@ class SwapStatus(str, enum.Enum):
     REJECTED = "rejected"
     COMPLETED = "completed"
 
+# Allowed status changes; anything not listed here is a conflict
+SWAP_TRANSITIONS = {
+    SwapStatus.PENDING: {SwapStatus.ACCEPTED, SwapStatus.REJECTED},
+    SwapStatus.ACCEPTED: {SwapStatus.COMPLETED},
+    SwapStatus.REJECTED: set(),
+    SwapStatus.COMPLETED: set(),
+}
+
 class SwapRequest(Base):
     __tablename__ = "swap_requests"
 
@@ -25,11 +33,29 @@ class SwapRequest(Base):
     status = Column(Enum(SwapStatus), default=SwapStatus.PENDING)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Bumped on every state change for optimistic concurrency
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     # Relationships
     from_user = relationship("User", foreign_keys=[from_user_id])
     to_user = relationship("User", foreign_keys=[to_user_id])
 
+    __mapper_args__ = {"version_id_col": version}
+
+    __table_args__ = (
+        # One index per inbox direction, each serving a UNION ALL branch
+        Index("ix_swap_requests_from_status_created", "from_user_id", "status", "created_at"),
+        Index("ix_swap_requests_to_status_created", "to_user_id", "status", "created_at"),
+        # At most one pending request for the same users and skills (retried creates)
+        Index(
+            "uq_swap_requests_pending_pair",
+            "from_user_id", "to_user_id", "skill_offered", "skill_wanted",
+            unique=True,
+            postgresql_where=(status == SwapStatus.PENDING),
+            sqlite_where=(status == SwapStatus.PENDING),
+        ),
+    )
+
 class Feedback(Base):
     __tablename__ = "feedback"
 
@@ -37,7 +63,7 @@ class Feedback(Base):
     swap_request_id = Column(String, ForeignKey("swap_requests.id"), nullable=False)
     from_user_id = Column(String, ForeignKey("users.id"), nullable=False)
     to_user_id = Column(String, ForeignKey("users.id"), nullable=False)
-    rating = Column(String, nullable=False)  # 1-5 stars
+    rating = Column(SmallInteger, nullable=False)  # 1-5 stars
     comment = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -45,3 +71,9 @@ class Feedback(Base):
     swap_request = relationship("SwapRequest")
     from_user = relationship("User", foreign_keys=[from_user_id])
     to_user = relationship("User", foreign_keys=[to_user_id])
+
+    __table_args__ = (
+        CheckConstraint("rating BETWEEN 1 AND 5", name="ck_feedback_rating_range"),
+        # One feedback per participant per swap
+        UniqueConstraint("swap_request_id", "from_user_id", name="uq_feedback_swap_from"),
+    )
@@ -0,0 +1,29 @@
+
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from db.database import Base
+from models.swap import SwapStatus
+
+SWAP_DIRECTIONS = ("sent", "received")
+
+def swap_count_column(direction: str, status: SwapStatus) -> str:
+    return f"{direction}_{status.value}"
+
+SWAP_COUNT_COLUMNS = tuple(
+    swap_count_column(direction, status) for direction in SWAP_DIRECTIONS for status in SwapStatus
+)
+
+class UserSwapCounts(Base):
+    """Per-user swap counts by direction and status, kept in step with swap_requests"""
+    __tablename__ = "user_swap_counts"
+
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    sent_pending = Column(Integer, nullable=False, default=0, server_default="0")
+    sent_accepted = Column(Integer, nullable=False, default=0, server_default="0")
+    sent_rejected = Column(Integer, nullable=False, default=0, server_default="0")
+    sent_completed = Column(Integer, nullable=False, default=0, server_default="0")
+    received_pending = Column(Integer, nullable=False, default=0, server_default="0")
+    received_accepted = Column(Integer, nullable=False, default=0, server_default="0")
+    received_rejected = Column(Integer, nullable=False, default=0, server_default="0")
+    received_completed = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,6 +1,7 @@
 
-from sqlalchemy import Column, String, Boolean, DateTime, Text, ARRAY
+from sqlalchemy import Column, String, Boolean, DateTime, Float, Text, ARRAY, JSON, Index
 from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
 from db.database import Base
 
 class User(Base):
@@ -10,12 +11,39 @@ class User(Base):
     name = Column(String, nullable=False)
     email = Column(String, unique=True, index=True, nullable=False)
     location = Column(String, nullable=True)
+    # Given by the client or resolved from ``location`` with the bundled gazetteer
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    # Full-precision geohash of (latitude, longitude); radius search scans prefixes
+    geohash = Column(String(12), nullable=True)
     profile_picture = Column(String, nullable=True)
-    skills_offered = Column(ARRAY(String), default=[])
-    skills_wanted = Column(ARRAY(String), default=[])
+    # Canonical display copies of user_skills, kept so listings need no join;
+    # search and matching go through user_skills instead.
+    # JSON stands in for ARRAY when running against SQLite locally
+    skills_offered = Column(ARRAY(String).with_variant(JSON(), "sqlite"), default=[])
+    skills_wanted = Column(ARRAY(String).with_variant(JSON(), "sqlite"), default=[])
     availability = Column(String, nullable=True)
     is_public = Column(Boolean, default=True)
     is_active = Column(Boolean, default=True)
     is_banned = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # One-row rating aggregate. Loaded on access; listings select its columns
+    # through an explicit join (see listed_user_rows) or use joinedload
+    rating_summary = relationship("UserRatingSummary", uselist=False)
+
+    @property
+    def rating_count(self) -> int:
+        return self.rating_summary.rating_count if self.rating_summary else 0
+
+    @property
+    def rating_average(self):
+        return self.rating_summary.rating_average if self.rating_summary else None
+
+    __table_args__ = (
+        # Keyset pagination order for the public directory
+        Index("ix_users_created_at_id", "created_at", "id"),
+        # Prefix (LIKE 'abc%') range scans for near-me search
+        Index("ix_users_geohash", "geohash", postgresql_ops={"geohash": "text_pattern_ops"}),
+    )
@@ -1,20 +1,68 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime
+from typing import Callable, List, Literal, Optional
 
-from db.database import get_db
+from config import get_settings
+from db.database import get_db, SessionLocal
 from utils.auth_utils import get_current_user
+from utils.export import ndjson_lines, csv_lines
+from utils.bulk_import import records
+from utils.serialization import list_response
 from services.user_service import UserService
-from schemas.user import UserResponse
+from services.swap_service import SwapService
+from services.skill_service import SkillService
+from services.user_import import import_users
+from schemas.user import UserResponse, UserImportResult
+from schemas.swap import SwapRequestResponse
+from schemas.skill import SkillStatsResponse
 from models.user import User
+from models.swap import SwapRequest, SwapStatus
 
+settings = get_settings()
 router = APIRouter(prefix="/admin", tags=["admin"])
 
+def _export_response(
+    stream: Callable,
+    columns: List[str],
+    export_format: str,
+    filename: str,
+    **filters
+) -> StreamingResponse:
+    """Stream rows from ``stream`` as NDJSON or CSV on a session owned by the body"""
+    def body():
+        # The response body is produced after the handler returns, so it gets
+        # its own session rather than the request-scoped one
+        db = SessionLocal()
+        try:
+            rows = stream(db, batch_size=settings.export_batch_size, **filters)
+            if export_format == "csv":
+                yield from csv_lines(rows, columns)
+            else:
+                yield from ndjson_lines(rows)
+        finally:
+            db.close()
+
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    extension = "csv" if export_format == "csv" else "ndjson"
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'}
+    )
+
+ADMIN_USER_IDS = frozenset(user_id for user_id in settings.admin_user_ids.split(",") if user_id)
+
 def verify_admin(current_user: User = Depends(get_current_user)):
-    """Verify current user is admin (placeholder - implement admin logic)"""
-    # TODO: Implement proper admin verification logic
-    # For now, we'll assume any authenticated user can access admin endpoints
+    """Verify current user is admin (listed in ADMIN_USER_IDS)"""
+    if current_user.id not in ADMIN_USER_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
     return current_user
 
 @router.get("/users", response_model=List[UserResponse])
@@ -24,7 +72,65 @@ def get_all_users(
 ):
     """Get all users (admin only)"""
     users = UserService.get_all_users(db)
-    return users
+    return list_response(UserResponse, users)
+
+@router.get("/users/export")
+def export_users(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    banned_only: bool = False,
+    created_since: Optional[datetime] = None,
+    admin_user: User = Depends(verify_admin)
+):
+    """Stream all users as NDJSON or CSV (admin only)"""
+    return _export_response(
+        UserService.stream_users,
+        [column.name for column in User.__table__.columns],
+        format,
+        "users",
+        banned_only=banned_only,
+        created_since=created_since
+    )
+
+def _import_body(body: bytes, import_format: str) -> UserImportResult:
+    db = SessionLocal()
+    try:
+        lines = body.decode("utf-8-sig").splitlines(keepends=True)
+        return import_users(db, records(lines, import_format))
+    finally:
+        db.close()
+
+@router.post("/users/bulk", response_model=UserImportResult)
+async def bulk_import_users(
+    request: Request,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    admin_user: User = Depends(verify_admin)
+):
+    """Create or update users from an NDJSON or CSV body keyed by ``id`` (admin only).
+
+    Rows are validated like profile writes and upserted in chunked
+    transactions; invalid or conflicting rows are reported by line number
+    without stopping the rest.
+    """
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Body exceeds {settings.bulk_import_max_bytes} bytes; use jobs.import_users for larger files"
+    )
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > settings.bulk_import_max_bytes:
+        raise too_large
+    # Read incrementally so a missing or lying Content-Length cannot buffer more than the cap
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > settings.bulk_import_max_bytes:
+            raise too_large
+    try:
+        return await run_in_threadpool(_import_body, bytes(body), format)
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Body must be UTF-8"
+        )
 
 @router.patch("/users/{user_id}/ban", response_model=UserResponse)
 def ban_user(
@@ -41,12 +147,37 @@ def ban_user(
         )
     return user
 
-@router.get("/swaps", response_model=List[dict])
+@router.get("/swaps", response_model=List[SwapRequestResponse])
 def get_all_swaps(
     db: Session = Depends(get_db),
     admin_user: User = Depends(verify_admin)
 ):
     """Get all swap requests (admin only)"""
-    from services.swap_service import SwapService
     swaps = SwapService.get_all_swaps(db)
-    return swaps
+    return list_response(SwapRequestResponse, swaps)
+
+@router.get("/swaps/export")
+def export_swaps(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    status_filter: Optional[SwapStatus] = Query(None, alias="status"),
+    created_since: Optional[datetime] = None,
+    admin_user: User = Depends(verify_admin)
+):
+    """Stream all swap requests as NDJSON or CSV (admin only)"""
+    return _export_response(
+        SwapService.stream_swaps,
+        [column.name for column in SwapRequest.__table__.columns],
+        format,
+        "swaps",
+        status=status_filter,
+        created_since=created_since
+    )
+
+@router.get("/skills", response_model=List[SkillStatsResponse])
+def get_skill_stats(
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(verify_admin)
+):
+    """Offer/demand counts per skill (admin only)"""
+    return list_response(SkillStatsResponse, SkillService.get_skill_stats(db, limit))
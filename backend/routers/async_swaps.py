@@ -0,0 +1,220 @@
+
+from functools import partial
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import List, Literal, Optional
+
+from config import get_settings
+from db.database import get_async_db
+from utils.auth_utils import get_current_user_id
+from utils.etag import etag_matches, set_etag, not_modified
+from utils.idempotency import run_idempotent
+from utils.pagination import clamp_limit
+from utils.serialization import list_response
+from services.swap_service import AsyncSwapService, SwapConflictError
+from services.versions import versions, swaps_key
+from schemas.swap import (
+    SwapRequestCreate, SwapRequestResponse, FeedbackCreate, FeedbackResponse,
+    SwapBatchRequest, SwapBatchResponse, SwapRequestPage, SwapCounts
+)
+from models.swap import SwapStatus
+from routers.swaps import parse_if_match, stream_swap_events, create_swap, create_swap_feedback
+
+settings = get_settings()
+router = APIRouter(prefix="/swaps", tags=["swaps"])
+
+@router.post("/request", response_model=SwapRequestResponse)
+async def create_swap_request(
+    swap_data: SwapRequestCreate,
+    idempotency_key: Optional[str] = Header(None),
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create a new swap request; send Idempotency-Key to make retries safe"""
+    # The key claim, the insert and the stored response all run on the session's sync side
+    return await db.run_sync(
+        run_idempotent, idempotency_key, current_user_id, "POST /swaps/request", swap_data, SwapRequestResponse,
+        partial(create_swap, swap_data=swap_data, user_id=current_user_id)
+    )
+
+@router.get("/", response_model=SwapRequestPage)
+async def get_user_swaps(
+    direction: Optional[Literal["sent", "received"]] = None,
+    status_filter: Optional[SwapStatus] = Query(None, alias="status"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the current user's swaps, newest first"""
+    page_size = clamp_limit(limit, settings.inbox_page_size, settings.inbox_max_page_size)
+    etag = versions.etag(
+        swaps_key(current_user_id), direction, status_filter, since, until, page_size, cursor
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    try:
+        swaps, next_cursor = await AsyncSwapService.get_user_swaps(
+            db, current_user_id, page_size, cursor, direction, status_filter, since, until
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    response = list_response(SwapRequestResponse, swaps, next_cursor=next_cursor)
+    set_etag(response, etag)
+    return response
+
+# Holds no session, so the same handler serves both router variants
+router.add_api_route("/events", stream_swap_events, methods=["GET"])
+
+@router.get("/counts", response_model=SwapCounts)
+async def get_swap_counts(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Sent and received swap counts by status (inbox badges)"""
+    etag = versions.etag(swaps_key(current_user_id), "counts")
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return await AsyncSwapService.get_swap_counts(db, current_user_id)
+
+@router.post("/batch", response_model=SwapBatchResponse)
+async def apply_swap_batch(
+    batch: SwapBatchRequest,
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Accept, reject, complete or delete many swaps in one transaction"""
+    if len(batch.items) > settings.swap_batch_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch may contain at most {settings.swap_batch_max_items} items"
+        )
+    results = await AsyncSwapService.apply_batch(
+        db, [(item.swap_id, item.action) for item in batch.items], current_user_id
+    )
+    return SwapBatchResponse(results=results)
+
+@router.patch("/{swap_id}/accept", response_model=SwapRequestResponse)
+async def accept_swap(
+    swap_id: str,
+    if_match: Optional[str] = Header(None),
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Accept a swap request"""
+    try:
+        swap = await AsyncSwapService.accept_swap(db, swap_id, current_user_id, parse_if_match(if_match))
+    except SwapConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    if not swap:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Swap request not found or not authorized"
+        )
+    return swap
+
+@router.patch("/{swap_id}/reject", response_model=SwapRequestResponse)
+async def reject_swap(
+    swap_id: str,
+    if_match: Optional[str] = Header(None),
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Reject a swap request"""
+    try:
+        swap = await AsyncSwapService.reject_swap(db, swap_id, current_user_id, parse_if_match(if_match))
+    except SwapConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    if not swap:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Swap request not found or not authorized"
+        )
+    return swap
+
+@router.patch("/{swap_id}/complete", response_model=SwapRequestResponse)
+async def complete_swap(
+    swap_id: str,
+    if_match: Optional[str] = Header(None),
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Mark an accepted swap as completed"""
+    try:
+        swap = await AsyncSwapService.complete_swap(db, swap_id, current_user_id, parse_if_match(if_match))
+    except SwapConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    if not swap:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Swap request not found or not authorized"
+        )
+    return swap
+
+@router.delete("/{swap_id}")
+async def delete_swap(
+    swap_id: str,
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Delete a swap request (only by owner)"""
+    success = await AsyncSwapService.delete_swap(db, swap_id, current_user_id)
+    if not success:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Swap request not found or not authorized"
+        )
+    return {"message": "Swap request deleted successfully"}
+
+@router.post("/{swap_id}/feedback", response_model=FeedbackResponse)
+async def create_feedback(
+    swap_id: str,
+    feedback_data: FeedbackCreate,
+    idempotency_key: Optional[str] = Header(None),
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Submit feedback for a swap; send Idempotency-Key to make retries safe"""
+    return await db.run_sync(
+        run_idempotent, idempotency_key, current_user_id, f"POST /swaps/{swap_id}/feedback", feedback_data,
+        FeedbackResponse,
+        partial(create_swap_feedback, swap_id=swap_id, feedback_data=feedback_data, user_id=current_user_id)
+    )
+
+@router.get("/{swap_id}/feedback", response_model=List[FeedbackResponse])
+async def get_swap_feedback(
+    swap_id: str,
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get feedback for a swap"""
+    # Verify user is part of this swap
+    swap = await AsyncSwapService.get_swap_by_id(db, swap_id)
+    if not swap or (swap.from_user_id != current_user_id and swap.to_user_id != current_user_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Swap not found or not authorized"
+        )
+    
+    feedback = await AsyncSwapService.get_swap_feedback(db, swap_id)
+    return feedback
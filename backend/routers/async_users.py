@@ -0,0 +1,181 @@
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal, Optional
+
+from config import get_settings
+from db.database import get_async_db
+from utils.auth_utils import get_current_user_id, get_current_user_async, get_current_user_data, load_current_user
+from utils.etag import etag_matches, set_etag, not_modified
+from utils.geo import clamp_radius, parse_near
+from utils.pagination import clamp_limit
+from utils.serialization import list_response
+from services.user_service import AsyncUserService
+from services.match_service import AsyncMatchService
+from services.versions import versions, profile_key, SEARCH_KEY
+from schemas.user import (
+    UserCreate, UserUpdate, UserResponse, UserPublicResponse, UserSearchPage,
+    UserMatchResponse, UserMatchPage
+)
+from models.user import User
+from routers.users import sync_profile_from_token
+
+settings = get_settings()
+router = APIRouter(prefix="/users", tags=["users"])
+
+@router.post("/profile", response_model=UserResponse)
+async def create_or_update_profile(
+    user_data: UserCreate,
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create or update user profile"""
+    existing_user = await AsyncUserService.get_user_by_id(db, current_user_id)
+    
+    if existing_user:
+        # Update existing user
+        update_data = UserUpdate(**user_data.dict())
+        user = await AsyncUserService.update_user(db, current_user_id, update_data)
+    else:
+        # Create new user
+        user = await AsyncUserService.create_user(db, user_data, current_user_id)
+    
+    return user
+
+@router.get("/profile", response_model=UserResponse)
+async def get_profile(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get current user's profile (304 if If-None-Match still matches)"""
+    etag = versions.etag(profile_key(current_user_id))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return await db.run_sync(load_current_user, current_user_id)
+
+@router.put("/profile", response_model=UserResponse)
+async def update_profile(
+    user_data: UserUpdate,
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Update current user's profile"""
+    user = await AsyncUserService.update_user(db, current_user_id, user_data)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return user
+
+@router.get("/search", response_model=UserSearchPage)
+async def search_users(
+    skill: str = None,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    sort: Literal["recent", "rating"] = "recent",
+    near: Optional[str] = None,
+    radius_km: Optional[float] = Query(None, gt=0),
+    if_none_match: Optional[str] = Header(None),
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Search public users by skill or page through all public users; ``near`` orders by distance"""
+    page_size = clamp_limit(limit, settings.search_page_size, settings.search_max_page_size)
+    radius_km = clamp_radius(radius_km, settings.near_default_radius_km, settings.near_max_radius_km)
+    # near=me resolves to the caller's own location, so their id is part of the
+    # variant (moving bumps SEARCH_KEY like any profile write)
+    viewer = current_user_id if near == "me" else None
+    etag = versions.etag(SEARCH_KEY, skill, page_size, cursor, sort, near, radius_km, viewer)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    try:
+        if near:
+            if sort == "rating":
+                raise ValueError("near results are ordered by distance; sort=rating is not supported")
+            home = None
+            if near == "me":
+                me = await db.run_sync(load_current_user, current_user_id)
+                home = (me.latitude, me.longitude)
+            latitude, longitude = parse_near(near, home)
+            users, next_cursor = await AsyncUserService.search_users_near(
+                db, latitude, longitude, radius_km, page_size, cursor, skill
+            )
+        elif skill:
+            users, next_cursor = await AsyncUserService.search_users_by_skill(
+                db, skill, page_size, cursor, sort
+            )
+        else:
+            users, next_cursor = await AsyncUserService.get_all_public_users(
+                db, page_size, cursor, exclude_user_id=None, sort=sort
+            )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    response = list_response(UserPublicResponse, users, next_cursor=next_cursor)
+    set_etag(response, etag)
+    return response
+
+@router.get("/matches", response_model=UserMatchPage)
+async def get_matches(
+    limit: Optional[int] = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
+    near: Optional[str] = None,
+    radius_km: Optional[float] = Query(None, gt=0),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get users who offer what the current user wants and want what they offer"""
+    page_size = clamp_limit(limit, settings.search_page_size, settings.search_max_page_size)
+    radius_km = clamp_radius(radius_km, settings.near_default_radius_km, settings.near_max_radius_km)
+    point = None
+    if near:
+        try:
+            point = parse_near(near, (current_user.latitude, current_user.longitude))
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+    matches, next_offset = await AsyncMatchService.get_matches(db, current_user, page_size, offset, point, radius_km)
+    rows = [
+        {
+            **row,
+            "match_score": match.score,
+            "they_offer": match.they_offer,
+            "they_want": match.they_want
+        }
+        for row, match in matches
+    ]
+    return list_response(UserMatchResponse, rows, next_offset=next_offset)
+
+@router.get("/debug-token")
+async def debug_token(
+    current_user_data: dict = Depends(get_current_user_data)
+):
+    """Debug endpoint to see what's in the JWT token"""
+    return {
+        "message": "JWT token data",
+        "data": current_user_data
+    }
+
+@router.post("/sync-from-clerk", response_model=UserResponse)
+async def sync_user_from_clerk(
+    current_user_id: str = Depends(get_current_user_id),
+    current_user_data: dict = Depends(get_current_user_data),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Sync user data from Clerk profile"""
+    if not current_user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid user ID"
+        )
+    
+    return await db.run_sync(sync_profile_from_token, current_user_id, current_user_data)
@@ -0,0 +1,25 @@
+
+from fastapi import APIRouter, Depends, Query
+from typing import List, Optional
+
+from config import get_settings
+from utils.auth_utils import get_current_user_id
+from utils.pagination import clamp_limit
+from services.skill_suggest import skill_suggest
+from schemas.skill import SkillSuggestion
+
+settings = get_settings()
+router = APIRouter(prefix="/skills", tags=["skills"])
+
+@router.get("/suggest", response_model=List[SkillSuggestion])
+async def suggest_skills(
+    prefix: str = Query("", max_length=100),
+    limit: Optional[int] = Query(None, ge=1),
+    current_user_id: str = Depends(get_current_user_id)
+):
+    """Skill names starting with ``prefix``, most popular first (served from memory)"""
+    page_size = clamp_limit(limit, settings.skill_suggest_limit, settings.skill_suggest_max_limit)
+    return [
+        {"name": name, "offered_count": offered, "wanted_count": wanted}
+        for name, offered, wanted in skill_suggest.suggest(prefix, page_size)
+    ]
@@ -1,48 +1,210 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+from functools import partial
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime
+from typing import List, Literal, Optional
 
+from config import get_settings
 from db.database import get_db
 from utils.auth_utils import get_current_user_id
-from services.swap_service import SwapService
-from schemas.swap import SwapRequestCreate, SwapRequestResponse, FeedbackCreate, FeedbackResponse
+from utils.etag import etag_matches, set_etag, not_modified
+from utils.idempotency import run_idempotent
+from utils.pagination import clamp_limit
+from utils.serialization import list_response
+from services.swap_service import SwapService, SwapConflictError
+from services.swap_events import swap_events
+from services.versions import versions, swaps_key
+from schemas.swap import (
+    SwapRequestCreate, SwapRequestResponse, FeedbackCreate, FeedbackResponse,
+    SwapBatchRequest, SwapBatchResponse, SwapRequestPage, SwapCounts
+)
+from models.swap import SwapRequest, Feedback, SwapStatus
 
+settings = get_settings()
 router = APIRouter(prefix="/swaps", tags=["swaps"])
 
+def parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """Read the swap version a client expects from an If-Match header"""
+    if not if_match or if_match.strip() == "*":
+        return None
+    try:
+        return int(if_match.strip().removeprefix("W/").strip('"'))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="If-Match must carry the swap version"
+        )
+
+def create_swap(db: Session, swap_data: SwapRequestCreate, user_id: str) -> SwapRequest:
+    try:
+        return SwapService.create_swap_request(db, swap_data, user_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except SwapConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+def create_swap_feedback(db: Session, swap_id: str, feedback_data: FeedbackCreate, user_id: str) -> Feedback:
+    try:
+        feedback = SwapService.create_feedback(db, swap_id, feedback_data, user_id)
+    except SwapConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    if not feedback:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot create feedback for this swap"
+        )
+    return feedback
+
 @router.post("/request", response_model=SwapRequestResponse)
 def create_swap_request(
     swap_data: SwapRequestCreate,
+    idempotency_key: Optional[str] = Header(None),
     current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
-    """Create a new swap request"""
+    """Create a new swap request; send Idempotency-Key to make retries safe"""
+    return run_idempotent(
+        db, idempotency_key, current_user_id, "POST /swaps/request", swap_data, SwapRequestResponse,
+        partial(create_swap, swap_data=swap_data, user_id=current_user_id)
+    )
+
+@router.get("/", response_model=SwapRequestPage)
+def get_user_swaps(
+    direction: Optional[Literal["sent", "received"]] = None,
+    status_filter: Optional[SwapStatus] = Query(None, alias="status"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    current_user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """Get the current user's swaps, newest first"""
+    page_size = clamp_limit(limit, settings.inbox_page_size, settings.inbox_max_page_size)
+    etag = versions.etag(
+        swaps_key(current_user_id), direction, status_filter, since, until, page_size, cursor
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
     try:
-        swap = SwapService.create_swap_request(db, swap_data, current_user_id)
-        return swap
+        swaps, next_cursor = SwapService.get_user_swaps(
+            db, current_user_id, page_size, cursor, direction, status_filter, since, until
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    response = list_response(SwapRequestResponse, swaps, next_cursor=next_cursor)
+    set_etag(response, etag)
+    return response
 
-@router.get("/", response_model=List[SwapRequestResponse])
-def get_user_swaps(
+@router.get("/events")
+async def stream_swap_events(
+    last_event_id: Optional[str] = Header(None),
+    since: Optional[str] = Query(None, description="Event id to resume after, for clients that cannot send Last-Event-ID"),
+    current_user_id: str = Depends(get_current_user_id)
+):
+    """Server-sent events for the current user's swaps and feedback.
+
+    Resumes after ``Last-Event-ID`` when that event is still buffered;
+    otherwise starts with a ``reset`` event telling the client to reload its
+    inbox once. Opens no database session.
+    """
+    opened = swap_events.subscribe(current_user_id, last_event_id or since)
+    if opened is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many open event streams",
+            headers={"Retry-After": "30"}
+        )
+    subscription, backlog, reset = opened
+
+    async def events():
+        try:
+            yield ": connected\n\n"
+            if reset:
+                yield "event: reset\ndata: {}\n\n"
+            for event in backlog:
+                yield event.encode()
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), settings.swap_event_heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if subscription.overflowed:
+                    return
+                yield event.encode()
+        finally:
+            swap_events.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/counts", response_model=SwapCounts)
+def get_swap_counts(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """Sent and received swap counts by status (inbox badges)"""
+    etag = versions.etag(swaps_key(current_user_id), "counts")
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return SwapService.get_swap_counts(db, current_user_id)
+
+@router.post("/batch", response_model=SwapBatchResponse)
+def apply_swap_batch(
+    batch: SwapBatchRequest,
     current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
-    """Get all swaps for current user"""
-    swaps = SwapService.get_user_swaps(db, current_user_id)
-    return swaps
+    """Accept, reject, complete or delete many swaps in one transaction"""
+    if len(batch.items) > settings.swap_batch_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch may contain at most {settings.swap_batch_max_items} items"
+        )
+    results = SwapService.apply_batch(
+        db, [(item.swap_id, item.action) for item in batch.items], current_user_id
+    )
+    return SwapBatchResponse(results=results)
 
 @router.patch("/{swap_id}/accept", response_model=SwapRequestResponse)
 def accept_swap(
     swap_id: str,
+    if_match: Optional[str] = Header(None),
     current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """Accept a swap request"""
-    swap = SwapService.accept_swap(db, swap_id, current_user_id)
+    try:
+        swap = SwapService.accept_swap(db, swap_id, current_user_id, parse_if_match(if_match))
+    except SwapConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     if not swap:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -53,11 +215,40 @@ def accept_swap(
 @router.patch("/{swap_id}/reject", response_model=SwapRequestResponse)
 def reject_swap(
     swap_id: str,
+    if_match: Optional[str] = Header(None),
     current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """Reject a swap request"""
-    swap = SwapService.reject_swap(db, swap_id, current_user_id)
+    try:
+        swap = SwapService.reject_swap(db, swap_id, current_user_id, parse_if_match(if_match))
+    except SwapConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    if not swap:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Swap request not found or not authorized"
+        )
+    return swap
+
+@router.patch("/{swap_id}/complete", response_model=SwapRequestResponse)
+def complete_swap(
+    swap_id: str,
+    if_match: Optional[str] = Header(None),
+    current_user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """Mark an accepted swap as completed"""
+    try:
+        swap = SwapService.complete_swap(db, swap_id, current_user_id, parse_if_match(if_match))
+    except SwapConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     if not swap:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -84,17 +275,15 @@ def delete_swap(
 def create_feedback(
     swap_id: str,
     feedback_data: FeedbackCreate,
+    idempotency_key: Optional[str] = Header(None),
     current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
-    """Submit feedback for a swap"""
-    feedback = SwapService.create_feedback(db, swap_id, feedback_data, current_user_id)
-    if not feedback:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cannot create feedback for this swap"
-        )
-    return feedback
+    """Submit feedback for a swap; send Idempotency-Key to make retries safe"""
+    return run_idempotent(
+        db, idempotency_key, current_user_id, f"POST /swaps/{swap_id}/feedback", feedback_data, FeedbackResponse,
+        partial(create_swap_feedback, swap_id=swap_id, feedback_data=feedback_data, user_id=current_user_id)
+    )
 
 @router.get("/{swap_id}/feedback", response_model=List[FeedbackResponse])
 def get_swap_feedback(
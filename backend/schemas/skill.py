@@ -0,0 +1,13 @@
+
+from pydantic import BaseModel
+
+class SkillSuggestion(BaseModel):
+    name: str
+    offered_count: int
+    wanted_count: int
+
+class SkillStatsResponse(SkillSuggestion):
+    id: int
+
+    class Config:
+        from_attributes = True
@@ -1,6 +1,6 @@
 
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 from datetime import datetime
 from models.swap import SwapStatus
 
@@ -25,12 +25,27 @@ class SwapRequestResponse(BaseModel):
     status: SwapStatus
     created_at: datetime
     updated_at: Optional[datetime] = None
+    version: int = 1
 
     class Config:
         from_attributes = True
 
+class SwapRequestPage(BaseModel):
+    items: List[SwapRequestResponse] = []
+    next_cursor: Optional[str] = None
+
+class SwapStatusCounts(BaseModel):
+    pending: int = 0
+    accepted: int = 0
+    rejected: int = 0
+    completed: int = 0
+
+class SwapCounts(BaseModel):
+    sent: SwapStatusCounts = SwapStatusCounts()
+    received: SwapStatusCounts = SwapStatusCounts()
+
 class FeedbackBase(BaseModel):
-    rating: int
+    rating: int = Field(ge=1, le=5)
     comment: Optional[str] = None
 
 class FeedbackCreate(FeedbackBase):
@@ -47,3 +62,21 @@ class FeedbackResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+class SwapBatchItem(BaseModel):
+    swap_id: str
+    action: Literal["accept", "reject", "complete", "delete"]
+
+class SwapBatchRequest(BaseModel):
+    items: List[SwapBatchItem]
+
+class SwapBatchOutcome(BaseModel):
+    swap_id: str
+    action: str
+    status_code: int
+    detail: Optional[str] = None
+    swap_status: Optional[SwapStatus] = None
+    version: Optional[int] = None
+
+class SwapBatchResponse(BaseModel):
+    results: List[SwapBatchOutcome]
@@ -1,5 +1,5 @@
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
 
@@ -7,6 +7,8 @@ class UserBase(BaseModel):
     name: str
     email: str
     location: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     profile_picture: Optional[str] = None
     skills_offered: List[str] = []
     skills_wanted: List[str] = []
@@ -19,6 +21,8 @@ class UserCreate(UserBase):
 class UserUpdate(BaseModel):
     name: Optional[str] = None
     location: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     profile_picture: Optional[str] = None
     skills_offered: Optional[List[str]] = None
     skills_wanted: Optional[List[str]] = None
@@ -42,6 +46,40 @@ class UserPublicResponse(BaseModel):
     skills_offered: List[str] = []
     skills_wanted: List[str] = []
     availability: Optional[str] = None
+    rating_count: int = 0
+    rating_average: Optional[float] = None
+    # Only set on near-me results
+    distance_km: Optional[float] = None
 
     class Config:
         from_attributes = True
+
+class UserSearchPage(BaseModel):
+    items: List[UserPublicResponse] = []
+    next_cursor: Optional[str] = None
+
+class UserMatchResponse(UserPublicResponse):
+    match_score: int
+    they_offer: List[str] = []
+    they_want: List[str] = []
+
+class UserMatchPage(BaseModel):
+    items: List[UserMatchResponse] = []
+    next_offset: Optional[int] = None
+
+class UserImportRow(UserCreate):
+    """One row of a bulk import: a profile plus the Clerk ID it belongs to"""
+    id: str = Field(..., min_length=1)
+
+class UserImportError(BaseModel):
+    line: int
+    id: Optional[str] = None
+    error: str
+
+class UserImportResult(BaseModel):
+    received: int = 0
+    created: int = 0
+    updated: int = 0
+    failed: int = 0
+    # Capped at BULK_IMPORT_MAX_ERRORS; ``failed`` counts them all
+    errors: List[UserImportError] = []
@@ -0,0 +1,95 @@
+
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from db.database import dialect_insert
+from models.idempotency import IdempotencyKey
+
+settings = get_settings()
+
+class IdempotencyService:
+    @staticmethod
+    def claim(db: Session, user_id: str, key: str, fingerprint: str) -> Optional[IdempotencyKey]:
+        """Reserve ``key`` for a request about to run.
+
+        Returns None when the key is now reserved for the caller (new, or its
+        previous use expired), otherwise the live row holding it. Commits.
+        """
+        keys = IdempotencyKey.__table__
+        for _ in range(2):
+            now = datetime.now(timezone.utc)
+            stmt = dialect_insert(db, keys).values(
+                user_id=user_id,
+                key=key,
+                fingerprint=fingerprint,
+                expires_at=now + timedelta(seconds=settings.idempotency_pending_timeout)
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[keys.c.user_id, keys.c.key],
+                set_={
+                    "fingerprint": stmt.excluded.fingerprint,
+                    "status_code": None,
+                    "response_body": None,
+                    "created_at": now,
+                    "expires_at": stmt.excluded.expires_at,
+                },
+                where=keys.c.expires_at < now
+            ).returning(keys.c.key)
+            claimed = db.execute(stmt).first()
+            if claimed is not None:
+                db.commit()
+                return None
+            existing = db.query(IdempotencyKey).filter(
+                IdempotencyKey.user_id == user_id, IdempotencyKey.key == key
+            ).first()
+            db.commit()
+            if existing is not None:
+                return existing
+            # Purged between the two statements: try again
+        return None
+
+    @staticmethod
+    def complete(db: Session, user_id: str, key: str, status_code: int, body: bytes) -> None:
+        """Store the response to replay and keep it for IDEMPOTENCY_KEY_TTL"""
+        db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+            .values(
+                status_code=status_code,
+                response_body=body,
+                expires_at=datetime.now(timezone.utc) + timedelta(seconds=settings.idempotency_key_ttl)
+            )
+        )
+        db.commit()
+
+    @staticmethod
+    def release(db: Session, user_id: str, key: str) -> None:
+        """Give up a reservation whose request failed, so a retry runs it again"""
+        db.rollback()
+        db.execute(delete(IdempotencyKey).where(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.status_code.is_(None)
+        ))
+        db.commit()
+
+    @staticmethod
+    def purge_expired(db: Session, batch_size: int = 10000) -> int:
+        """Delete expired keys in batches; returns rows deleted"""
+        deleted = 0
+        while True:
+            expired = select(IdempotencyKey.user_id, IdempotencyKey.key).where(
+                IdempotencyKey.expires_at < datetime.now(timezone.utc)
+            ).limit(batch_size)
+            result = db.execute(
+                delete(IdempotencyKey).where(tuple_(IdempotencyKey.user_id, IdempotencyKey.key).in_(expired)),
+                execution_options={"synchronize_session": False}
+            )
+            db.commit()
+            deleted += result.rowcount
+            if result.rowcount < batch_size:
+                return deleted
@@ -0,0 +1,308 @@
+
+import heapq
+import threading
+import time
+from typing import Collection, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import get_settings
+from models.user import User
+from models.rating import UserRatingSummary
+from models.skill import Skill, UserSkill, SkillKind
+from services.skill_dictionary import skill_key
+
+settings = get_settings()
+
+class Match:
+    """A ranked reciprocal match: what they offer that I want and vice versa"""
+
+    __slots__ = ("user_id", "they_offer", "they_want", "score")
+
+    def __init__(self, user_id: str, they_offer: List[str], they_want: List[str]):
+        self.user_id = user_id
+        self.they_offer = they_offer
+        self.they_want = they_want
+        self.score = len(they_offer) + len(they_want)
+
+def _bits_to_positions(bits: int):
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+class MatchIndex:
+    """Skill-id bitsets over the listed (public, active, non-banned) population.
+
+    Every skill gets an integer id (per ``skill_key``) and every listed user a
+    position. Each user keeps a bitset of offered and wanted skill ids, and each
+    skill keeps a bitset of the user positions offering and wanting it, so the
+    candidate set for a request is a handful of ORs/ANDs and scoring is a
+    popcount per candidate. The index is rebuilt from user_skills every ``ttl``
+    seconds and patched in between as users are written through ``UserService``.
+
+    One request rebuilds an expired index while the others keep ranking
+    against the previous one; writes made during a rebuild are recorded and
+    replayed onto the fresh index.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._built_at: Optional[float] = None
+        self._builds = 0
+        # Bumped by invalidate(), so a rebuild that started earlier is not taken as fresh
+        self._generation = 0
+        # Latest write per user (None when no longer listed) and rating changes
+        # seen while a rebuild query is in flight
+        self._pending_users: Dict[str, Optional[Tuple[list, list]]] = {}
+        self._pending_ratings: Dict[str, Optional[float]] = {}
+        self._reset()
+
+    def _reset(self) -> None:
+        self._skill_ids: Dict[str, int] = {}
+        self._skill_names: List[str] = []
+        self._offered_by: List[int] = []
+        self._wanted_by: List[int] = []
+        self._positions: Dict[str, int] = {}
+        self._user_ids: List[Optional[str]] = []
+        self._offered: List[int] = []
+        self._wanted: List[int] = []
+        self._ratings: Dict[str, float] = {}
+
+    def _skill_id(self, skill: str) -> int:
+        key = skill_key(skill)
+        skill_id = self._skill_ids.get(key)
+        if skill_id is None:
+            skill_id = len(self._skill_names)
+            self._skill_ids[key] = skill_id
+            self._skill_names.append(skill)
+            self._offered_by.append(0)
+            self._wanted_by.append(0)
+        return skill_id
+
+    def _skill_bits(self, skills, create: bool) -> int:
+        bits = 0
+        for skill in skills or []:
+            skill_id = self._skill_id(skill) if create else self._skill_ids.get(skill_key(skill))
+            if skill_id is not None:
+                bits |= 1 << skill_id
+        return bits
+
+    def _set_user(self, user_id: str, offered, wanted) -> None:
+        position = self._positions.get(user_id)
+        if position is None:
+            position = len(self._user_ids)
+            self._positions[user_id] = position
+            self._user_ids.append(user_id)
+            self._offered.append(0)
+            self._wanted.append(0)
+        else:
+            self._clear_position(position)
+
+        user_bit = 1 << position
+        offered_bits = self._skill_bits(offered, create=True)
+        wanted_bits = self._skill_bits(wanted, create=True)
+        for skill_id in _bits_to_positions(offered_bits):
+            self._offered_by[skill_id] |= user_bit
+        for skill_id in _bits_to_positions(wanted_bits):
+            self._wanted_by[skill_id] |= user_bit
+        self._offered[position] = offered_bits
+        self._wanted[position] = wanted_bits
+
+    def _clear_position(self, position: int) -> None:
+        mask = ~(1 << position)
+        for skill_id in _bits_to_positions(self._offered[position]):
+            self._offered_by[skill_id] &= mask
+        for skill_id in _bits_to_positions(self._wanted[position]):
+            self._wanted_by[skill_id] &= mask
+        self._offered[position] = 0
+        self._wanted[position] = 0
+
+    def _ensure_built(self, db: Session) -> None:
+        # The query runs outside the lock: under AsyncSession.run_sync it yields
+        # to the event loop, and another request blocking on the lock (or on the
+        # rebuild) from the same thread would stall the loop. So nobody waits:
+        # while a rebuild is running, others use the expired index if there is one
+        with self._lock:
+            if self._built_at is not None and (
+                self._builds or time.monotonic() - self._built_at < self.ttl
+            ):
+                return
+            self._builds += 1
+            generation = self._generation
+        try:
+            skill_rows = db.query(UserSkill.user_id, UserSkill.kind, Skill.name).join(
+                Skill, Skill.id == UserSkill.skill_id
+            ).join(User, User.id == UserSkill.user_id).filter(
+                User.is_public == True,
+                User.is_active == True,
+                User.is_banned == False
+            ).all()
+            ratings = dict(db.query(UserRatingSummary.user_id, UserRatingSummary.rating_average).filter(
+                UserRatingSummary.rating_average.isnot(None)
+            ).all())
+
+            skills: Dict[str, Tuple[List[str], List[str]]] = {}
+            for user_id, kind, name in skill_rows:
+                offered, wanted = skills.setdefault(user_id, ([], []))
+                (offered if kind == SkillKind.OFFERED else wanted).append(name)
+            with self._lock:
+                self._reset()
+                for user_id, (offered, wanted) in skills.items():
+                    self._set_user(user_id, offered, wanted)
+                self._ratings.update(ratings)
+                # Writes that raced the query win over its snapshot
+                for user_id, user_skills in self._pending_users.items():
+                    self._apply_user(user_id, user_skills)
+                for user_id, rating_average in self._pending_ratings.items():
+                    self._apply_rating(user_id, rating_average)
+                self._built_at = time.monotonic() if generation == self._generation else None
+        finally:
+            with self._lock:
+                self._builds -= 1
+                if not self._builds:
+                    self._pending_users.clear()
+                    self._pending_ratings.clear()
+
+    def _apply_user(self, user_id: str, user_skills: Optional[Tuple[list, list]]) -> None:
+        if user_skills is not None:
+            self._set_user(user_id, *user_skills)
+        else:
+            position = self._positions.pop(user_id, None)
+            if position is not None:
+                self._clear_position(position)
+                self._user_ids[position] = None
+
+    def _apply_rating(self, user_id: str, rating_average: Optional[float]) -> None:
+        if rating_average is None:
+            self._ratings.pop(user_id, None)
+        else:
+            self._ratings[user_id] = rating_average
+
+    def refresh_user(self, user) -> None:
+        """Patch a single user's bitsets after a profile, ban or create write"""
+        listed = user.is_public and user.is_active and not user.is_banned
+        user_skills = (list(user.skills_offered or []), list(user.skills_wanted or [])) if listed else None
+        with self._lock:
+            if self._builds:
+                self._pending_users[user.id] = user_skills
+            if self._built_at is not None:
+                self._apply_user(user.id, user_skills)
+
+    def set_rating(self, user_id: str, rating_average: Optional[float]) -> None:
+        """Update the reputation used to break ties between equal matches"""
+        with self._lock:
+            if self._builds:
+                self._pending_ratings[user_id] = rating_average
+            self._apply_rating(user_id, rating_average)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._built_at = None
+            self._generation += 1
+
+    def rank(
+        self,
+        db: Session,
+        user_id: str,
+        offered,
+        wanted,
+        limit: int,
+        offset: int = 0,
+        only: Optional[Collection[str]] = None
+    ) -> Tuple[List[Match], bool]:
+        """One page of listed users (optionally only those in ``only``) ranked against
+        ``offered``/``wanted``, and whether more follow"""
+        self._ensure_built(db)
+        with self._lock:
+            my_offered = self._skill_bits(offered, create=False)
+            my_wanted = self._skill_bits(wanted, create=False)
+
+            # Candidates want something I offer AND offer something I want
+            wants_mine = 0
+            for skill_id in _bits_to_positions(my_offered):
+                wants_mine |= self._wanted_by[skill_id]
+            offers_wanted = 0
+            for skill_id in _bits_to_positions(my_wanted):
+                offers_wanted |= self._offered_by[skill_id]
+            candidates = wants_mine & offers_wanted
+            own_position = self._positions.get(user_id)
+            if own_position is not None:
+                candidates &= ~(1 << own_position)
+
+            # Most balanced exchanges first, then the largest overlap, then reputation
+            ratings = self._ratings
+            user_ids = self._user_ids
+            scored: List[Tuple[int, int, float, str, int]] = []
+            for position in _bits_to_positions(candidates):
+                candidate = user_ids[position]
+                if only is not None and candidate not in only:
+                    continue
+                they_offer = (self._offered[position] & my_wanted).bit_count()
+                they_want = (self._wanted[position] & my_offered).bit_count()
+                scored.append((
+                    -min(they_offer, they_want), -(they_offer + they_want),
+                    -ratings.get(candidate, 0.0), candidate, position
+                ))
+
+            # Only the requested page is ordered and has its skill names decoded
+            page = heapq.nsmallest(offset + limit, scored)[offset:]
+            names = self._skill_names
+            return [
+                Match(
+                    candidate,
+                    [names[i] for i in _bits_to_positions(self._offered[position] & my_wanted)],
+                    [names[i] for i in _bits_to_positions(self._wanted[position] & my_offered)]
+                )
+                for _, _, _, candidate, position in page
+            ], len(scored) > offset + limit
+
+match_index = MatchIndex(ttl=settings.match_index_ttl)
+
+class MatchService:
+    @staticmethod
+    def get_matches(
+        db: Session,
+        user: User,
+        limit: int,
+        offset: int = 0,
+        near: Optional[Tuple[float, float]] = None,
+        radius_km: Optional[float] = None
+    ) -> Tuple[List[Tuple[dict, Match]], Optional[int]]:
+        """Get one page of ranked reciprocal matches for a user, optionally only those near a point"""
+        # user_service imports this module for match_index
+        from services.user_service import listed_user_rows, users_within
+
+        distances: Dict[str, float] = {}
+        if near is not None:
+            distances = users_within(db, near[0], near[1], radius_km)
+        page, more = match_index.rank(
+            db, user.id, user.skills_offered, user.skills_wanted, limit, offset,
+            distances if near is not None else None
+        )
+        next_offset = offset + limit if more else None
+        if not page:
+            return [], next_offset
+
+        rows = listed_user_rows(db).filter(User.id.in_([match.user_id for match in page])).all()
+        by_id = {row.id: dict(row._mapping) for row in rows}
+        for user_id, distance in distances.items():
+            if user_id in by_id:
+                by_id[user_id]["distance_km"] = round(distance, 3)
+        return [(by_id[m.user_id], m) for m in page if m.user_id in by_id], next_offset
+
+class AsyncMatchService:
+    """MatchService for AsyncSession callers, see AsyncUserService"""
+
+    @staticmethod
+    async def get_matches(
+        db: AsyncSession,
+        user: User,
+        limit: int,
+        offset: int = 0,
+        near: Optional[Tuple[float, float]] = None,
+        radius_km: Optional[float] = None
+    ) -> Tuple[List[Tuple[dict, Match]], Optional[int]]:
+        return await db.run_sync(MatchService.get_matches, user, limit, offset, near, radius_km)
@@ -0,0 +1,138 @@
+
+import threading
+from typing import Dict, Optional
+
+from sqlalchemy import select, delete
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from db.database import SessionLocal, dialect_insert
+from models.name_change import UserNameChange
+from models.swap import SwapRequest
+from services.versions import bump_versions, swaps_key
+
+settings = get_settings()
+
+def enqueue_name_change(db: Session, user_id: str, name: str) -> None:
+    """Queue a rename for propagation; joins the caller's transaction, no commit"""
+    enqueue_name_changes(db, {user_id: name})
+
+def enqueue_name_changes(db: Session, names: Dict[str, str]) -> None:
+    """Queue many renames (user id -> new name) in one statement; no commit"""
+    queue = UserNameChange.__table__
+    stmt = dialect_insert(db, queue).values([
+        {"user_id": user_id, "name": name, "revision": 1} for user_id, name in names.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[queue.c.user_id],
+        set_={"name": stmt.excluded.name, "revision": queue.c.revision + 1}
+    )
+    db.execute(stmt)
+
+def _rewrite_names(
+    db: Session, id_column: str, name_column: str, other_column: str, user_id: str, name: str, batch_size: int
+) -> int:
+    """Rewrite one denormalized name column in committed batches of ``batch_size`` rows"""
+    swaps = SwapRequest.__table__
+    written = 0
+    while True:
+        stale = select(swaps.c.id).where(
+            swaps.c[id_column] == user_id,
+            swaps.c[name_column] != name
+        ).limit(batch_size).scalar_subquery()
+        # Denormalized copies are not a state change: leave updated_at and version alone
+        counterparts = db.execute(
+            swaps.update()
+            .where(swaps.c.id.in_(stale))
+            .values({name_column: name, "updated_at": swaps.c.updated_at})
+            .returning(swaps.c[other_column])
+        ).scalars().all()
+        db.commit()
+        written += len(counterparts)
+        if counterparts:
+            # Both sides list these rows, so both inbox ETags change
+            bump_versions(swaps_key(user_id), *(swaps_key(other) for other in counterparts))
+        if len(counterparts) < batch_size:
+            return written
+
+def propagate_pending(db: Session, max_users: int, batch_size: int) -> int:
+    """Apply up to ``max_users`` queued renames (oldest first); returns how many were drained"""
+    changes = db.query(
+        UserNameChange.user_id, UserNameChange.name, UserNameChange.revision
+    ).order_by(UserNameChange.queued_at).limit(max_users).all()
+    db.rollback()
+
+    for user_id, name, revision in changes:
+        written = _rewrite_names(
+            db, "from_user_id", "from_user_name", "to_user_id", user_id, name, batch_size
+        )
+        written += _rewrite_names(
+            db, "to_user_id", "to_user_name", "from_user_id", user_id, name, batch_size
+        )
+        # A rename queued while we were rewriting bumped the revision; keep it for the next pass
+        db.execute(delete(UserNameChange).where(
+            UserNameChange.user_id == user_id,
+            UserNameChange.revision == revision
+        ))
+        db.commit()
+        if written:
+            print(f"Propagated name for user {user_id} to {written} swap rows")
+    return len(changes)
+
+class NamePropagationWorker:
+    """Background thread draining the user_name_changes queue.
+
+    Runs every ``interval`` seconds, or sooner when ``wake`` is called after a
+    rename commits. Each pass is idempotent, so several processes running the
+    worker against one database only duplicate work, never corrupt it.
+    """
+
+    def __init__(self, interval: float, max_users: int, batch_size: int):
+        self.interval = interval
+        self.max_users = max_users
+        self.batch_size = batch_size
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def drain(self) -> int:
+        """Process the queue until it is empty; returns the number of renames applied"""
+        drained = 0
+        db = SessionLocal()
+        try:
+            while True:
+                count = propagate_pending(db, self.max_users, self.batch_size)
+                drained += count
+                if count < self.max_users:
+                    return drained
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if self._stopping.is_set():
+                return
+            try:
+                self.drain()
+            except Exception as e:
+                print(f"Name propagation failed, retrying next pass: {e}")
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wakeup.set()
+
+name_propagator = NamePropagationWorker(
+    interval=settings.name_propagation_interval,
+    max_users=settings.name_propagation_max_users,
+    batch_size=settings.name_propagation_batch_size
+)
@@ -0,0 +1,132 @@
+
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from db.database import dialect_insert
+from models.skill import Skill, UserSkill, SkillKind
+
+def canonical_skill(name: str) -> str:
+    """Display form of a skill name: surrounding and repeated whitespace removed"""
+    return " ".join(name.split())
+
+def skill_key(name: str) -> str:
+    """Lookup form: "Python", "python " and "PYTHON" all share one key"""
+    return canonical_skill(name).casefold()
+
+class SkillDictionary:
+    """Process-wide intern table of skill key -> (id, display name).
+
+    Skills are never renamed or deleted, so entries never go stale and are
+    shared by every worker through the ``skills`` table's unique key.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_key: Dict[str, Tuple[int, str]] = {}
+
+    def _remember(self, rows) -> None:
+        with self._lock:
+            for skill_id, name, key in rows:
+                self._by_key[key] = (skill_id, name)
+
+    def _cached(self, keys: Iterable[str]) -> Dict[str, Tuple[int, str]]:
+        with self._lock:
+            return {key: self._by_key[key] for key in keys if key in self._by_key}
+
+    def lookup(self, db: Session, name: str) -> Optional[int]:
+        """Id of an existing skill, without creating it"""
+        key = skill_key(name)
+        found = self._cached([key])
+        if not found:
+            self._remember(db.execute(select(Skill.id, Skill.name, Skill.key).where(Skill.key == key)))
+            found = self._cached([key])
+        return found[key][0] if found else None
+
+    def intern(self, db: Session, names: Iterable[str]) -> Dict[str, Tuple[int, str]]:
+        """Ids and display names for ``names`` by key, inserting unseen skills (caller commits)"""
+        wanted = {}
+        for name in names:
+            if name and name.strip():
+                wanted.setdefault(skill_key(name), canonical_skill(name))
+        found = self._cached(wanted)
+        missing = [key for key in wanted if key not in found]
+        if missing:
+            self._remember(db.execute(
+                select(Skill.id, Skill.name, Skill.key).where(Skill.key.in_(missing))
+            ))
+            found = self._cached(wanted)
+            missing = [key for key in wanted if key not in found]
+        if missing:
+            table = Skill.__table__
+            db.execute(
+                dialect_insert(db, table)
+                .values([{"name": wanted[key], "key": key} for key in missing])
+                .on_conflict_do_nothing(index_elements=[table.c.key])
+            )
+            # Not cached yet: the caller's transaction may still roll these back
+            for skill_id, name, key in db.execute(
+                select(Skill.id, Skill.name, Skill.key).where(Skill.key.in_(missing))
+            ):
+                found[key] = (skill_id, name)
+        return found
+
+skill_dictionary = SkillDictionary()
+
+def canonical_ids(interned: Dict[str, Tuple[int, str]], names: Iterable[str]) -> Dict[int, str]:
+    """Skill id -> display name for ``names`` (already interned), duplicates by key dropped, order kept"""
+    ids: Dict[int, str] = {}
+    for name in names:
+        if name and name.strip():
+            skill_id, display = interned[skill_key(name)]
+            ids.setdefault(skill_id, display)
+    return ids
+
+def write_user_skills(
+    db: Session,
+    user_id: str,
+    offered: Optional[List[str]],
+    wanted: Optional[List[str]]
+) -> Tuple[Optional[List[str]], Optional[List[str]]]:
+    """Canonicalize a user's skill lists and mirror them into user_skills.
+
+    ``None`` leaves that kind untouched. Returns the canonical display lists
+    (duplicates by key dropped, order kept) to store on the user row. Runs in
+    the caller's transaction; the user row must already be flushed.
+    """
+    interned = skill_dictionary.intern(db, [*(offered or []), *(wanted or [])])
+    result = []
+    for kind, names in ((SkillKind.OFFERED, offered), (SkillKind.WANTED, wanted)):
+        if names is None:
+            result.append(None)
+            continue
+        ids = canonical_ids(interned, names)
+        db.execute(delete(UserSkill).where(UserSkill.user_id == user_id, UserSkill.kind == kind))
+        if ids:
+            db.execute(
+                insert(UserSkill),
+                [{"user_id": user_id, "kind": kind, "skill_id": skill_id} for skill_id in ids]
+            )
+        result.append(list(ids.values()))
+    return result[0], result[1]
+
+def replace_user_skills(
+    db: Session, skill_ids: Dict[str, Tuple[Optional[Iterable[int]], Optional[Iterable[int]]]]
+) -> None:
+    """Set many users' junction rows to (offered ids, wanted ids) with one DELETE per kind
+    and one INSERT; a None list leaves that kind as it is"""
+    kinds = (SkillKind.OFFERED, SkillKind.WANTED)
+    for position, kind in enumerate(kinds):
+        user_ids = [user_id for user_id, lists in skill_ids.items() if lists[position] is not None]
+        if user_ids:
+            db.execute(delete(UserSkill).where(UserSkill.user_id.in_(user_ids), UserSkill.kind == kind))
+    rows = [
+        {"user_id": user_id, "kind": kind, "skill_id": skill_id}
+        for user_id, lists in skill_ids.items()
+        for kind, ids in zip(kinds, lists)
+        for skill_id in ids or ()
+    ]
+    if rows:
+        db.execute(insert(UserSkill.__table__), rows)
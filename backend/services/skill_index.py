@@ -0,0 +1,128 @@
+
+import bisect
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from config import get_settings
+from services.skill_dictionary import skill_key
+
+settings = get_settings()
+
+# (created_at, user_id) - the same order the directory is paginated by
+SkillKey = Tuple[datetime, str]
+
+def page_keys(keys: List[SkillKey], after: Optional[SkillKey], limit: int) -> Tuple[List[SkillKey], bool]:
+    """The ``limit`` sorted keys after ``after`` (a copy), and whether more follow"""
+    start = bisect.bisect_right(keys, after) if after is not None else 0
+    return keys[start:start + limit], start + limit < len(keys)
+
+class SkillIndex:
+    """In-process inverted index from hot skills (by ``skill_key``) to the users offering or wanting them.
+
+    Only skills searched at least ``threshold`` times are materialized, and at most
+    ``capacity`` of them are kept (least recently searched are evicted first).
+    Skills listed by more than ``max_keys`` users are not cached at all.
+    Entries expire after ``ttl`` seconds so writes made by other workers converge.
+    """
+
+    def __init__(self, threshold: int, capacity: int, ttl: int, max_keys: int):
+        self.threshold = threshold
+        self.capacity = capacity
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, List[SkillKey]]]" = OrderedDict()
+        # user id -> the cached skills whose entry holds that user, and under which key
+        self._members: Dict[str, Dict[str, SkillKey]] = {}
+        self._search_counts: Dict[str, int] = {}
+        self._version = 0
+
+    def _drop(self, skill: str) -> None:
+        _, keys = self._entries.pop(skill)
+        for _, user_id in keys:
+            held = self._members.get(user_id)
+            if held is not None:
+                held.pop(skill, None)
+                if not held:
+                    del self._members[user_id]
+
+    def lookup(self, skill: str, after: Optional[SkillKey], limit: int) -> Optional[Tuple[List[SkillKey], bool]]:
+        """Record a search for ``skill`` and return one page of its cached keys (see
+        ``page_keys``) if present"""
+        with self._lock:
+            entry = self._entries.get(skill)
+            if entry is not None:
+                if time.monotonic() - entry[0] < self.ttl:
+                    self._entries.move_to_end(skill)
+                    # Sliced under the lock: refresh_user edits the lists in place
+                    return page_keys(entry[1], after, limit)
+                self._drop(skill)
+            self._search_counts[skill] = self._search_counts.get(skill, 0) + 1
+            if len(self._search_counts) > self.capacity * 16:
+                self._search_counts.clear()
+            return None
+
+    def begin_load(self, skill: str) -> Optional[int]:
+        """Return a load token if ``skill`` is hot enough to be cached"""
+        with self._lock:
+            if self._search_counts.get(skill, 0) < self.threshold:
+                return None
+            return self._version
+
+    def store(self, skill: str, keys: List[SkillKey], token: int) -> None:
+        """Cache keys loaded under ``token`` unless a user changed in the meantime or there are too many"""
+        with self._lock:
+            if token != self._version:
+                return
+            # Too-large skills start counting searches again, so they are
+            # re-tried only every ``threshold`` searches
+            self._search_counts.pop(skill, None)
+            if len(keys) > self.max_keys:
+                return
+            if skill in self._entries:
+                self._drop(skill)
+            keys = sorted(keys)
+            self._entries[skill] = (time.monotonic(), keys)
+            for key in keys:
+                self._members.setdefault(key[1], {})[skill] = key
+            while len(self._entries) > self.capacity:
+                self._drop(next(iter(self._entries)))
+
+    def refresh_user(self, user) -> None:
+        """Incrementally move ``user`` in or out of the cached skill entries it is or should be in"""
+        key = (user.created_at, user.id)
+        listed = user.is_public and user.is_active and not user.is_banned and user.created_at is not None
+        skills = {skill_key(skill) for skill in [*(user.skills_offered or []), *(user.skills_wanted or [])]}
+        with self._lock:
+            self._version += 1
+            held = self._members.pop(user.id, {})
+            wanted = {skill for skill in skills if skill in self._entries} if listed else set()
+            for skill in held.keys() | wanted:
+                keys = self._entries[skill][1]
+                if skill in held:
+                    index = bisect.bisect_left(keys, held[skill])
+                    if index < len(keys) and keys[index] == held[skill]:
+                        del keys[index]
+                if skill in wanted:
+                    bisect.insort(keys, key)
+                if len(keys) > self.max_keys:
+                    self._drop(skill)
+                elif skill in wanted:
+                    self._members.setdefault(user.id, {})[skill] = key
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._members.clear()
+            self._search_counts.clear()
+            self._version += 1
+
+skill_index = SkillIndex(
+    threshold=settings.hot_skill_threshold,
+    capacity=settings.hot_skill_cache_size,
+    ttl=settings.hot_skill_cache_ttl,
+    max_keys=settings.hot_skill_max_keys
+)
@@ -0,0 +1,26 @@
+
+from typing import List
+
+from sqlalchemy import Row, case, func
+from sqlalchemy.orm import Session
+
+from models.skill import Skill, UserSkill, SkillKind
+from models.user import User
+
+class SkillService:
+    @staticmethod
+    def get_skill_stats(db: Session, limit: int) -> List[Row]:
+        """Offer/demand counts per skill over listed users, most in demand first"""
+        offered = func.sum(case((UserSkill.kind == SkillKind.OFFERED, 1), else_=0))
+        wanted = func.sum(case((UserSkill.kind == SkillKind.WANTED, 1), else_=0))
+        return db.query(
+            Skill.id, Skill.name, offered.label("offered_count"), wanted.label("wanted_count")
+        ).join(UserSkill, UserSkill.skill_id == Skill.id).join(
+            User, User.id == UserSkill.user_id
+        ).filter(
+            User.is_public == True,
+            User.is_active == True,
+            User.is_banned == False
+        ).group_by(Skill.id, Skill.name).order_by(
+            wanted.desc(), offered.desc(), Skill.id
+        ).limit(limit).all()
@@ -0,0 +1,155 @@
+
+import bisect
+import heapq
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from db.database import SessionLocal
+from models.user import User
+from services.skill_dictionary import canonical_skill, skill_key
+
+settings = get_settings()
+
+UserSkills = Tuple[frozenset, frozenset]
+
+def _normalize(skills) -> frozenset:
+    return frozenset(canonical_skill(skill) for skill in skills or [] if skill and skill.strip())
+
+class SkillSuggestIndex:
+    """Sorted-array prefix index over every listed user's offered and wanted skills.
+
+    Skills are matched case-insensitively: ``_keys`` holds the ``skill_key`` of
+    every name in sorted order, so a prefix is one bisect plus a scan of the
+    matching run. Each key keeps offer/demand counts and the spelling it was
+    first seen with.
+    The per-user skill sets are kept too, so a profile write is applied as a
+    diff without reading the database.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys: List[str] = []
+        self._names: Dict[str, str] = {}
+        self._counts: Dict[str, List[int]] = {}
+        self._users: Dict[str, UserSkills] = {}
+        # Writes seen while a rebuild is reading the database, replayed onto its result
+        self._pending: Optional[Dict[str, Optional[UserSkills]]] = None
+
+    def _adjust(self, skill: str, column: int, delta: int) -> None:
+        key = skill_key(skill)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0, 0]
+            self._names[key] = skill
+            bisect.insort(self._keys, key)
+        counts[column] += delta
+        if counts == [0, 0]:
+            del self._counts[key]
+            del self._names[key]
+            del self._keys[bisect.bisect_left(self._keys, key)]
+
+    def _set_user(self, user_id: str, skills: Optional[UserSkills]) -> None:
+        previous = self._users.pop(user_id, (frozenset(), frozenset()))
+        current = skills or (frozenset(), frozenset())
+        for column in (0, 1):
+            for skill in current[column] - previous[column]:
+                self._adjust(skill, column, 1)
+            for skill in previous[column] - current[column]:
+                self._adjust(skill, column, -1)
+        if skills is not None:
+            self._users[user_id] = skills
+
+    def refresh_user(self, user) -> None:
+        """Apply one user's committed profile, ban or create write"""
+        skills = None
+        if user.is_public and user.is_active and not user.is_banned:
+            skills = (_normalize(user.skills_offered), _normalize(user.skills_wanted))
+        with self._lock:
+            if self._pending is not None:
+                self._pending[user.id] = skills
+            self._set_user(user.id, skills)
+
+    def rebuild(self, db: Session) -> None:
+        """Reload from a narrow (id, skills) snapshot of the listed users"""
+        with self._lock:
+            self._pending = {}
+        try:
+            rows = db.query(User.id, User.skills_offered, User.skills_wanted).filter(
+                User.is_public == True,
+                User.is_active == True,
+                User.is_banned == False
+            ).yield_per(settings.export_batch_size)
+            snapshot = {
+                user_id: (_normalize(offered), _normalize(wanted))
+                for user_id, offered, wanted in rows
+            }
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        fresh = SkillSuggestIndex()
+        for user_id, skills in snapshot.items():
+            fresh._set_user(user_id, skills)
+        with self._lock:
+            for user_id, skills in self._pending.items():
+                fresh._set_user(user_id, skills)
+            self._keys, self._names = fresh._keys, fresh._names
+            self._counts, self._users = fresh._counts, fresh._users
+            self._pending = None
+
+    def suggest(self, prefix: str, limit: int) -> List[Tuple[str, int, int]]:
+        """Skills starting with ``prefix``, most offered+wanted first, as (name, offered, wanted)"""
+        needle = skill_key(prefix)
+        with self._lock:
+            start = bisect.bisect_left(self._keys, needle)
+            end = bisect.bisect_left(self._keys, needle + "\U0010ffff") if needle else len(self._keys)
+            counts = self._counts
+            best = heapq.nsmallest(
+                limit,
+                self._keys[start:end],
+                key=lambda key: (-(counts[key][0] + counts[key][1]), key)
+            )
+            return [(self._names[key], counts[key][0], counts[key][1]) for key in best]
+
+skill_suggest = SkillSuggestIndex()
+
+class SkillSuggestRefresher:
+    """Rebuilds ``skill_suggest`` at startup and every ``interval`` seconds after.
+
+    Writes in this worker are applied incrementally; the periodic rebuild is what
+    brings in writes made by other workers.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _rebuild(self) -> None:
+        db = SessionLocal()
+        try:
+            skill_suggest.rebuild(db)
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.interval):
+            try:
+                self._rebuild()
+            except Exception as e:
+                print(f"Skill suggest rebuild failed, keeping the current index: {e}")
+
+    def start(self) -> None:
+        self._rebuild()
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+skill_suggest_refresher = SkillSuggestRefresher(interval=settings.skill_suggest_rebuild_interval)
@@ -0,0 +1,181 @@
+
+import asyncio
+import threading
+import uuid
+from collections import OrderedDict, deque
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import orjson
+
+from config import get_settings
+from utils.broadcast import broadcast
+
+settings = get_settings()
+
+EVENT_CHANNEL = "swap_events"
+
+# Swap columns carried by every swap.* event (the message is left out to keep
+# payloads well under the NOTIFY size limit)
+EVENT_COLUMNS = (
+    "id", "from_user_id", "to_user_id", "from_user_name", "to_user_name",
+    "skill_offered", "skill_wanted", "status", "version",
+)
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more. Events whose text
+# columns push them past this are sent with only these fields (plus
+# "truncated": true) and clients refetch the swap
+MAX_PAYLOAD_BYTES = 7900
+ID_ONLY_COLUMNS = ("id", "swap_request_id", "from_user_id", "to_user_id", "status", "version", "rating")
+
+class SwapEvent(NamedTuple):
+    id: str
+    type: str
+    data: str
+
+    def encode(self) -> str:
+        """The event in text/event-stream framing"""
+        return f"id: {self.id}\nevent: {self.type}\ndata: {self.data}\n\n"
+
+class Subscription:
+    """One open stream: a bounded queue fed from any thread via its event loop"""
+
+    def __init__(self, user_id: str, queue_size: int):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: "asyncio.Queue[SwapEvent]" = asyncio.Queue(queue_size)
+        # Set when the reader fell behind and events were dropped; the stream
+        # ends so the client reconnects and replays from its last event id
+        self.overflowed = False
+
+    def _put(self, event: SwapEvent) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    def push(self, event: SwapEvent) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # Loop already closed: the stream is gone
+            pass
+
+class SwapEventHub:
+    """Per-user swap event fan-out with a short replay buffer for reconnects.
+
+    Every worker receives every event over ``broadcast`` and keeps the last
+    ``buffer_size`` events of up to ``max_users`` recently active users, so a
+    client reconnecting to any worker with ``Last-Event-ID`` gets just what it
+    missed. If that id has already left the buffer the client is told to
+    reload its inbox instead.
+    """
+
+    def __init__(self, buffer_size: int, max_users: int, queue_size: int, max_streams: int):
+        self.buffer_size = buffer_size
+        self.max_users = max_users
+        self.queue_size = queue_size
+        self.max_streams = max_streams
+        self._lock = threading.Lock()
+        self._buffers: "OrderedDict[str, deque]" = OrderedDict()
+        self._subscribers: Dict[str, List[Subscription]] = {}
+        self._streams = 0
+
+    def _buffer(self, user_id: str) -> deque:
+        buffer = self._buffers.get(user_id)
+        if buffer is None:
+            buffer = self._buffers[user_id] = deque(maxlen=self.buffer_size)
+            while len(self._buffers) > self.max_users:
+                self._buffers.popitem(last=False)
+        else:
+            self._buffers.move_to_end(user_id)
+        return buffer
+
+    def deliver(self, payload: str) -> None:
+        """Broadcast callback: buffer the event and push it to the users' open streams"""
+        message = orjson.loads(payload)
+        event = SwapEvent(message["id"], message["type"], orjson.dumps(message["data"]).decode())
+        for user_id in dict.fromkeys(message["users"]):
+            with self._lock:
+                buffer = self._buffer(user_id)
+                # Postgres broadcast delivers this worker's own events twice
+                if any(buffered.id == event.id for buffered in buffer):
+                    continue
+                buffer.append(event)
+                subscribers = list(self._subscribers.get(user_id, ()))
+            for subscription in subscribers:
+                subscription.push(event)
+
+    def subscribe(
+        self,
+        user_id: str,
+        last_event_id: Optional[str] = None
+    ) -> Optional[Tuple[Subscription, List[SwapEvent], bool]]:
+        """Open a stream (None if at ``max_streams``) with the events after ``last_event_id``.
+
+        The flag is True when ``last_event_id`` is no longer buffered and the
+        client has to reload instead of replaying.
+        """
+        subscription = Subscription(user_id, self.queue_size)
+        with self._lock:
+            if self._streams >= self.max_streams:
+                return None
+            self._streams += 1
+            self._subscribers.setdefault(user_id, []).append(subscription)
+            if last_event_id is None:
+                return subscription, [], False
+            buffered = list(self._buffers.get(user_id, ()))
+        for index, event in enumerate(buffered):
+            if event.id == last_event_id:
+                return subscription, buffered[index + 1:], False
+        return subscription, [], True
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id, [])
+            if subscription in subscribers:
+                subscribers.remove(subscription)
+                self._streams -= 1
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"streams": self._streams, "buffered_users": len(self._buffers)}
+
+swap_events = SwapEventHub(
+    buffer_size=settings.swap_event_buffer_size,
+    max_users=settings.swap_event_max_users,
+    queue_size=settings.swap_event_queue_size,
+    max_streams=settings.swap_event_max_streams
+)
+broadcast.subscribe(EVENT_CHANNEL, swap_events.deliver)
+
+def _publish(event_type: str, users: Tuple[str, ...], data: dict) -> None:
+    message = {"id": uuid.uuid4().hex, "type": event_type, "users": users, "data": data}
+    payload = orjson.dumps(message)
+    if len(payload) > MAX_PAYLOAD_BYTES:
+        message["data"] = {
+            **{column: data[column] for column in ID_ONLY_COLUMNS if column in data},
+            "truncated": True
+        }
+        payload = orjson.dumps(message)
+    broadcast.publish(EVENT_CHANNEL, payload.decode())
+
+def swap_event_fields(swap) -> dict:
+    """EVENT_COLUMNS of a SwapRequest (or of a row returned with them)"""
+    return {column: getattr(swap, column) for column in EVENT_COLUMNS}
+
+def publish_swap_event(event_type: str, fields: dict) -> None:
+    """Tell both participants about a committed swap change (call after commit)"""
+    _publish(f"swap.{event_type}", (fields["from_user_id"], fields["to_user_id"]), fields)
+
+def publish_feedback_event(feedback) -> None:
+    """Tell both participants about new feedback on their swap (call after commit)"""
+    data = {
+        "id": feedback.id,
+        "swap_request_id": feedback.swap_request_id,
+        "from_user_id": feedback.from_user_id,
+        "to_user_id": feedback.to_user_id,
+        "rating": feedback.rating,
+    }
+    _publish("feedback.created", (feedback.from_user_id, feedback.to_user_id), data)
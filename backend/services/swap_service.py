@@ -1,11 +1,155 @@
 
+from sqlalchemy import Row, update, delete, exists, func, or_, select, tuple_, union_all
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from models.swap import SwapRequest, Feedback, SwapStatus
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.swap import SwapRequest, Feedback, SwapStatus, SWAP_TRANSITIONS
 from models.user import User
+from models.rating import UserRatingSummary
+from models.swap_count import UserSwapCounts, SWAP_COUNT_COLUMNS, SWAP_DIRECTIONS, swap_count_column
+from db.database import dialect_insert
+from services.match_service import match_index
+from services.swap_events import (
+    EVENT_COLUMNS, swap_event_fields, publish_swap_event, publish_feedback_event
+)
+from services.versions import bump_versions, profile_key, swaps_key, SEARCH_KEY
 from schemas.swap import SwapRequestCreate, FeedbackCreate
-from typing import List, Optional
+from utils.pagination import encode_cursor, decode_cursor
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
 import uuid
 
+class SwapConflictError(Exception):
+    """The swap exists but is not in a state (or version) that allows the change"""
+
+# Who may perform each action on a swap, as SQL filters
+SWAP_ACTORS = {
+    "accept": lambda user_id: SwapRequest.to_user_id == user_id,
+    "reject": lambda user_id: SwapRequest.to_user_id == user_id,
+    "complete": lambda user_id: or_(
+        SwapRequest.from_user_id == user_id, SwapRequest.to_user_id == user_id
+    ),
+    "delete": lambda user_id: SwapRequest.from_user_id == user_id,
+}
+
+SWAP_ACTION_TARGETS = {
+    "accept": SwapStatus.ACCEPTED,
+    "reject": SwapStatus.REJECTED,
+    "complete": SwapStatus.COMPLETED,
+}
+
+def _sources(target: SwapStatus) -> List[SwapStatus]:
+    return [status for status, targets in SWAP_TRANSITIONS.items() if target in targets]
+
+def _source(target: SwapStatus) -> SwapStatus:
+    """The one state a swap reaches ``target`` from, which the swap counts move it out of"""
+    source, = _sources(target)
+    return source
+
+# (from_user_id, to_user_id, old status, new status); None for a created/deleted swap
+SwapChange = Tuple[str, str, Optional[SwapStatus], Optional[SwapStatus]]
+
+def apply_swap_count_deltas(db: Session, deltas: Mapping[str, Mapping[str, int]]) -> None:
+    """Add per-user column deltas to user_swap_counts with one executemany upsert.
+
+    Rows go in user id order, so transactions touching the same users lock
+    their counter rows in the same order and cannot deadlock.
+    """
+    deltas = {user_id: delta for user_id, delta in deltas.items() if any(delta.values())}
+    if not deltas:
+        return
+    counts = UserSwapCounts.__table__
+    stmt = dialect_insert(db, counts)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[counts.c.user_id],
+        set_={
+            **{column: counts.c[column] + stmt.excluded[column] for column in SWAP_COUNT_COLUMNS},
+            "updated_at": func.now(),
+        }
+    )
+    db.execute(stmt, [
+        {"user_id": user_id, **{column: deltas[user_id].get(column, 0) for column in SWAP_COUNT_COLUMNS}}
+        for user_id in sorted(deltas)
+    ])
+
+def _count_swaps(db: Session, changes: Iterable[SwapChange]) -> None:
+    """Move swaps between the counters of both participants (same transaction as the change)"""
+    deltas: Dict[str, Counter] = defaultdict(Counter)
+    for from_user_id, to_user_id, old_status, new_status in changes:
+        for user_id, direction in ((from_user_id, "sent"), (to_user_id, "received")):
+            if old_status is not None:
+                deltas[user_id][swap_count_column(direction, old_status)] -= 1
+            if new_status is not None:
+                deltas[user_id][swap_count_column(direction, new_status)] += 1
+    apply_swap_count_deltas(db, deltas)
+
+def _transition(
+    db: Session,
+    swap_id: str,
+    action: str,
+    user_id: str,
+    expected_version: Optional[int] = None
+) -> Optional[SwapRequest]:
+    """Move a swap to ``target`` with a single conditional UPDATE ... RETURNING.
+
+    The WHERE clause carries the authorization check, the allowed source states
+    and (optionally) the version the caller last saw, so concurrent transitions
+    cannot both succeed. Only when nothing matched is the row looked up again to
+    tell "not found / not yours" (None) apart from a conflict.
+    """
+    target = SWAP_ACTION_TARGETS[action]
+    actor_filter = SWAP_ACTORS[action](user_id)
+    conditions = [SwapRequest.id == swap_id, actor_filter, SwapRequest.status.in_(_sources(target))]
+    if expected_version is not None:
+        conditions.append(SwapRequest.version == expected_version)
+
+    stmt = (
+        update(SwapRequest)
+        .where(*conditions)
+        .values(status=target, version=SwapRequest.version + 1)
+        .returning(SwapRequest)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    swap = db.execute(stmt).scalar_one_or_none()
+    if swap is None:
+        exists = db.query(SwapRequest.id).filter(SwapRequest.id == swap_id, actor_filter).first()
+        db.rollback()
+        if exists:
+            raise SwapConflictError(f"Swap request cannot move to {target.value}")
+        return None
+
+    _count_swaps(db, [(swap.from_user_id, swap.to_user_id, _source(target), target)])
+    # Detach before committing so the RETURNING values are served as-is
+    # instead of being expired and re-selected
+    db.expunge(swap)
+    db.commit()
+    bump_versions(swaps_key(swap.from_user_id), swaps_key(swap.to_user_id))
+    publish_swap_event(target.value, swap_event_fields(swap))
+    return swap
+
+def _record_rating(db: Session, user_id: str, rating: int) -> float:
+    """Add one rating to a user's summary row (upsert, same transaction as the feedback)"""
+    summary = UserRatingSummary.__table__
+    histogram = f"rating_{rating}"
+    stmt = dialect_insert(db, summary).values(
+        user_id=user_id,
+        rating_count=1,
+        rating_sum=rating,
+        rating_average=float(rating),
+        **{f"rating_{value}": int(value == rating) for value in range(1, 6)}
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[summary.c.user_id],
+        set_={
+            "rating_count": summary.c.rating_count + 1,
+            "rating_sum": summary.c.rating_sum + rating,
+            "rating_average": (summary.c.rating_sum + rating) * 1.0 / (summary.c.rating_count + 1),
+            histogram: summary.c[histogram] + 1,
+        }
+    ).returning(summary.c.rating_average)
+    return db.execute(stmt).scalar_one()
+
 class SwapService:
     @staticmethod
     def create_swap_request(
@@ -13,7 +157,7 @@ class SwapService:
         swap_data: SwapRequestCreate, 
         from_user_id: str
     ) -> SwapRequest:
-        """Create a new swap request"""
+        """Create a new swap request (SwapConflictError if the same one is already pending)"""
         # Get user names
         from_user = db.query(User).filter(User.id == from_user_id).first()
         to_user = db.query(User).filter(User.id == swap_data.to_user_id).first()
@@ -34,22 +178,117 @@ class SwapService:
         )
         
         db.add(swap_request)
-        db.commit()
+        try:
+            _count_swaps(db, [(from_user_id, swap_data.to_user_id, None, SwapStatus.PENDING)])
+            db.commit()
+        except IntegrityError:
+            # uq_swap_requests_pending_pair: typically a retried request
+            db.rollback()
+            raise SwapConflictError("A pending swap request for these skills already exists")
         db.refresh(swap_request)
+        bump_versions(swaps_key(from_user_id), swaps_key(swap_data.to_user_id))
+        publish_swap_event("created", swap_event_fields(swap_request))
         return swap_request
 
     @staticmethod
-    def get_user_swaps(db: Session, user_id: str) -> List[SwapRequest]:
-        """Get all swaps for a user (sent and received)"""
-        return db.query(SwapRequest).filter(
-            (SwapRequest.from_user_id == user_id) | 
-            (SwapRequest.to_user_id == user_id)
-        ).all()
+    def get_user_swaps(
+        db: Session,
+        user_id: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        direction: Optional[str] = None,
+        status: Optional[SwapStatus] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> Tuple[List[Row], Optional[str]]:
+        """Get one page of a user's swaps (column rows), newest first.
+
+        Sent and received swaps are fetched as separate branches, each one an
+        index range scan on (from_user_id|to_user_id, status, created_at) with
+        its own LIMIT, and merged with UNION ALL instead of an OR that would
+        defeat both indexes.
+        """
+        filters = []
+        if status is not None:
+            filters.append(SwapRequest.status == status)
+        if since is not None:
+            filters.append(SwapRequest.created_at >= since)
+        if until is not None:
+            filters.append(SwapRequest.created_at < until)
+        if cursor:
+            created_at, swap_id = decode_cursor(cursor)
+            filters.append(tuple_(SwapRequest.created_at, SwapRequest.id) < tuple_(created_at, swap_id))
+
+        newest_first = (SwapRequest.created_at.desc(), SwapRequest.id.desc())
+        columns = SwapRequest.__table__.columns
+        branches = []
+        if direction in (None, "sent"):
+            branches.append(
+                select(*columns)
+                .where(SwapRequest.from_user_id == user_id, *filters)
+                .order_by(*newest_first)
+                .limit(limit + 1)
+            )
+        if direction in (None, "received"):
+            received = [SwapRequest.to_user_id == user_id, *filters]
+            if direction is None:
+                # A swap to oneself is already in the sent branch
+                received.append(SwapRequest.from_user_id != user_id)
+            branches.append(
+                select(*columns)
+                .where(*received)
+                .order_by(*newest_first)
+                .limit(limit + 1)
+            )
+
+        if len(branches) == 1:
+            rows = db.execute(branches[0]).all()
+        else:
+            merged = union_all(*(branch.subquery().select() for branch in branches)).subquery()
+            rows = db.execute(
+                select(merged).order_by(merged.c.created_at.desc(), merged.c.id.desc()).limit(limit + 1)
+            ).all()
+
+        if len(rows) > limit:
+            rows = rows[:limit]
+            return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+        return rows, None
+
+    @staticmethod
+    def get_swap_counts(db: Session, user_id: str) -> dict:
+        """Sent and received swap counts by status, from the user's user_swap_counts row"""
+        row = db.query(*(UserSwapCounts.__table__.c[column] for column in SWAP_COUNT_COLUMNS)).filter(
+            UserSwapCounts.user_id == user_id
+        ).first()
+        return {
+            direction: {
+                # Clamped so drift (until jobs.reconcile_swap_counts runs) never shows below zero
+                status.value: max(0, getattr(row, swap_count_column(direction, status))) if row else 0
+                for status in SwapStatus
+            }
+            for direction in SWAP_DIRECTIONS
+        }
+
+    @staticmethod
+    def get_all_swaps(db: Session) -> List[Row]:
+        """Get all swap requests (admin only) as column rows"""
+        return db.query(*SwapRequest.__table__.columns).all()
 
     @staticmethod
-    def get_all_swaps(db: Session) -> List[SwapRequest]:
-        """Get all swap requests (admin only)"""
-        return db.query(SwapRequest).all()
+    def stream_swaps(
+        db: Session,
+        status: Optional[SwapStatus] = None,
+        created_since: Optional[datetime] = None,
+        batch_size: int = 1000
+    ) -> Iterator[Mapping]:
+        """Stream swap rows (admin export) over a server-side cursor"""
+        query = db.query(*SwapRequest.__table__.columns)
+        if status is not None:
+            query = query.filter(SwapRequest.status == status)
+        if created_since is not None:
+            query = query.filter(SwapRequest.created_at >= created_since)
+        for row in query.order_by(SwapRequest.created_at, SwapRequest.id).yield_per(batch_size):
+            yield row._mapping
 
     @staticmethod
     def get_swap_by_id(db: Session, swap_id: str) -> Optional[SwapRequest]:
@@ -57,49 +296,148 @@ class SwapService:
         return db.query(SwapRequest).filter(SwapRequest.id == swap_id).first()
 
     @staticmethod
-    def accept_swap(db: Session, swap_id: str, user_id: str) -> Optional[SwapRequest]:
-        """Accept a swap request"""
-        swap = db.query(SwapRequest).filter(
-            SwapRequest.id == swap_id,
-            SwapRequest.to_user_id == user_id
-        ).first()
-        
-        if swap and swap.status == SwapStatus.PENDING:
-            swap.status = SwapStatus.ACCEPTED
-            db.commit()
-            db.refresh(swap)
-        
-        return swap
+    def accept_swap(
+        db: Session,
+        swap_id: str,
+        user_id: str,
+        expected_version: Optional[int] = None
+    ) -> Optional[SwapRequest]:
+        """Accept a pending swap request (recipient only)"""
+        return _transition(db, swap_id, "accept", user_id, expected_version)
 
     @staticmethod
-    def reject_swap(db: Session, swap_id: str, user_id: str) -> Optional[SwapRequest]:
-        """Reject a swap request"""
-        swap = db.query(SwapRequest).filter(
-            SwapRequest.id == swap_id,
-            SwapRequest.to_user_id == user_id
-        ).first()
-        
-        if swap and swap.status == SwapStatus.PENDING:
-            swap.status = SwapStatus.REJECTED
-            db.commit()
-            db.refresh(swap)
-        
-        return swap
+    def reject_swap(
+        db: Session,
+        swap_id: str,
+        user_id: str,
+        expected_version: Optional[int] = None
+    ) -> Optional[SwapRequest]:
+        """Reject a pending swap request (recipient only)"""
+        return _transition(db, swap_id, "reject", user_id, expected_version)
+
+    @staticmethod
+    def complete_swap(
+        db: Session,
+        swap_id: str,
+        user_id: str,
+        expected_version: Optional[int] = None
+    ) -> Optional[SwapRequest]:
+        """Mark an accepted swap as completed (either participant)"""
+        return _transition(db, swap_id, "complete", user_id, expected_version)
 
     @staticmethod
     def delete_swap(db: Session, swap_id: str, user_id: str) -> bool:
         """Delete a swap request (only by owner)"""
-        swap = db.query(SwapRequest).filter(
-            SwapRequest.id == swap_id,
-            SwapRequest.from_user_id == user_id
+        # Counts come from the row as deleted, not from an earlier read that a
+        # concurrent accept/reject could have made stale
+        row = db.execute(
+            delete(SwapRequest)
+            .where(SwapRequest.id == swap_id, SWAP_ACTORS["delete"](user_id))
+            .returning(*(SwapRequest.__table__.c[column] for column in EVENT_COLUMNS)),
+            execution_options={"synchronize_session": False}
         ).first()
-        
-        if swap:
-            db.delete(swap)
-            db.commit()
-            return True
-        
-        return False
+        if row is None:
+            db.rollback()
+            return False
+        fields = swap_event_fields(row)
+        _count_swaps(db, [(row.from_user_id, row.to_user_id, row.status, None)])
+        db.commit()
+        bump_versions(swaps_key(row.from_user_id), swaps_key(row.to_user_id))
+        publish_swap_event("deleted", fields)
+        return True
+
+    @staticmethod
+    def apply_batch(db: Session, items: List[Tuple[str, str]], user_id: str) -> List[dict]:
+        """Apply (swap_id, action) pairs set-wise in a single transaction.
+
+        Each action is one UPDATE/DELETE ... WHERE id IN (...) carrying the same
+        actor and source-state rules as the single-swap endpoints. Ids that did
+        not change are looked up once more per action to report 404 vs 409.
+        Swaps that already have feedback are not deleted, so one row cannot
+        abort the whole batch on the foreign key.
+        """
+        outcomes: Dict[int, dict] = {}
+        ids_by_action: Dict[str, List[str]] = {}
+        seen = set()
+        for index, (swap_id, action) in enumerate(items):
+            if swap_id in seen:
+                outcomes[index] = {"status_code": 409, "detail": "Duplicate swap in batch"}
+                continue
+            seen.add(swap_id)
+            ids_by_action.setdefault(action, []).append(swap_id)
+
+        changed: Dict[str, Tuple[Optional[SwapStatus], Optional[int]]] = {}
+        events: List[Tuple[str, dict]] = []
+        counted: List[SwapChange] = []
+        returned = [SwapRequest.__table__.c[column] for column in EVENT_COLUMNS]
+        for action, ids in ids_by_action.items():
+            actor_filter = SWAP_ACTORS[action](user_id)
+            if action == "delete":
+                stmt = delete(SwapRequest).where(
+                    SwapRequest.id.in_(ids),
+                    actor_filter,
+                    ~exists().where(Feedback.swap_request_id == SwapRequest.id)
+                ).returning(*returned)
+                event_type = "deleted"
+                source = None
+            else:
+                target = SWAP_ACTION_TARGETS[action]
+                stmt = (
+                    update(SwapRequest)
+                    .where(SwapRequest.id.in_(ids), actor_filter, SwapRequest.status.in_(_sources(target)))
+                    .values(status=target, version=SwapRequest.version + 1)
+                    .returning(*returned)
+                )
+                event_type = target.value
+                source = _source(target)
+            for row in db.execute(stmt, execution_options={"synchronize_session": False}):
+                changed[row.id] = (None, None) if action == "delete" else (row.status, row.version)
+                events.append((event_type, swap_event_fields(row)))
+                counted.append((
+                    row.from_user_id, row.to_user_id,
+                    row.status if action == "delete" else source,
+                    None if action == "delete" else row.status
+                ))
+
+        visible = set()
+        for action, ids in ids_by_action.items():
+            missed = [swap_id for swap_id in ids if swap_id not in changed]
+            if missed:
+                visible.update(
+                    swap_id for (swap_id,) in db.query(SwapRequest.id).filter(
+                        SwapRequest.id.in_(missed), SWAP_ACTORS[action](user_id)
+                    )
+                )
+        _count_swaps(db, counted)
+        db.commit()
+        participants = {fields[key] for _, fields in events for key in ("from_user_id", "to_user_id")}
+        bump_versions(*(swaps_key(participant) for participant in participants))
+        for event_type, fields in events:
+            publish_swap_event(event_type, fields)
+
+        results = []
+        for index, (swap_id, action) in enumerate(items):
+            outcome = {
+                "swap_id": swap_id,
+                "action": action,
+                "status_code": 200,
+                "detail": None,
+                "swap_status": None,
+                "version": None
+            }
+            if index in outcomes:
+                outcome.update(outcomes[index])
+            elif swap_id in changed:
+                outcome["swap_status"], outcome["version"] = changed[swap_id]
+            elif swap_id in visible and action == "delete":
+                outcome.update(status_code=409, detail="Swap request has feedback")
+            elif swap_id in visible:
+                target = SWAP_ACTION_TARGETS[action]
+                outcome.update(status_code=409, detail=f"Swap request cannot move to {target.value}")
+            else:
+                outcome.update(status_code=404, detail="Swap request not found or not authorized")
+            results.append(outcome)
+        return results
 
     @staticmethod
     def create_feedback(
@@ -108,9 +446,11 @@ class SwapService:
         feedback_data: FeedbackCreate,
         from_user_id: str
     ) -> Optional[Feedback]:
-        """Create feedback for a completed swap"""
+        """Create feedback for an accepted or completed swap, once per participant"""
         swap = db.query(SwapRequest).filter(SwapRequest.id == swap_id).first()
-        if not swap or swap.status != SwapStatus.ACCEPTED:
+        if not swap or swap.status not in (SwapStatus.ACCEPTED, SwapStatus.COMPLETED):
+            return None
+        if from_user_id not in (swap.from_user_id, swap.to_user_id):
             return None
         
         # Determine to_user_id based on who is giving feedback
@@ -126,11 +466,106 @@ class SwapService:
         )
         
         db.add(feedback)
-        db.commit()
+        try:
+            average = _record_rating(db, to_user_id, feedback_data.rating)
+            db.commit()
+        except IntegrityError:
+            # uq_feedback_swap_from
+            db.rollback()
+            raise SwapConflictError("Feedback already submitted for this swap")
         db.refresh(feedback)
+        match_index.set_rating(to_user_id, average)
+        bump_versions(profile_key(to_user_id), SEARCH_KEY)
+        publish_feedback_event(feedback)
         return feedback
 
     @staticmethod
     def get_swap_feedback(db: Session, swap_id: str) -> List[Feedback]:
         """Get all feedback for a swap"""
         return db.query(Feedback).filter(Feedback.swap_request_id == swap_id).all()
+
+class AsyncSwapService:
+    """SwapService for AsyncSession callers, see AsyncUserService"""
+
+    @staticmethod
+    async def create_swap_request(
+        db: AsyncSession,
+        swap_data: SwapRequestCreate,
+        from_user_id: str
+    ) -> SwapRequest:
+        return await db.run_sync(SwapService.create_swap_request, swap_data, from_user_id)
+
+    @staticmethod
+    async def get_user_swaps(
+        db: AsyncSession,
+        user_id: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        direction: Optional[str] = None,
+        status: Optional[SwapStatus] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> Tuple[List[Row], Optional[str]]:
+        return await db.run_sync(
+            SwapService.get_user_swaps, user_id, limit, cursor, direction, status, since, until
+        )
+
+    @staticmethod
+    async def get_swap_counts(db: AsyncSession, user_id: str) -> dict:
+        return await db.run_sync(SwapService.get_swap_counts, user_id)
+
+    @staticmethod
+    async def get_all_swaps(db: AsyncSession) -> List[Row]:
+        return await db.run_sync(SwapService.get_all_swaps)
+
+    @staticmethod
+    async def get_swap_by_id(db: AsyncSession, swap_id: str) -> Optional[SwapRequest]:
+        return await db.get(SwapRequest, swap_id)
+
+    @staticmethod
+    async def accept_swap(
+        db: AsyncSession,
+        swap_id: str,
+        user_id: str,
+        expected_version: Optional[int] = None
+    ) -> Optional[SwapRequest]:
+        return await db.run_sync(SwapService.accept_swap, swap_id, user_id, expected_version)
+
+    @staticmethod
+    async def reject_swap(
+        db: AsyncSession,
+        swap_id: str,
+        user_id: str,
+        expected_version: Optional[int] = None
+    ) -> Optional[SwapRequest]:
+        return await db.run_sync(SwapService.reject_swap, swap_id, user_id, expected_version)
+
+    @staticmethod
+    async def complete_swap(
+        db: AsyncSession,
+        swap_id: str,
+        user_id: str,
+        expected_version: Optional[int] = None
+    ) -> Optional[SwapRequest]:
+        return await db.run_sync(SwapService.complete_swap, swap_id, user_id, expected_version)
+
+    @staticmethod
+    async def delete_swap(db: AsyncSession, swap_id: str, user_id: str) -> bool:
+        return await db.run_sync(SwapService.delete_swap, swap_id, user_id)
+
+    @staticmethod
+    async def apply_batch(db: AsyncSession, items: List[Tuple[str, str]], user_id: str) -> List[dict]:
+        return await db.run_sync(SwapService.apply_batch, items, user_id)
+
+    @staticmethod
+    async def create_feedback(
+        db: AsyncSession,
+        swap_id: str,
+        feedback_data: FeedbackCreate,
+        from_user_id: str
+    ) -> Optional[Feedback]:
+        return await db.run_sync(SwapService.create_feedback, swap_id, feedback_data, from_user_id)
+
+    @staticmethod
+    async def get_swap_feedback(db: AsyncSession, swap_id: str) -> List[Feedback]:
+        return await db.run_sync(SwapService.get_swap_feedback, swap_id)
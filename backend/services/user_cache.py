@@ -0,0 +1,92 @@
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from config import get_settings
+from models.user import User
+from utils.broadcast import broadcast
+
+settings = get_settings()
+
+INVALIDATION_CHANNEL = "user_cache_invalidate"
+# Invalidation messages are newline-separated user ids, or CLEAR_ALL; batches
+# that would not fit in a Postgres NOTIFY payload (8000 bytes) become CLEAR_ALL
+CLEAR_ALL = "*"
+MAX_INVALIDATION_PAYLOAD = 7900
+
+class UserCache:
+    """Bounded, TTL-evicting read-through cache of user rows keyed by user id.
+
+    Rows are kept as plain column snapshots and handed out as fresh transient
+    ``User`` objects, so nothing cached is ever attached to a session.
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._generation = 0
+
+    def get(self, user_id: str) -> Optional[User]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            stored_at, values = entry
+            if time.monotonic() - stored_at >= self.ttl:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+        return User(**values)
+
+    def begin_read(self) -> int:
+        """Token for a database read; put() ignores it if anything was invalidated since"""
+        with self._lock:
+            return self._generation
+
+    def put(self, user: User, token: int) -> None:
+        values = {column.name: getattr(user, column.name) for column in User.__table__.columns}
+        with self._lock:
+            if token != self._generation:
+                return
+            self._entries[user.id] = (time.monotonic(), values)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+user_cache = UserCache(maxsize=settings.user_cache_size, ttl=settings.user_cache_ttl)
+
+def _on_invalidation(payload: str) -> None:
+    if payload == CLEAR_ALL:
+        user_cache.clear()
+        return
+    for user_id in payload.split("\n"):
+        user_cache.invalidate(user_id)
+
+broadcast.subscribe(INVALIDATION_CHANNEL, _on_invalidation)
+
+def invalidate_user(user_id: str) -> None:
+    """Drop a user from this worker's cache and every other worker's"""
+    broadcast.publish(INVALIDATION_CHANNEL, user_id)
+
+def invalidate_users(user_ids: Iterable[str]) -> None:
+    """Drop many users with a single broadcast (a full clear if the batch is too big)"""
+    payload = "\n".join(user_ids)
+    if not payload:
+        return
+    if len(payload.encode()) > MAX_INVALIDATION_PAYLOAD:
+        payload = CLEAR_ALL
+    broadcast.publish(INVALIDATION_CHANNEL, payload)
@@ -0,0 +1,216 @@
+
+from typing import Dict, Iterable, List, Set, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from db.database import dialect_insert
+from models.user import User
+from schemas.user import UserImportRow, UserImportError, UserImportResult
+from services.match_service import match_index
+from services.name_propagation import enqueue_name_changes, name_propagator
+from services.skill_dictionary import skill_dictionary, canonical_ids, replace_user_skills
+from services.skill_index import skill_index
+from services.skill_suggest import skill_suggest
+from services.user_cache import invalidate_users
+from services.versions import bump_versions, profile_key, SEARCH_KEY
+from utils.bulk_import import Record
+from utils.gazetteer import locate
+
+settings = get_settings()
+
+# Written on insert; on conflict only the ones a row sets are overwritten (is_active,
+# is_banned and created_at are always kept)
+PROFILE_COLUMNS = (
+    "name", "email", "location", "latitude", "longitude", "geohash", "profile_picture",
+    "skills_offered", "skills_wanted", "availability", "is_public",
+)
+
+def _error_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}" for detail in error.errors()
+    )
+
+def _given_columns(fields_set: Set[str]) -> Tuple[str, ...]:
+    """PROFILE_COLUMNS to overwrite for an existing user from the fields a row sets"""
+    columns = set(fields_set)
+    if columns & {"location", "latitude", "longitude"}:
+        # Coordinates and geohash are always re-derived together
+        columns |= {"latitude", "longitude", "geohash"}
+    return tuple(column for column in PROFILE_COLUMNS if column in columns)
+
+def _upsert(db: Session, columns: Tuple[str, ...]):
+    """INSERT ... ON CONFLICT (id) DO UPDATE of ``columns`` (and updated_at), returning the row"""
+    users = User.__table__
+    stmt = dialect_insert(db, users)
+    return stmt.on_conflict_do_update(
+        index_elements=[users.c.id],
+        set_={
+            **{column: stmt.excluded[column] for column in columns},
+            "updated_at": func.now(),
+        }
+    ).returning(
+        users.c.id, users.c.created_at, users.c.is_public, users.c.is_active,
+        users.c.is_banned, users.c.skills_offered, users.c.skills_wanted
+    )
+
+class _Import:
+    """Running totals of one import; each chunk commits on its own"""
+
+    def __init__(self, db: Session, max_errors: int):
+        self.db = db
+        self.max_errors = max_errors
+        self.result = UserImportResult()
+        self.written = False
+
+    def fail(self, line: int, user_id, error: str) -> None:
+        self.result.failed += 1
+        if len(self.result.errors) < self.max_errors:
+            self.result.errors.append(UserImportError(line=line, id=user_id, error=error))
+
+    def _claim(self, rows: List[Tuple[int, UserImportRow]]) -> List[Tuple[int, UserImportRow]]:
+        """Drop rows repeating an id or email earlier in the chunk, or taking another user's email"""
+        seen_ids, seen_emails, unique = set(), set(), []
+        for line, row in rows:
+            if row.id in seen_ids or row.email in seen_emails:
+                self.fail(line, row.id, "Duplicate id or email earlier in the upload")
+                continue
+            seen_ids.add(row.id)
+            seen_emails.add(row.email)
+            unique.append((line, row))
+        owners = dict(self.db.execute(
+            select(User.email, User.id).where(User.email.in_(seen_emails))
+        ).all())
+        claimed = []
+        for line, row in unique:
+            if owners.get(row.email, row.id) != row.id:
+                self.fail(line, row.id, "Email already belongs to another user")
+            else:
+                claimed.append((line, row))
+        return claimed
+
+    def write_chunk(self, rows: List[Tuple[int, UserImportRow]]) -> None:
+        """Upsert one chunk in a single transaction, retrying row by row if it conflicts.
+
+        New ids are inserted whole (omitted fields take the schema defaults);
+        existing users only get the fields their row sets, so rows are upserted
+        in groups that share a SET clause.
+        """
+        db = self.db
+        rows = self._claim(rows)
+        if not rows:
+            db.rollback()
+            return
+        ids = [row.id for _, row in rows]
+        existing = {
+            user_id: (name, location)
+            for user_id, name, location in db.execute(
+                select(User.id, User.name, User.location).where(User.id.in_(ids))
+            )
+        }
+
+        interned = skill_dictionary.intern(
+            db, [name for _, row in rows for name in (*row.skills_offered, *row.skills_wanted)]
+        )
+        groups: Dict[Tuple[str, ...], List[dict]] = {}
+        skill_ids = {}
+        for _, row in rows:
+            given = PROFILE_COLUMNS if row.id not in existing else _given_columns(row.model_fields_set)
+            offered = canonical_ids(interned, row.skills_offered)
+            wanted = canonical_ids(interned, row.skills_wanted)
+            skill_ids[row.id] = (
+                list(offered) if "skills_offered" in given else None,
+                list(wanted) if "skills_wanted" in given else None,
+            )
+            location = row.location
+            if row.id in existing and "location" not in row.model_fields_set:
+                location = existing[row.id][1]
+            latitude, longitude, geohash = locate(location, row.latitude, row.longitude)
+            groups.setdefault(given, []).append({
+                **row.model_dump(exclude={"skills_offered", "skills_wanted"}),
+                "latitude": latitude,
+                "longitude": longitude,
+                "geohash": geohash,
+                "skills_offered": list(offered.values()),
+                "skills_wanted": list(wanted.values()),
+                "is_active": True,
+                "is_banned": False,
+            })
+
+        renames = {
+            row.id: row.name for _, row in rows if row.id in existing and existing[row.id][0] != row.name
+        }
+        try:
+            written = []
+            for columns, values in groups.items():
+                # Executemany rather than .values(rows): the statement compiles once
+                # and is cached, and SQLAlchemy still sends it as batched multi-row VALUES
+                written += db.execute(_upsert(db, columns), values).all()
+            replace_user_skills(db, skill_ids)
+            if renames:
+                enqueue_name_changes(db, renames)
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            if len(rows) == 1:
+                line, row = rows[0]
+                self.fail(line, row.id, f"Conflicts with an existing row: {e.orig}")
+                return
+            # Another writer got in between the checks and the upsert: isolate the bad rows
+            for line_and_row in rows:
+                self.write_chunk([line_and_row])
+            return
+
+        self.result.created += len(rows) - len(existing)
+        self.result.updated += len(existing)
+        self.written = True
+        invalidate_users(existing)
+        for user in written:
+            skill_suggest.refresh_user(user)
+        if existing:
+            bump_versions(*(profile_key(user_id) for user_id in existing))
+        if renames:
+            name_propagator.wake()
+
+    def finish(self) -> UserImportResult:
+        if self.written:
+            # Cheaper to rebuild on next use than to patch thousands of users in
+            skill_index.clear()
+            match_index.invalidate()
+            bump_versions(SEARCH_KEY)
+        return self.result
+
+def import_users(
+    db: Session,
+    records: Iterable[Record],
+    chunk_size: int = settings.bulk_import_chunk_size,
+    max_errors: int = settings.bulk_import_max_errors
+) -> UserImportResult:
+    """Validate parsed records against UserImportRow and upsert them by id in chunks.
+
+    Each chunk is one multi-row INSERT ... ON CONFLICT DO UPDATE per set of
+    given fields plus one rewrite of the chunk's user_skills, committed
+    together. Existing users keep whatever their row leaves out. Rows that fail
+    validation or conflict are reported per line; the rest still load.
+    """
+    job = _Import(db, max_errors)
+    chunk: List[Tuple[int, UserImportRow]] = []
+    for line, fields, error in records:
+        job.result.received += 1
+        if error is None:
+            try:
+                chunk.append((line, UserImportRow.model_validate(fields)))
+            except ValidationError as e:
+                error = _error_message(e)
+        if error is not None:
+            user_id = fields.get("id") if isinstance(fields, dict) else None
+            job.fail(line, str(user_id) if user_id is not None else None, error)
+        if len(chunk) >= chunk_size:
+            job.write_chunk(chunk)
+            chunk = []
+    if chunk:
+        job.write_chunk(chunk)
+    return job.finish()
@@ -1,10 +1,153 @@
 
-from sqlalchemy.orm import Session
+import math
+from sqlalchemy import ColumnElement, Row, case, tuple_, func, or_, and_, select
+from sqlalchemy.orm import Session, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.user import User
+from models.rating import UserRatingSummary
+from models.skill import UserSkill
 from schemas.user import UserCreate, UserUpdate
-from typing import List, Optional
+from services.skill_index import skill_index, page_keys
+from services.skill_suggest import skill_suggest
+from services.skill_dictionary import skill_dictionary, skill_key, write_user_skills
+from services.match_service import match_index
+from services.user_cache import invalidate_user
+from services.name_propagation import enqueue_name_change, name_propagator
+from services.versions import bump_versions, profile_key, SEARCH_KEY
+from utils.pagination import (
+    encode_cursor, decode_cursor, encode_rating_cursor, decode_rating_cursor,
+    encode_distance_cursor, decode_distance_cursor
+)
+from utils.geo import KM_PER_DEGREE, geohash_cover, haversine_km
+from utils.gazetteer import locate
+from datetime import datetime
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
 import uuid
 
+def _after_user_write(user: User) -> None:
+    """Propagate a committed user write to the caches and search indexes"""
+    invalidate_user(user.id)
+    skill_index.refresh_user(user)
+    match_index.refresh_user(user)
+    skill_suggest.refresh_user(user)
+    bump_versions(profile_key(user.id), SEARCH_KEY)
+
+def _listed_users(db: Session) -> Query:
+    """Users that may appear in public search results"""
+    return db.query(User).filter(
+        User.is_public == True,
+        User.is_active == True,
+        User.is_banned == False
+    )
+
+# Columns of a public listing row: UserPublicResponse plus the keyset sort key and coordinates
+PUBLIC_ROW_COLUMNS = (
+    User.id, User.name, User.location, User.profile_picture, User.skills_offered,
+    User.skills_wanted, User.availability, User.created_at, User.latitude, User.longitude,
+    func.coalesce(UserRatingSummary.rating_count, 0).label("rating_count"),
+    UserRatingSummary.rating_average,
+)
+
+def listed_user_rows(db: Session) -> Query:
+    """Listed users as plain column rows (no ORM identity map or relationship loading)"""
+    return db.query(*PUBLIC_ROW_COLUMNS).outerjoin(
+        UserRatingSummary, UserRatingSummary.user_id == User.id
+    ).filter(
+        User.is_public == True,
+        User.is_active == True,
+        User.is_banned == False
+    )
+
+def _within(query: Query, latitude: float, longitude: float, radius_km: float) -> Tuple[Query, ColumnElement]:
+    """Restrict to users within ``radius_km``, adding their squared distance as ``distance_sq``.
+
+    Returns the query and the distance expression, for ordering and cursors.
+
+    The geohash prefixes covering the circle prune by index first; the exact
+    cut uses an equirectangular distance (plain arithmetic, so it runs on any
+    backend), which within the allowed radii ranks like great-circle distance.
+    """
+    cells = geohash_cover(latitude, longitude, radius_km)
+    dy = (User.latitude - latitude) * KM_PER_DEGREE
+    # Longitude difference wrapped into [-180, 180] so the circle crosses the antimeridian
+    dlon = User.longitude - longitude
+    dlon = case((dlon > 180, dlon - 360), (dlon < -180, dlon + 360), else_=dlon)
+    dx = dlon * (KM_PER_DEGREE * math.cos(math.radians(latitude)))
+    distance_sq = dy * dy + dx * dx
+    return query.add_columns(distance_sq.label("distance_sq")).filter(
+        or_(*(User.geohash.like(cell + "%") for cell in cells)),
+        distance_sq <= radius_km * radius_km
+    ), distance_sq
+
+def _with_distance(row: Row, latitude: float, longitude: float) -> dict:
+    return {**row._mapping, "distance_km": round(haversine_km(latitude, longitude, row.latitude, row.longitude), 3)}
+
+def users_within(db: Session, latitude: float, longitude: float, radius_km: float) -> Dict[str, float]:
+    """Listed user id -> distance in km for everyone within ``radius_km``"""
+    query, _ = _within(
+        _listed_users(db).with_entities(User.id, User.latitude, User.longitude),
+        latitude, longitude, radius_km
+    )
+    rows = query.all()
+    return {row.id: haversine_km(latitude, longitude, row.latitude, row.longitude) for row in rows}
+
+def place_user(user: User, coordinates_given: bool) -> None:
+    """Resolve coordinates from the gazetteer unless the client sent them, then derive the geohash"""
+    given = (user.latitude, user.longitude) if coordinates_given else (None, None)
+    user.latitude, user.longitude, user.geohash = locate(user.location, *given)
+
+def _has_skill(skill_id: int):
+    """Users offering or wanting a skill, as an integer semi-join on user_skills"""
+    return User.id.in_(select(UserSkill.user_id).where(UserSkill.skill_id == skill_id))
+
+def _write_skills(db: Session, user: User, offered: Optional[List[str]], wanted: Optional[List[str]]) -> None:
+    """Intern the given skill lists into user_skills and store their canonical form on the row"""
+    offered, wanted = write_user_skills(db, user.id, offered, wanted)
+    if offered is not None:
+        user.skills_offered = offered
+    if wanted is not None:
+        user.skills_wanted = wanted
+
+def _keyset_page(query: Query, limit: int, cursor: Optional[str]) -> Tuple[List[Row], Optional[str]]:
+    """Fetch one page ordered by (created_at, id) starting after the cursor"""
+    if cursor:
+        created_at, user_id = decode_cursor(cursor)
+        query = query.filter(tuple_(User.created_at, User.id) > tuple_(created_at, user_id))
+
+    rows = query.order_by(User.created_at, User.id).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        return rows, encode_cursor(last.created_at, last.id)
+    return rows, None
+
+def _rating_page(query: Query, limit: int, cursor: Optional[str]) -> Tuple[List[Row], Optional[str]]:
+    """Fetch one page ordered by rating average (best first, unrated last), then id"""
+    average = func.coalesce(UserRatingSummary.rating_average, 0.0)
+    if cursor:
+        last_average, user_id = decode_rating_cursor(cursor)
+        query = query.filter(or_(
+            average < last_average,
+            and_(average == last_average, User.id > user_id)
+        ))
+
+    rows = query.order_by(average.desc(), User.id).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        return rows, encode_rating_cursor(last.rating_average or 0.0, last.id)
+    return rows, None
+
+def _cached_page(db: Session, page: Tuple[List[Tuple], bool]) -> Tuple[List[Row], Optional[str]]:
+    """Serve one page of hot-skill index keys (see ``page_keys``) with a primary-key fetch"""
+    keys, more = page
+    next_cursor = encode_cursor(*keys[-1]) if more else None
+    ids = [user_id for _, user_id in keys]
+    if not ids:
+        return [], next_cursor
+    by_id = {row.id: row for row in listed_user_rows(db).filter(User.id.in_(ids)).all()}
+    return [by_id[user_id] for user_id in ids if user_id in by_id], next_cursor
+
 class UserService:
     @staticmethod
     def create_user(db: Session, user_data: UserCreate, clerk_id: str) -> User:
@@ -13,9 +156,13 @@ class UserService:
             id=clerk_id,
             **user_data.dict()
         )
+        place_user(db_user, user_data.latitude is not None and user_data.longitude is not None)
         db.add(db_user)
+        db.flush()
+        _write_skills(db, db_user, user_data.skills_offered, user_data.skills_wanted)
         db.commit()
         db.refresh(db_user)
+        _after_user_write(db_user)
         return db_user
 
     @staticmethod
@@ -33,43 +180,140 @@ class UserService:
         update_data = user_data.dict(exclude_unset=True)
         print(f"Updating user {user_id} with data: {update_data}")
         
+        renamed = "name" in update_data and update_data["name"] != user.name
         for field, value in update_data.items():
             print(f"Setting {field} = {value}")
             setattr(user, field, value)
+        if renamed:
+            # Swap rows carry a copy of the name; the worker rewrites them later
+            enqueue_name_change(db, user_id, user.name)
+        if update_data.keys() & {"location", "latitude", "longitude"}:
+            place_user(
+                user,
+                update_data.get("latitude") is not None and update_data.get("longitude") is not None
+            )
+        if "skills_offered" in update_data or "skills_wanted" in update_data:
+            _write_skills(
+                db,
+                user,
+                update_data["skills_offered"] or [] if "skills_offered" in update_data else None,
+                update_data["skills_wanted"] or [] if "skills_wanted" in update_data else None
+            )
         
         db.commit()
         db.refresh(user)
+        _after_user_write(user)
+        if renamed:
+            name_propagator.wake()
         print(f"After update - skills_offered: {user.skills_offered}, skills_wanted: {user.skills_wanted}")
         return user
 
     @staticmethod
-    def search_users_by_skill(db: Session, skill: str) -> List[User]:
-        """Search public users by offered or wanted skills"""
-        return db.query(User).filter(
-            User.is_public == True,
-            User.is_active == True,
-            User.is_banned == False,
-            (User.skills_offered.contains([skill]) | User.skills_wanted.contains([skill]))
-        ).all()
+    def search_users_by_skill(
+        db: Session,
+        skill: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        sort: str = "recent"
+    ) -> Tuple[List[Row], Optional[str]]:
+        """Search public users by offered or wanted skills, one page of PUBLIC_ROW_COLUMNS rows at a time"""
+        skill_id = skill_dictionary.lookup(db, skill)
+        if skill_id is None:
+            # Nobody has ever listed this skill
+            return [], None
+        if sort == "rating":
+            return _rating_page(listed_user_rows(db).filter(_has_skill(skill_id)), limit, cursor)
+        key = skill_key(skill)
+        after = decode_cursor(cursor) if cursor else None
+        page = skill_index.lookup(key, after, limit)
+        if page is None:
+            token = skill_index.begin_load(key)
+            if token is None:
+                return _keyset_page(listed_user_rows(db).filter(_has_skill(skill_id)), limit, cursor)
+            keys = [
+                (created_at, user_id)
+                for created_at, user_id in _listed_users(db)
+                .with_entities(User.created_at, User.id)
+                .filter(_has_skill(skill_id))
+                .limit(skill_index.max_keys + 1)
+                .all()
+            ]
+            skill_index.store(key, keys, token)
+            if len(keys) > skill_index.max_keys:
+                return _keyset_page(listed_user_rows(db).filter(_has_skill(skill_id)), limit, cursor)
+            page = page_keys(sorted(keys), after, limit)
+        return _cached_page(db, page)
 
     @staticmethod
-    def get_all_public_users(db: Session, exclude_user_id: Optional[str] = None) -> List[User]:
-        """Get all public, active, non-banned users"""
-        query = db.query(User).filter(
-            User.is_public == True,
-            User.is_active == True,
-            User.is_banned == False
-        )
+    def get_all_public_users(
+        db: Session,
+        limit: int,
+        cursor: Optional[str] = None,
+        exclude_user_id: Optional[str] = None,
+        sort: str = "recent"
+    ) -> Tuple[List[Row], Optional[str]]:
+        """Get one page of public, active, non-banned users as PUBLIC_ROW_COLUMNS rows"""
+        query = listed_user_rows(db)
         
         if exclude_user_id:
             query = query.filter(User.id != exclude_user_id)
             
-        return query.all()
+        if sort == "rating":
+            return _rating_page(query, limit, cursor)
+        return _keyset_page(query, limit, cursor)
+
+    @staticmethod
+    def search_users_near(
+        db: Session,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        limit: int,
+        cursor: Optional[str] = None,
+        skill: Optional[str] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        """One page of listed users within ``radius_km`` of a point (optionally with a skill), nearest first"""
+        query = listed_user_rows(db)
+        if skill:
+            skill_id = skill_dictionary.lookup(db, skill)
+            if skill_id is None:
+                return [], None
+            query = query.filter(_has_skill(skill_id))
+        query, distance_sq = _within(query, latitude, longitude, radius_km)
+        if cursor:
+            last_distance, user_id = decode_distance_cursor(cursor)
+            query = query.filter(or_(
+                distance_sq > last_distance,
+                and_(distance_sq == last_distance, User.id > user_id)
+            ))
+
+        rows = query.order_by(distance_sq, User.id).limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_distance_cursor(rows[-1].distance_sq, rows[-1].id)
+        return [_with_distance(row, latitude, longitude) for row in rows], next_cursor
 
     @staticmethod
-    def get_all_users(db: Session) -> List[User]:
-        """Get all users (admin only)"""
-        return db.query(User).all()
+    def get_all_users(db: Session) -> List[Row]:
+        """Get all users (admin only) as column rows"""
+        return db.query(*User.__table__.columns).all()
+
+    @staticmethod
+    def stream_users(
+        db: Session,
+        banned_only: bool = False,
+        created_since: Optional[datetime] = None,
+        batch_size: int = 1000
+    ) -> Iterator[Mapping]:
+        """Stream user rows (admin export) over a server-side cursor"""
+        query = db.query(*User.__table__.columns)
+        if banned_only:
+            query = query.filter(User.is_banned == True)
+        if created_since is not None:
+            query = query.filter(User.created_at >= created_since)
+        for row in query.order_by(User.created_at, User.id).yield_per(batch_size):
+            yield row._mapping
 
     @staticmethod
     def ban_user(db: Session, user_id: str) -> Optional[User]:
@@ -79,6 +323,7 @@ class UserService:
             user.is_banned = True
             db.commit()
             db.refresh(user)
+            _after_user_write(user)
         return user
 
     @staticmethod
@@ -107,10 +352,16 @@ class UserService:
         
         if existing_user:
             # Update existing user with latest Clerk data
+            renamed = existing_user.name != name
             existing_user.name = name
             existing_user.email = email
+            if renamed:
+                enqueue_name_change(db, existing_user.id, name)
             db.commit()
             db.refresh(existing_user)
+            _after_user_write(existing_user)
+            if renamed:
+                name_propagator.wake()
             return existing_user
         else:
             # Create new user
@@ -124,3 +375,71 @@ class UserService:
                 is_public=True
             )
             return UserService.create_user(db, user_data, clerk_id)
+
+class AsyncUserService:
+    """UserService for AsyncSession callers.
+
+    Each method runs the sync implementation through ``AsyncSession.run_sync``,
+    which drives the ORM over the asyncio driver (database I/O yields to the
+    event loop) while keeping a single copy of the query and cache logic.
+    """
+
+    @staticmethod
+    async def create_user(db: AsyncSession, user_data: UserCreate, clerk_id: str) -> User:
+        return await db.run_sync(UserService.create_user, user_data, clerk_id)
+
+    @staticmethod
+    async def get_user_by_id(db: AsyncSession, user_id: str) -> Optional[User]:
+        return await db.get(User, user_id)
+
+    @staticmethod
+    async def update_user(db: AsyncSession, user_id: str, user_data: UserUpdate) -> Optional[User]:
+        return await db.run_sync(UserService.update_user, user_id, user_data)
+
+    @staticmethod
+    async def search_users_by_skill(
+        db: AsyncSession,
+        skill: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        sort: str = "recent"
+    ) -> Tuple[List[Row], Optional[str]]:
+        return await db.run_sync(UserService.search_users_by_skill, skill, limit, cursor, sort)
+
+    @staticmethod
+    async def get_all_public_users(
+        db: AsyncSession,
+        limit: int,
+        cursor: Optional[str] = None,
+        exclude_user_id: Optional[str] = None,
+        sort: str = "recent"
+    ) -> Tuple[List[Row], Optional[str]]:
+        return await db.run_sync(
+            UserService.get_all_public_users, limit, cursor, exclude_user_id, sort
+        )
+
+    @staticmethod
+    async def search_users_near(
+        db: AsyncSession,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        limit: int,
+        cursor: Optional[str] = None,
+        skill: Optional[str] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        return await db.run_sync(
+            UserService.search_users_near, latitude, longitude, radius_km, limit, cursor, skill
+        )
+
+    @staticmethod
+    async def get_all_users(db: AsyncSession) -> List[Row]:
+        return await db.run_sync(UserService.get_all_users)
+
+    @staticmethod
+    async def ban_user(db: AsyncSession, user_id: str) -> Optional[User]:
+        return await db.run_sync(UserService.ban_user, user_id)
+
+    @staticmethod
+    async def sync_user_from_clerk(db: AsyncSession, clerk_user_data: dict, clerk_id: str) -> User:
+        return await db.run_sync(UserService.sync_user_from_clerk, clerk_user_data, clerk_id)
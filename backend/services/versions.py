@@ -0,0 +1,53 @@
+
+import hashlib
+import threading
+import uuid
+from typing import Dict
+
+from utils.broadcast import broadcast
+
+VERSION_CHANNEL = "resource_version_bump"
+
+SEARCH_KEY = "search"
+
+def profile_key(user_id: str) -> str:
+    return f"profile:{user_id}"
+
+def swaps_key(user_id: str) -> str:
+    return f"swaps:{user_id}"
+
+class VersionCounters:
+    """Per-worker change counters behind the ETags of polled read endpoints.
+
+    Write paths bump the counters of whatever they changed; a read builds its
+    ETag from the current counter, so an unchanged resource keeps its ETag and
+    can be answered with 304 before any query runs. ``epoch`` is random per
+    process, which keeps ETags from a previous run (or another worker, whose
+    counters drift independently) from ever matching.
+    """
+
+    def __init__(self):
+        self.epoch = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {}
+
+    def get(self, key: str) -> int:
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def bump(self, key: str) -> None:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+
+    def etag(self, key: str, *variant) -> str:
+        """Strong ETag for the representation of ``key`` selected by ``variant`` (query params)"""
+        raw = "|".join([self.epoch, key, str(self.get(key)), *map(str, variant)])
+        return '"' + hashlib.sha256(raw.encode()).hexdigest()[:32] + '"'
+
+versions = VersionCounters()
+broadcast.subscribe(VERSION_CHANNEL, versions.bump)
+
+def bump_versions(*keys: str) -> None:
+    """Mark resources changed in this worker and every other worker (call after commit)"""
+    for key in dict.fromkeys(keys):
+        broadcast.publish(VERSION_CHANNEL, key)
@@ -0,0 +1,202 @@
+
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from fastapi.responses import ORJSONResponse
+from starlette.routing import Match
+
+from utils.auth_utils import bearer_subject
+
+def parse_route_limits(spec: str) -> Dict[str, int]:
+    """Parse ``"GET /api/path=4,POST /api/other=2"`` into route -> concurrency limit"""
+    limits = {}
+    for item in spec.split(","):
+        if item.strip():
+            route, _, limit = item.rpartition("=")
+            limits[" ".join(route.split())] = int(limit)
+    return limits
+
+class TokenBuckets:
+    """Per-key token buckets refilled at ``rate`` tokens/second up to ``burst``.
+
+    Only the ``max_keys`` most recently seen keys are kept; a forgotten key
+    comes back with a full bucket, which errs on the side of admitting.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 100000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.limited = 0
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    def take(self, key: str) -> float:
+        """Spend one token; returns 0 when admitted, else seconds until a token is free"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.pop(key, None)
+            tokens = self.burst if bucket is None else min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+                self.limited += 1
+            self._buckets[key] = [tokens, now]
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+class RouteGate:
+    """At most ``limit`` requests of one route in flight; up to ``queue_size`` more
+    wait at most ``timeout`` seconds for a slot before being shed."""
+
+    def __init__(self, limit: int, queue_size: int, timeout: float):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = 0
+        self.queued = 0
+        self.shed_queue_full = 0
+        self.shed_deadline = 0
+        self._slots = asyncio.Semaphore(limit)
+
+    async def enter(self) -> bool:
+        if not self._slots.locked():
+            # A free slot is taken without suspending
+            await self._slots.acquire()
+        elif self.queued >= self.queue_size:
+            self.shed_queue_full += 1
+            return False
+        else:
+            self.queued += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.timeout)
+            except asyncio.TimeoutError:
+                self.shed_deadline += 1
+                return False
+            finally:
+                self.queued -= 1
+        self.active += 1
+        return True
+
+    def leave(self) -> None:
+        self.active -= 1
+        self._slots.release()
+
+    def snapshot(self) -> dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queued": self.queued,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_deadline": self.shed_deadline,
+        }
+
+class AdmissionController:
+    """Per-route concurrency gates and per-user rate limits, shared by the middleware and /health.
+
+    Gates are created on first use for each route template (``"GET /api/users/{user_id}"``),
+    with the default limit unless ``route_limits`` overrides it.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        queue_size: int,
+        queue_timeout: float,
+        route_limits: Dict[str, int],
+        exempt_paths: List[str],
+        buckets: Optional[TokenBuckets]
+    ):
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.route_limits = route_limits
+        self.exempt_paths = set(exempt_paths)
+        self.buckets = buckets
+        self._gates: Dict[str, RouteGate] = {}
+
+    def route_for(self, scope) -> Optional[str]:
+        """The template of the route that will serve this request, or None if exempt/unrouted"""
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                # As the router would; lets metrics label requests shed before routing
+                scope["route"] = route
+                if route.path in self.exempt_paths:
+                    return None
+                return f"{scope['method']} {route.path}"
+        return None
+
+    def gate(self, route: str) -> RouteGate:
+        gate = self._gates.get(route)
+        if gate is None:
+            limit = self.route_limits.get(route, self.concurrency)
+            gate = self._gates[route] = RouteGate(limit, self.queue_size, self.queue_timeout)
+        return gate
+
+    def stats(self) -> dict:
+        return {
+            "routes": {route: gate.snapshot() for route, gate in sorted(self._gates.items())},
+            "queued": sum(gate.queued for gate in self._gates.values()),
+            "shed": sum(gate.shed_queue_full + gate.shed_deadline for gate in self._gates.values()),
+            "rate_limited": self.buckets.limited if self.buckets else 0,
+        }
+
+def _busy(status_code: int, detail: str, retry_after: float) -> ORJSONResponse:
+    return ORJSONResponse(
+        {"detail": detail},
+        status_code=status_code,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+class AdmissionControlMiddleware:
+    """Sheds load before it reaches the threadpool and the DB pool.
+
+    A user over their rate gets 429 straight away; a request whose route is at
+    its concurrency limit waits in a bounded queue and gets 503 when the queue
+    is full or its deadline passes. Both carry ``Retry-After``. The user is the
+    ``sub`` of a valid bearer token; requests without one are limited
+    per client address instead.
+    """
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route = self.controller.route_for(scope)
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+
+        buckets = self.controller.buckets
+        if buckets is not None:
+            subject = await bearer_subject(scope)
+            if not subject:
+                # Missing, invalid or forged tokens share a bucket per client
+                # address, so failed verifications cannot be sent unthrottled
+                client = scope.get("client")
+                subject = f"ip:{client[0] if client else 'unknown'}"
+            wait = buckets.take(subject)
+            if wait:
+                await _busy(429, "Rate limit exceeded", wait)(scope, receive, send)
+                return
+
+        gate = self.controller.gate(route)
+        if not await gate.enter():
+            await _busy(503, "Server busy, retry shortly", gate.timeout)(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.leave()
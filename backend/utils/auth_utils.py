@@ -3,46 +3,109 @@ from jose import jwt, JWTError
 from fastapi import HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
-import requests
+import hashlib
+from starlette.concurrency import run_in_threadpool
 from config import get_settings
-from db.database import get_db
+from db.database import get_db, get_async_db
 from models.user import User
 from services.user_service import UserService
+from services.user_cache import user_cache
+from utils.jwks import JWKSProvider, JWKSUnavailableError, VerifiedClaimsCache
 
 settings = get_settings()
 security = HTTPBearer()
 
+jwks_provider = JWKSProvider(
+    jwks_url=settings.clerk_jwks_url,
+    jwks_file=settings.clerk_jwks_file,
+    secret_key=settings.clerk_secret_key,
+    ttl=settings.jwks_cache_ttl,
+    timeout=settings.jwks_fetch_timeout
+)
+claims_cache = VerifiedClaimsCache(maxsize=settings.verified_claims_cache_size)
+
 def get_clerk_public_key():
-    """Fetch Clerk's public key for JWT verification"""
+    """Fetch Clerk's public key set for JWT verification (cached)"""
     try:
-        response = requests.get(f"https://api.clerk.dev/v1/jwks")
-        return response.json()
-    except Exception:
+        return jwks_provider.get_jwks()
+    except JWKSUnavailableError:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Unable to fetch Clerk public key"
         )
 
+def _decode_clerk_token(token: str) -> dict:
+    if not settings.clerk_verify_signature:
+        # Development only: trust the token without checking its signature
+        return jwt.get_unverified_claims(token)
+
+    kid = jwt.get_unverified_header(token).get("kid")
+    try:
+        key = jwks_provider.get_key(kid)
+    except JWKSUnavailableError:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Unable to fetch Clerk public key"
+        )
+    if key is None:
+        raise JWTError("Unknown signing key")
+    return jwt.decode(
+        token,
+        key,
+        algorithms=["RS256"],
+        options={"verify_aud": False, "leeway": settings.jwt_leeway_seconds}
+    )
+
 def verify_clerk_token(token: str) -> dict:
     """Verify Clerk JWT token and return user data"""
+    token_hash = hashlib.sha256(token.encode()).hexdigest()
+    cached = claims_cache.get(token_hash)
+    if cached is not None:
+        return cached
+
     try:
-        # For development, we'll decode without verification
-        # In production, you should verify with Clerk's public key
-        decoded = jwt.decode(token, key="", options={"verify_signature": False})
-        return decoded
+        decoded = _decode_clerk_token(token)
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication token"
         )
 
-def get_current_user_id(
+    claims_cache.put(token_hash, decoded)
+    return decoded
+
+async def bearer_subject(scope) -> Optional[str]:
+    """``sub`` of the request's bearer token if it verifies, else None (for middleware)"""
+    header = dict(scope["headers"]).get(b"authorization", b"")
+    scheme, _, token = header.decode("latin-1").partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        return None
+    token = token.strip()
+    claims = claims_cache.get(hashlib.sha256(token.encode()).hexdigest())
+    if claims is None:
+        # A miss may fetch the JWKS; the result is cached for the route's own check
+        try:
+            claims = await run_in_threadpool(verify_clerk_token, token)
+        except HTTPException:
+            return None
+    return claims.get("sub")
+
+def get_current_user_data(
     credentials: HTTPAuthorizationCredentials = Depends(security)
-) -> str:
-    """Extract current user ID from Clerk JWT token"""
+) -> dict:
+    """Extract current user data from Clerk JWT token"""
     token = credentials.credentials
     user_data = verify_clerk_token(token)
+    return user_data
+
+def get_current_user_id(
+    user_data: dict = Depends(get_current_user_data)
+) -> str:
+    """Extract current user ID from Clerk JWT token"""
+    # Depending on get_current_user_data lets FastAPI reuse one verification
+    # per request when a route needs both the id and the claims
     user_id = user_data.get("sub")
     
     if not user_id:
@@ -53,20 +116,14 @@ def get_current_user_id(
     
     return user_id
 
-def get_current_user_data(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
-) -> dict:
-    """Extract current user data from Clerk JWT token"""
-    token = credentials.credentials
-    user_data = verify_clerk_token(token)
-    return user_data
-
-def get_current_user(
-    user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current user from database, create if doesn't exist"""
-    user = db.query(User).filter(User.id == user_id).first()
+def load_current_user(db: Session, user_id: str) -> User:
+    """Load the authenticated user, creating a placeholder profile on first sight"""
+    user = user_cache.get(user_id)
+    if user is None:
+        token = user_cache.begin_read()
+        user = db.query(User).filter(User.id == user_id).first()
+        if user:
+            user_cache.put(user, token)
     
     if not user:
         # Create user if they don't exist
@@ -87,3 +144,17 @@ def get_current_user(
         )
     
     return user
+
+def get_current_user(
+    user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+) -> User:
+    """Get current user from database, create if doesn't exist"""
+    return load_current_user(db, user_id)
+
+async def get_current_user_async(
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """Async variant of get_current_user for routers on the AsyncSession path"""
+    return await db.run_sync(load_current_user, user_id)
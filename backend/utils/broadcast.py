@@ -0,0 +1,167 @@
+
+import queue
+import select
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+from config import get_settings
+
+settings = get_settings()
+
+class LocalBroadcast:
+    """In-process publish/subscribe on named channels with string payloads.
+
+    This is the single-worker backend and the local stand-in for
+    PostgresBroadcast: published payloads reach this process's subscribers only.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, List[Callable[[str], None]]] = defaultdict(list)
+
+    def subscribe(self, channel: str, callback: Callable[[str], None]) -> None:
+        with self._lock:
+            self._subscribers[channel].append(callback)
+
+    def unsubscribe(self, channel: str, callback: Callable[[str], None]) -> None:
+        with self._lock:
+            if callback in self._subscribers.get(channel, []):
+                self._subscribers[channel].remove(callback)
+
+    def _deliver(self, channel: str, payload: str) -> None:
+        with self._lock:
+            callbacks = list(self._subscribers.get(channel, []))
+        for callback in callbacks:
+            try:
+                callback(payload)
+            except Exception as e:
+                print(f"Broadcast subscriber on {channel} failed: {e}")
+
+    def publish(self, channel: str, payload: str) -> None:
+        self._deliver(channel, payload)
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": "local"}
+
+class PostgresBroadcast(LocalBroadcast):
+    """Cross-worker broadcast over Postgres LISTEN/NOTIFY.
+
+    Publishing delivers locally right away and queues a NOTIFY for a sender
+    thread, so callers (including the event loop) never wait on the database.
+    The sender retries a failed NOTIFY until it goes through; only when the
+    queue is full are messages dropped. Failures and drops are counted in
+    ``stats()`` (see /health/broadcast and /metrics). A listener thread
+    delivers notifications from every worker (including this one, so
+    subscribers must tolerate seeing a payload twice).
+    """
+
+    def __init__(self, dsn: str, poll_interval: float = 5.0, queue_size: int = 10000):
+        super().__init__()
+        self.dsn = dsn
+        self.poll_interval = poll_interval
+        self._outbox: "queue.Queue" = queue.Queue(queue_size)
+        self._stopping = threading.Event()
+        self._thread = None
+        self._sender = None
+        self._counts_lock = threading.Lock()
+        self._counts = {"published": 0, "failures": 0, "dropped": 0}
+
+    def _count(self, key: str) -> None:
+        with self._counts_lock:
+            self._counts[key] += 1
+
+    def _connect(self):
+        import psycopg2
+        conn = psycopg2.connect(self.dsn)
+        conn.autocommit = True
+        return conn
+
+    def publish(self, channel: str, payload: str) -> None:
+        self._deliver(channel, payload)
+        try:
+            self._outbox.put_nowait((channel, payload))
+        except queue.Full:
+            self._count("dropped")
+            print(f"Broadcast queue full, dropped NOTIFY on {channel}")
+
+    def _send(self) -> None:
+        conn = None
+        failing = False
+        while not self._stopping.is_set():
+            try:
+                channel, payload = self._outbox.get(timeout=self.poll_interval)
+            except queue.Empty:
+                continue
+            while not self._stopping.is_set():
+                try:
+                    if conn is None or conn.closed:
+                        conn = self._connect()
+                    with conn.cursor() as cursor:
+                        cursor.execute("SELECT pg_notify(%s, %s)", (channel, payload))
+                    self._count("published")
+                    failing = False
+                    break
+                except Exception as e:
+                    self._count("failures")
+                    if not failing:
+                        # Logged once per outage; the failure count keeps growing
+                        print(f"Broadcast NOTIFY on {channel} failed, retrying: {e}")
+                        failing = True
+                    conn = None
+                    self._stopping.wait(min(self.poll_interval, 1.0))
+        if conn is not None:
+            conn.close()
+
+    def _listen(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                conn = self._connect()
+                with conn.cursor() as cursor:
+                    with self._lock:
+                        channels = list(self._subscribers)
+                    for channel in channels:
+                        cursor.execute(f'LISTEN "{channel}"')
+                while not self._stopping.is_set():
+                    if select.select([conn], [], [], self.poll_interval) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        self._deliver(notify.channel, notify.payload)
+                conn.close()
+            except Exception as e:
+                print(f"Broadcast listener error, reconnecting: {e}")
+                self._stopping.wait(self.poll_interval)
+
+    def start(self) -> None:
+        """Start listening on every channel subscribed so far, and sending queued NOTIFYs"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._listen, daemon=True)
+            self._thread.start()
+        if self._sender is None:
+            self._sender = threading.Thread(target=self._send, daemon=True)
+            self._sender.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    def stats(self) -> dict:
+        with self._counts_lock:
+            return {"backend": "postgres", "queued": self._outbox.qsize(), **self._counts}
+
+def create_broadcast(backend: str, database_url: str) -> LocalBroadcast:
+    if backend == "postgres":
+        return PostgresBroadcast(
+            database_url.replace("postgresql+psycopg2://", "postgresql://"),
+            queue_size=settings.broadcast_queue_size
+        )
+    return LocalBroadcast()
+
+broadcast = create_broadcast(settings.broadcast_backend, settings.database_url)
@@ -0,0 +1,45 @@
+
+import csv
+import json
+from typing import Iterable, Iterator, Optional, Tuple
+
+# (line number, fields, parse error): exactly one of fields/error is set
+Record = Tuple[int, Optional[dict], Optional[str]]
+
+LIST_COLUMNS = ("skills_offered", "skills_wanted")
+
+def ndjson_records(lines: Iterable[str]) -> Iterator[Record]:
+    """One JSON object per line; blank lines are skipped"""
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            fields = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(fields, dict):
+            yield line_number, None, "Expected a JSON object"
+            continue
+        yield line_number, fields, None
+
+def csv_records(lines: Iterable[str]) -> Iterator[Record]:
+    """CSV with a header row, in the admin export's layout: lists are ';'-joined and
+    empty cells are left unset so the schema defaults apply"""
+    reader = csv.DictReader(lines)
+    for row in reader:
+        if None in row:
+            yield reader.line_num, None, "More cells than header columns"
+            continue
+        fields = {}
+        for column, value in row.items():
+            if value is None or value == "":
+                continue
+            if column in LIST_COLUMNS:
+                fields[column] = [part for part in value.split(";") if part.strip()]
+            else:
+                fields[column] = value
+        yield reader.line_num, fields, None
+
+def records(lines: Iterable[str], import_format: str) -> Iterator[Record]:
+    return csv_records(lines) if import_format == "csv" else ndjson_records(lines)
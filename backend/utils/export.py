@@ -0,0 +1,39 @@
+
+import csv
+import enum
+import io
+import json
+from datetime import datetime
+from typing import Iterable, Iterator, List, Mapping
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+def ndjson_lines(rows: Iterable[Mapping]) -> Iterator[str]:
+    """Encode rows as newline-delimited JSON, one line at a time"""
+    for row in rows:
+        yield json.dumps({key: _plain(value) for key, value in row.items()}) + "\n"
+
+def csv_lines(rows: Iterable[Mapping], columns: List[str]) -> Iterator[str]:
+    """Encode rows as CSV with a header, one line at a time (lists become ';'-joined)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> str:
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    writer.writerow(columns)
+    yield flush()
+    for row in rows:
+        writer.writerow([
+            ";".join(value) if isinstance(value, list) else _plain(value)
+            for value in (row[column] for column in columns)
+        ])
+        yield flush()
@@ -0,0 +1,56 @@
+
+import csv
+import os
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from utils.geo import geohash_encode
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "gazetteer.csv")
+
+def _normalize(text: str) -> str:
+    """Casefold, strip accents and punctuation: "Zürich " -> "zurich", "St. Petersburg" -> "st petersburg" """
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(re.sub(r"[^\w\s]", " ", text.casefold()).split())
+
+@lru_cache(maxsize=1)
+def _places() -> Dict[str, Tuple[float, float]]:
+    """Place lookups by "name" and "name, country"; the file lists larger places first"""
+    places: Dict[str, Tuple[float, float]] = {}
+    with open(GAZETTEER_PATH, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            point = (float(row["latitude"]), float(row["longitude"]))
+            names = [row["name"], *filter(None, row["aliases"].split("|"))]
+            for name in names:
+                places.setdefault(_normalize(name), point)
+                places.setdefault(_normalize(f"{name} {row['country']}"), point)
+    return places
+
+def resolve_location(location: Optional[str]) -> Optional[Tuple[float, float]]:
+    """Coordinates for a free-text location from the bundled gazetteer (no network).
+
+    Tries the whole text ("Portland, United States"), then its first
+    comma-separated part ("Portland, OR" -> "Portland").
+    """
+    if not location or not location.strip():
+        return None
+    places = _places()
+    point = places.get(_normalize(location))
+    if point is None and "," in location:
+        point = places.get(_normalize(location.split(",", 1)[0]))
+    return point
+
+def locate(
+    location: Optional[str], latitude: Optional[float], longitude: Optional[float]
+) -> Tuple[Optional[float], Optional[float], Optional[str]]:
+    """(latitude, longitude, geohash) for a profile: the given coordinates, else the
+    gazetteer's for ``location``, else all None"""
+    if latitude is None or longitude is None:
+        point = resolve_location(location)
+        if point is None:
+            return None, None, None
+        latitude, longitude = point
+    return latitude, longitude, geohash_encode(latitude, longitude)
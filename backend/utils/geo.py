@@ -0,0 +1,96 @@
+
+import math
+from typing import List, Optional, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+# ~5 m cells; prefixes of this serve every coarser search precision
+GEOHASH_PRECISION = 9
+
+def geohash_encode(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bit, value, even = 0, 0, True
+    while len(chars) < precision:
+        span, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (span[0] + span[1]) / 2
+        if coordinate >= middle:
+            value = (value << 1) | 1
+            span[0] = middle
+        else:
+            value <<= 1
+            span[1] = middle
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bit, value = 0, 0
+    return "".join(chars)
+
+def _cell_size(precision: int) -> Tuple[float, float]:
+    """(height, width) in degrees of a geohash cell"""
+    bits = 5 * precision
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+def geohash_cover(latitude: float, longitude: float, radius_km: float, max_cells: int = 16) -> List[str]:
+    """Geohash prefixes whose cells together contain the circle around a point.
+
+    Picks the finest precision that covers the circle's bounding box in at most
+    ``max_cells`` cells, so the prefix scan stays a few index ranges.
+    """
+    dlat = radius_km / KM_PER_DEGREE
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    dlon = min(radius_km / (KM_PER_DEGREE * cos_lat), 180.0)
+    south, north = max(latitude - dlat, -90.0), min(latitude + dlat, 90.0)
+    west, east = longitude - dlon, longitude + dlon
+
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = _cell_size(precision)
+        rows = math.floor(north / height) - math.floor(south / height) + 1
+        columns = math.floor(east / width) - math.floor(west / width) + 1
+        if rows * columns <= max_cells or precision == 1:
+            break
+
+    cells = []
+    for row in range(rows):
+        cell_lat = min(south + row * height, north)
+        for column in range(columns):
+            cell_lon = min(west + column * width, east)
+            cell_lon = (cell_lon + 180.0) % 360.0 - 180.0
+            cell = geohash_encode(cell_lat, cell_lon, precision)
+            if cell not in cells:
+                cells.append(cell)
+    # The box corners can land in a cell the stepping skipped
+    for corner_lat in (south, north):
+        for corner_lon in (west, east):
+            cell = geohash_encode(corner_lat, (corner_lon + 180.0) % 360.0 - 180.0, precision)
+            if cell not in cells:
+                cells.append(cell)
+    return cells
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+def clamp_radius(radius_km: Optional[float], default: float, maximum: float) -> float:
+    """Apply the default radius and cap it at ``maximum``"""
+    return min(radius_km or default, maximum)
+
+def parse_near(near: str, home: Optional[Tuple[Optional[float], Optional[float]]] = None) -> Tuple[float, float]:
+    """Parse a ``lat,lon`` query value, or ``me`` for the caller's own ``home`` coordinates"""
+    if near == "me":
+        if home is None or None in home:
+            raise ValueError("Add a known location or coordinates to your profile to search near you")
+        return home
+    try:
+        latitude, longitude = (float(part) for part in near.split(","))
+    except ValueError:
+        raise ValueError("near must be 'lat,lon'")
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError("near is out of range")
+    return latitude, longitude
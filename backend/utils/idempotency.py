@@ -0,0 +1,71 @@
+
+import hashlib
+from typing import Callable, Optional, Type
+
+import orjson
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from services.idempotency import IdempotencyService
+
+MAX_KEY_LENGTH = 255
+
+def request_fingerprint(scope: str, payload: BaseModel) -> str:
+    body = orjson.dumps(payload.model_dump(mode="json"), option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(scope.encode() + b"\n" + body).hexdigest()
+
+def run_idempotent(
+    db: Session,
+    key: Optional[str],
+    user_id: str,
+    scope: str,
+    payload: BaseModel,
+    response_model: Type[BaseModel],
+    run: Callable[[Session], object]
+):
+    """Run ``run(db)`` at most once per ``Idempotency-Key`` and user.
+
+    A repeat of a request that succeeded gets the stored response back with
+    ``Idempotent-Replayed: true``; one that arrives while the first is still
+    running gets 409. Reusing a key for a different route or body is a 422.
+    Failed requests release the key so they can be retried. Without a key
+    this is just ``run(db)``.
+    """
+    if key is None:
+        return run(db)
+    if not key.strip() or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"
+        )
+
+    fingerprint = request_fingerprint(scope, payload)
+    existing = IdempotencyService.claim(db, user_id, key, fingerprint)
+    if existing is not None:
+        if existing.fingerprint != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request"
+            )
+        if existing.status_code is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress",
+                headers={"Retry-After": "1"}
+            )
+        return Response(
+            existing.response_body,
+            status_code=existing.status_code,
+            media_type="application/json",
+            headers={"Idempotent-Replayed": "true"}
+        )
+
+    try:
+        result = run(db)
+        body = orjson.dumps(response_model.model_validate(result).model_dump(mode="json"))
+    except BaseException:
+        IdempotencyService.release(db, user_id, key)
+        raise
+    IdempotencyService.complete(db, user_id, key, status.HTTP_200_OK, body)
+    return Response(body, media_type="application/json")
@@ -0,0 +1,130 @@
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import requests
+
+class JWKSUnavailableError(Exception):
+    """Raised when no signing keys can be loaded"""
+
+class JWKSProvider:
+    """Clerk signing keys cached with a TTL and refreshed in the background.
+
+    Keys come from ``jwks_file`` when set (local development and tests) and from
+    ``jwks_url`` otherwise. Once the cached set is older than ``ttl`` seconds a
+    refresh runs on a daemon thread while requests keep using the current keys.
+    An unknown ``kid`` (key rotation) triggers a synchronous refresh, at most
+    once per ``min_refresh_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        jwks_url: str,
+        jwks_file: str = "",
+        secret_key: str = "",
+        ttl: int = 3600,
+        timeout: float = 5.0,
+        min_refresh_interval: int = 30
+    ):
+        self.jwks_url = jwks_url
+        self.jwks_file = jwks_file
+        self.secret_key = secret_key
+        self.ttl = ttl
+        self.timeout = timeout
+        self.min_refresh_interval = min_refresh_interval
+        self._lock = threading.Lock()
+        self._keys: Dict[str, dict] = {}
+        self._jwks: Optional[dict] = None
+        self._fetched_at = 0.0
+        self._refreshing = False
+
+    def _fetch(self) -> dict:
+        if self.jwks_file:
+            with open(self.jwks_file) as f:
+                return json.load(f)
+        headers = {"Authorization": f"Bearer {self.secret_key}"} if self.secret_key else {}
+        response = requests.get(self.jwks_url, headers=headers, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def refresh(self) -> dict:
+        """Load the key set now and replace the cached copy"""
+        try:
+            jwks = self._fetch()
+        except Exception as e:
+            raise JWKSUnavailableError(str(e))
+        keys = {key.get("kid"): key for key in jwks.get("keys", [])}
+        with self._lock:
+            self._jwks = jwks
+            self._keys = keys
+            self._fetched_at = time.monotonic()
+        return jwks
+
+    def _refresh_in_background(self) -> None:
+        try:
+            self.refresh()
+        except JWKSUnavailableError as e:
+            print(f"JWKS background refresh failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def get_jwks(self) -> dict:
+        """Return the cached key set, loading it on first use"""
+        with self._lock:
+            jwks = self._jwks
+            stale = time.monotonic() - self._fetched_at >= self.ttl
+            start_refresh = jwks is not None and stale and not self._refreshing
+            if start_refresh:
+                self._refreshing = True
+        if jwks is None:
+            return self.refresh()
+        if start_refresh:
+            threading.Thread(target=self._refresh_in_background, daemon=True).start()
+        return jwks
+
+    def get_key(self, kid: Optional[str]) -> Optional[dict]:
+        """Return the signing key for ``kid``, refreshing once if it is unknown"""
+        self.get_jwks()
+        key = self._keys.get(kid)
+        if key is None and time.monotonic() - self._fetched_at >= self.min_refresh_interval:
+            self.refresh()
+            key = self._keys.get(kid)
+        return key
+
+class VerifiedClaimsCache:
+    """Bounded LRU of verified token claims that expire with the token's ``exp``"""
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, token_hash: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(token_hash)
+            if entry is None:
+                return None
+            expires_at, claims = entry
+            if expires_at <= time.time():
+                del self._entries[token_hash]
+                return None
+            self._entries.move_to_end(token_hash)
+            return claims
+
+    def put(self, token_hash: str, claims: dict) -> None:
+        expires_at = claims.get("exp")
+        if not isinstance(expires_at, (int, float)):
+            return
+        with self._lock:
+            self._entries[token_hash] = (expires_at, claims)
+            self._entries.move_to_end(token_hash)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,186 @@
+
+import bisect
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from db.query_metrics import RequestQueries, current_queries
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+    """Fixed-bucket histogram; ``counts[i]`` holds observations in (buckets[i-1], buckets[i]]"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(labels: Iterable[Tuple[str, object]]) -> str:
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in labels)
+    return "{" + pairs + "}" if pairs else ""
+
+def _header(lines: List[str], name: str, kind: str, help_text: str) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+def _samples(lines: List[str], name: str, kind: str, help_text: str, samples: Iterable[Tuple[Labels, float]]) -> None:
+    _header(lines, name, kind, help_text)
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(labels)} {value}")
+
+def _histograms(lines: List[str], name: str, help_text: str, histograms: Dict[Labels, Histogram]) -> None:
+    _header(lines, name, "histogram", help_text)
+    for labels, histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(labels + (('le', bound),))} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+        lines.append(f"{name}_sum{_labels(labels)} {histogram.sum}")
+        lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+
+class RequestMetrics:
+    """Per-route latency, status and per-request query histograms for this worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._responses: Counter = Counter()
+        self._n_plus_one: Counter = Counter()
+        self._latency: Dict[Labels, Histogram] = {}
+        self._db_seconds: Dict[Labels, Histogram] = {}
+        self._db_statements: Dict[Labels, Histogram] = {}
+
+    @staticmethod
+    def _histogram(histograms: Dict[Labels, Histogram], labels: Labels, buckets) -> Histogram:
+        histogram = histograms.get(labels)
+        if histogram is None:
+            histogram = histograms[labels] = Histogram(buckets)
+        return histogram
+
+    def observe(self, method: str, route: str, status: int, seconds: float, queries: RequestQueries, n_plus_one: int) -> None:
+        labels = (("method", method), ("route", route))
+        with self._lock:
+            self._responses[labels + (("status", status),)] += 1
+            self._histogram(self._latency, labels, LATENCY_BUCKETS).observe(seconds)
+            self._histogram(self._db_seconds, labels, DB_TIME_BUCKETS).observe(queries.seconds)
+            self._histogram(self._db_statements, labels, STATEMENT_BUCKETS).observe(queries.count)
+            if n_plus_one:
+                self._n_plus_one[labels] += n_plus_one
+
+    def render(self, lines: List[str]) -> None:
+        with self._lock:
+            _samples(
+                lines, "http_requests_total", "counter", "Responses by route and status code",
+                sorted(self._responses.items())
+            )
+            _histograms(lines, "http_request_duration_seconds", "Request latency by route", self._latency)
+            _histograms(lines, "http_request_db_seconds", "Time spent in SQL per request", self._db_seconds)
+            _histograms(lines, "http_request_db_statements", "SQL statements per request", self._db_statements)
+            _samples(
+                lines, "http_request_n_plus_one_total", "counter",
+                "Statements repeated per row of a list within one request (possible N+1)",
+                sorted(self._n_plus_one.items())
+            )
+
+request_metrics = RequestMetrics()
+
+def render_metrics(queries: dict, pools: list, admission: Optional[dict], broadcast: Optional[dict] = None) -> str:
+    """Prometheus text exposition of request, query, pool, admission and broadcast metrics"""
+    lines: List[str] = []
+    request_metrics.render(lines)
+    _samples(lines, "db_statements_total", "counter", "SQL statements executed", [((), queries["statements"])])
+    _samples(lines, "db_statement_seconds_total", "counter", "Time spent executing SQL", [((), queries["seconds"])])
+    _samples(lines, "db_slow_queries_total", "counter", "Statements slower than SLOW_QUERY_MS", [((), queries["slow"])])
+    for name, key, kind, help_text in (
+        ("db_pool_checked_out", "checked_out", "gauge", "Connections checked out"),
+        ("db_pool_overflow", "overflow", "gauge", "Overflow connections in use"),
+        ("db_pool_checkouts_total", "checkouts", "counter", "Connection checkouts"),
+        ("db_pool_timeouts_total", "timeouts", "counter", "Checkouts that timed out"),
+    ):
+        _samples(lines, name, kind, help_text, [
+            ((("pool", pool["pool"]),), pool[key]) for pool in pools if key in pool
+        ])
+    if admission is not None:
+        routes = sorted(admission["routes"].items())
+        _samples(lines, "admission_queued", "gauge", "Requests waiting for a route slot", [
+            ((("route", route),), gate["queued"]) for route, gate in routes
+        ])
+        _samples(lines, "admission_active", "gauge", "Requests holding a route slot", [
+            ((("route", route),), gate["active"]) for route, gate in routes
+        ])
+        _samples(lines, "admission_shed_total", "counter", "Requests shed with 503", [
+            ((("route", route), ("reason", reason)), gate[f"shed_{reason}"])
+            for route, gate in routes for reason in ("queue_full", "deadline")
+        ])
+        _samples(lines, "admission_rate_limited_total", "counter", "Requests refused with 429", [
+            ((), admission["rate_limited"])
+        ])
+    if broadcast is not None and "queued" in broadcast:
+        for name, key, kind, help_text in (
+            ("broadcast_queued", "queued", "gauge", "NOTIFYs waiting to be sent"),
+            ("broadcast_published_total", "published", "counter", "NOTIFYs sent"),
+            ("broadcast_failures_total", "failures", "counter", "NOTIFY attempts that failed (retried)"),
+            ("broadcast_dropped_total", "dropped", "counter", "Messages dropped because the queue was full"),
+        ):
+            _samples(lines, name, kind, help_text, [((), broadcast[key])])
+    return "\n".join(lines) + "\n"
+
+class MetricsMiddleware:
+    """Records latency, status and the SQL each request ran, and logs likely N+1 patterns.
+
+    Registered outside admission control so shed requests and queue time are
+    counted too.
+    """
+
+    def __init__(self, app, n_plus_one_threshold: int):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        queries = RequestQueries(f"{scope['method']} {scope['path']}")
+        token = current_queries.set(queries)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_queries.reset(token)
+            # The router (or admission control) records the matched route in the scope
+            route = scope.get("route")
+            template = route.path if route is not None else "unmatched"
+            repeated = queries.repeated(self.n_plus_one_threshold)
+            for statement, count in repeated:
+                print(
+                    f"Possible N+1 in {scope['method']} {template}: ran {count}x "
+                    f"{' '.join(statement.split())[:300]}"
+                )
+            request_metrics.observe(scope["method"], template, status_code, elapsed, queries, len(repeated))
@@ -0,0 +1,55 @@
+
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+def _encode(values: list) -> str:
+    payload = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def _decode(cursor: str) -> list:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode()))
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    """Encode a (created_at, id) keyset position as an opaque cursor"""
+    return _encode([created_at.isoformat(), row_id])
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode an opaque cursor back into its (created_at, id) keyset position"""
+    try:
+        created_at, row_id = _decode(cursor)
+        return datetime.fromisoformat(created_at), str(row_id)
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+def encode_rating_cursor(rating_average: float, row_id: str) -> str:
+    """Encode a (rating_average, id) keyset position as an opaque cursor"""
+    return _encode([rating_average, row_id])
+
+def decode_rating_cursor(cursor: str) -> Tuple[float, str]:
+    """Decode an opaque cursor back into its (rating_average, id) keyset position"""
+    try:
+        rating_average, row_id = _decode(cursor)
+        return float(rating_average), str(row_id)
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+def encode_distance_cursor(distance: float, row_id: str) -> str:
+    """Encode a (distance, id) keyset position as an opaque cursor"""
+    return _encode([distance, row_id])
+
+def decode_distance_cursor(cursor: str) -> Tuple[float, str]:
+    """Decode an opaque cursor back into its (distance, id) keyset position"""
+    try:
+        distance, row_id = _decode(cursor)
+        return float(distance), str(row_id)
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+def clamp_limit(limit: Optional[int], default: int, maximum: int) -> int:
+    """Apply the default page size and the hard server-side cap"""
+    if not limit or limit < 1:
+        return default
+    return min(limit, maximum)
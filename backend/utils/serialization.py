@@ -0,0 +1,25 @@
+
+from functools import lru_cache
+from typing import Any, Iterable, List, Type
+
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+@lru_cache(maxsize=None)
+def list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    """One reusable List[model] validator/serializer per response schema"""
+    return TypeAdapter(List[model])
+
+def dump_list(model: Type[BaseModel], rows: Iterable[Any]) -> list:
+    """Validate rows (ORM rows, tuples with attribute access or dicts) in one call and dump them"""
+    adapter = list_adapter(model)
+    return adapter.dump_python(adapter.validate_python(rows, from_attributes=True), mode="json")
+
+def list_response(model: Type[BaseModel], rows: Iterable[Any], **fields) -> ORJSONResponse:
+    """Encode a list (or a page when ``fields`` are given) without a second response_model pass.
+
+    Returning a Response makes FastAPI skip its own validation and encoding, so
+    ``response_model`` on the route is kept for the OpenAPI schema only.
+    """
+    items = dump_list(model, rows)
+    return ORJSONResponse({"items": items, **fields} if fields else items)
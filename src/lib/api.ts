@@ -20,6 +20,12 @@ const apiCall = async (endpoint: string, token: string | null, options: RequestI
   return response.json();
 };
 
+// One page of a cursor-paginated list; pass next_cursor back to get the next page
+export interface Page<T> {
+  items: T[];
+  next_cursor: string | null;
+}
+
 // User API functions
 export const userApi = {
   // Sync user data from Clerk to backend
@@ -48,18 +54,55 @@ export const userApi = {
     return response;
   },
 
-  // Search users
-  searchUsers: async (token: string | null, skill?: string): Promise<User[]> => {
-    const params = skill ? `?skill=${encodeURIComponent(skill)}` : '';
-    return apiCall(`/users/search${params}`, token);
+  // Search users: one page of the cursor-paginated directory (pass the
+  // previous page's next_cursor as cursor for the next one)
+  // near: 'lat,lon' or 'me' (the caller's profile location), nearest first
+  searchUsers: async (
+    token: string | null,
+    skill?: string,
+    near?: string,
+    radiusKm?: number,
+    cursor?: string | null
+  ): Promise<Page<any>> => {
+    const params = new URLSearchParams();
+    if (skill) params.set('skill', skill);
+    if (near) params.set('near', near);
+    if (near && radiusKm) params.set('radius_km', String(radiusKm));
+    if (cursor) params.set('cursor', cursor);
+    return apiCall(`/users/search?${params.toString()}`, token);
+  },
+};
+
+// Skill API functions
+export const skillApi = {
+  // Autocomplete skill names, most offered/wanted first
+  suggestSkills: async (
+    token: string | null,
+    prefix: string
+  ): Promise<{ name: string; offered_count: number; wanted_count: number }[]> => {
+    const params = new URLSearchParams({ prefix });
+    return apiCall(`/skills/suggest?${params.toString()}`, token);
   },
 };
 
 // Swap API functions
 export const swapApi = {
-  // Get swap requests
-  getSwapRequests: async (token: string | null) => {
-    return apiCall('/swaps', token);
+  // Get one page of the newest-first inbox, optionally only sent/received
+  // and/or one status (pass the previous page's next_cursor as cursor)
+  getSwapRequests: async (
+    token: string | null,
+    filters: { direction?: 'sent' | 'received'; status?: string; cursor?: string | null } = {}
+  ): Promise<Page<any>> => {
+    const params = new URLSearchParams();
+    if (filters.direction) params.set('direction', filters.direction);
+    if (filters.status) params.set('status', filters.status);
+    if (filters.cursor) params.set('cursor', filters.cursor);
+    return apiCall(`/swaps/?${params.toString()}`, token);
+  },
+
+  // Sent/received counts per status, for the navigation badge
+  getSwapCounts: async (token: string | null) => {
+    return apiCall('/swaps/counts', token);
   },
 
   // Create swap request
@@ -86,6 +129,82 @@ export const swapApi = {
       method: 'PATCH',
     });
   },
+
+  // Live swap and feedback events for the signed-in user. Read with fetch
+  // rather than EventSource so the token travels in the Authorization header
+  // and is fetched fresh (Clerk tokens are short-lived) on every reconnect,
+  // which resumes after the last event seen. On 'reset' the missed events are
+  // gone and the inbox should be reloaded. Returns a function that closes the stream.
+  subscribeToEvents: (
+    getToken: () => Promise<string | null>,
+    onEvent: (type: string, data: any) => void,
+    onReset: () => void,
+  ) => {
+    const controller = new AbortController();
+    let lastEventId: string | null = null;
+
+    const dispatch = (block: string) => {
+      let id: string | null = null;
+      let type = 'message';
+      const data: string[] = [];
+      for (const line of block.split('\n')) {
+        if (line.startsWith(':')) continue;
+        const separator = line.indexOf(':');
+        const field = separator === -1 ? line : line.slice(0, separator);
+        const value = separator === -1 ? '' : line.slice(separator + 1).replace(/^ /, '');
+        if (field === 'id') id = value;
+        else if (field === 'event') type = value;
+        else if (field === 'data') data.push(value);
+      }
+      if (id !== null) lastEventId = id;
+      if (type === 'reset') onReset();
+      else if (data.length) onEvent(type, JSON.parse(data.join('\n')));
+    };
+
+    const connect = async () => {
+      const token = await getToken();
+      const response = await fetch(`${API_BASE_URL}/swaps/events`, {
+        headers: {
+          Accept: 'text/event-stream',
+          ...(token && { Authorization: `Bearer ${token}` }),
+          ...(lastEventId && { 'Last-Event-ID': lastEventId }),
+        },
+        signal: controller.signal,
+      });
+      if (!response.ok || !response.body) {
+        throw new Error(`Event stream failed: ${response.status} ${response.statusText}`);
+      }
+      const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+      let buffer = '';
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) return;
+        buffer += value.replace(/\r\n?/g, '\n');
+        let end: number;
+        while ((end = buffer.indexOf('\n\n')) !== -1) {
+          dispatch(buffer.slice(0, end));
+          buffer = buffer.slice(end + 2);
+        }
+      }
+    };
+
+    (async () => {
+      let delay = 1000;
+      while (!controller.signal.aborted) {
+        try {
+          await connect();
+          delay = 1000;
+        } catch (error) {
+          if (controller.signal.aborted) return;
+          console.log('API: Event stream error, reconnecting:', error);
+          delay = Math.min(delay * 2, 30000);
+        }
+        await new Promise((resolve) => setTimeout(resolve, delay));
+      }
+    })();
+
+    return () => controller.abort();
+  },
 };
 
 // Admin API functions
@@ -31,7 +31,7 @@ export const Admin = () => {
         const token = await getToken();
         
         // Load users
-        const allUsers = await userApi.searchUsers(token);
+        const { items: allUsers } = await userApi.searchUsers(token);
         const transformedUsers = allUsers.map((user: any) => ({
           id: user.id,
           name: user.name,
@@ -50,7 +50,7 @@ export const Admin = () => {
         setUsers(transformedUsers);
         
         // Load swap requests
-        const requests = await swapApi.getSwapRequests(token);
+        const { items: requests } = await swapApi.getSwapRequests(token);
         const transformedRequests = requests.map((req: any) => ({
           id: req.id,
           fromUserId: req.from_user_id,
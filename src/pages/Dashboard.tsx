@@ -10,12 +10,30 @@ import { useEffect, useState } from 'react';
 import { CheckCircle, XCircle, Clock, User as UserIcon, Bell } from 'lucide-react';
 import { toast } from 'sonner';
 
+type SwapList = 'received' | 'sent';
+
+// Transform backend data to frontend format
+const transformSwapRequest = (req: any): SwapRequest => ({
+  id: req.id,
+  fromUserId: req.from_user_id,
+  toUserId: req.to_user_id,
+  fromUserName: req.from_user_name,
+  toUserName: req.to_user_name,
+  skillOffered: req.skill_offered,
+  skillWanted: req.skill_wanted,
+  message: req.message,
+  status: req.status,
+  createdAt: req.created_at,
+  updatedAt: req.updated_at
+});
+
 export const Dashboard = () => {
   const { user } = useUser();
   const { getToken } = useAuth();
   const [swapRequests, setSwapRequests] = useState<SwapRequest[]>([]);
   const [users, setUsers] = useState<User[]>([]);
   const [isLoading, setIsLoading] = useState(true);
+  const [cursors, setCursors] = useState<Record<SwapList, string | null>>({ received: null, sent: null });
 
   useEffect(() => {
     const loadDashboardData = async () => {
@@ -25,31 +43,17 @@ export const Dashboard = () => {
         setIsLoading(true);
         const token = await getToken();
         
-        // Load swap requests
-        const requests = await swapApi.getSwapRequests(token);
-        console.log('Dashboard: Raw swap requests from API:', requests);
-        
-        // Transform backend data to frontend format
-        const transformedRequests = requests.map((req: any) => ({
-          id: req.id,
-          fromUserId: req.from_user_id,
-          toUserId: req.to_user_id,
-          fromUserName: req.from_user_name,
-          toUserName: req.to_user_name,
-          skillOffered: req.skill_offered,
-          skillWanted: req.skill_wanted,
-          message: req.message,
-          status: req.status,
-          createdAt: req.created_at,
-          updatedAt: req.updated_at
-        }));
-        
-        console.log('Dashboard: Transformed swap requests:', transformedRequests);
-        console.log('Dashboard: Current user ID:', user.id);
-        setSwapRequests(transformedRequests);
+        // Load the first page of each inbox list; more are fetched on demand
+        const [received, sent] = await Promise.all([
+          swapApi.getSwapRequests(token, { direction: 'received', status: 'pending' }),
+          swapApi.getSwapRequests(token, { direction: 'sent' }),
+        ]);
+        console.log('Dashboard: Raw swap requests from API:', received, sent);
+        setSwapRequests([...received.items, ...sent.items].map(transformSwapRequest));
+        setCursors({ received: received.next_cursor, sent: sent.next_cursor });
         
         // Load users for display
-        const allUsers = await userApi.searchUsers(token);
+        const { items: allUsers } = await userApi.searchUsers(token);
         const transformedUsers = allUsers.map((user: any) => ({
           id: user.id,
           name: user.name,
@@ -103,6 +107,28 @@ export const Dashboard = () => {
     }
   };
 
+  const loadMoreRequests = async (list: SwapList) => {
+    const cursor = cursors[list];
+    if (!getToken || !cursor) return;
+
+    try {
+      const token = await getToken();
+      const page = await swapApi.getSwapRequests(token, {
+        direction: list,
+        status: list === 'received' ? 'pending' : undefined,
+        cursor,
+      });
+      setSwapRequests(prev => {
+        const seen = new Set(prev.map(req => req.id));
+        return [...prev, ...page.items.map(transformSwapRequest).filter(req => !seen.has(req.id))];
+      });
+      setCursors(prev => ({ ...prev, [list]: page.next_cursor }));
+    } catch (error) {
+      console.error('Failed to load swap requests:', error);
+      toast.error('Failed to load swap requests');
+    }
+  };
+
   const getUserById = (id: string) => users.find(u => u.id === id);
 
   const pendingRequests = swapRequests.filter(req => req.status === 'pending' && req.toUserId === user?.id);
@@ -207,6 +233,11 @@ export const Dashboard = () => {
                     );
                   })
                 )}
+                {cursors.received && (
+                  <Button variant="outline" className="w-full" onClick={() => loadMoreRequests('received')}>
+                    Load more
+                  </Button>
+                )}
               </CardContent>
             </Card>
 
@@ -244,6 +275,11 @@ export const Dashboard = () => {
                     );
                   })
                 )}
+                {cursors.sent && (
+                  <Button variant="outline" className="w-full" onClick={() => loadMoreRequests('sent')}>
+                    Load more
+                  </Button>
+                )}
               </CardContent>
             </Card>
           </div>
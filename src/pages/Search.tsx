@@ -9,14 +9,14 @@ import { User } from '@/types';
 import { UserCard } from '@/components/UserCard';
 import { Popover, PopoverContent, PopoverTrigger } from '@/components/ui/popover';
 import { Label } from '@/components/ui/label';
-import { useQuery } from '@tanstack/react-query';
-import { userApi } from '@/lib/api';
+import { useInfiniteQuery } from '@tanstack/react-query';
+import { userApi, Page } from '@/lib/api';
 
-const fetchUsers = async (token: string | null): Promise<User[]> => {
-  const users = await userApi.searchUsers(token);
+const fetchUsers = async (token: string | null, cursor: string | null): Promise<Page<User>> => {
+  const page = await userApi.searchUsers(token, undefined, undefined, undefined, cursor);
   
   // Transform backend data (snake_case) to frontend format (camelCase)
-  return users.map((user: any) => ({
+  const items = page.items.map((user: any) => ({
     id: user.id,
     name: user.name,
     email: user.email || '',
@@ -31,6 +31,7 @@ const fetchUsers = async (token: string | null): Promise<User[]> => {
     createdAt: user.created_at || new Date().toISOString(),
     clerkId: user.id
   }));
+  return { items, next_cursor: page.next_cursor };
 };
 
 export const Search = () => {
@@ -40,14 +41,18 @@ export const Search = () => {
   const [locationFilter, setLocationFilter] = useState('');
   const [showFilters, setShowFilters] = useState(false);
 
-  const { data: users = [], isLoading, error } = useQuery({
+  // One directory page at a time; "Load more" fetches the next
+  const { data, isLoading, error, fetchNextPage, hasNextPage, isFetchingNextPage } = useInfiniteQuery({
     queryKey: ['users'],
-    queryFn: async () => {
+    queryFn: async ({ pageParam }) => {
       const token = await getToken();
-      return fetchUsers(token);
+      return fetchUsers(token, pageParam);
     },
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage) => lastPage.next_cursor,
     enabled: !!user,
   });
+  const users = useMemo(() => data?.pages.flatMap(page => page.items) ?? [], [data]);
 
   const filteredUsers = useMemo(() => {
     let filtered = users;
@@ -186,7 +191,15 @@ export const Search = () => {
         ))}
       </div>
 
-      {filteredUsers.length === 0 && !isLoading && (
+      {hasNextPage && (
+        <div className="mt-8 text-center">
+          <Button variant="outline" onClick={() => fetchNextPage()} disabled={isFetchingNextPage}>
+            {isFetchingNextPage ? 'Loading...' : 'Load more'}
+          </Button>
+        </div>
+      )}
+
+      {filteredUsers.length === 0 && !isLoading && !hasNextPage && (
         <div className="text-center py-12">
           {searchTerm || locationFilter ? (
             <>
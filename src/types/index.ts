@@ -4,6 +4,9 @@ export interface User {
   name: string;
   email: string;
   location?: string;
+  latitude?: number;
+  longitude?: number;
+  distanceKm?: number;
   profilePicture?: string;
   skillsOffered: string[];
   skillsWanted: string[];